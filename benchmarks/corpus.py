@@ -0,0 +1,48 @@
+# benchmarks/corpus.py
+
+import random
+
+APPS = ['notepad', 'calculator', 'visual studio code', 'firefox', 'terminal']
+
+LINE_TEMPLATES = [
+    "open {app}",
+    "type Hello/s{word}/e",
+    "type {word} {word} {word}/(ct + t)",
+    "wait 0",
+    "hello {word}",
+    "# {word} step",
+    "",
+    "close {app}",
+    "typerate 500",
+]
+
+WORDS = ['alpha', 'bravo', 'charlie', 'delta', 'echo', 'foxtrot', 'golf', 'hotel']
+
+
+def make_app_names(count, seed=1):
+    rng = random.Random(seed)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    names = set(APPS)
+    while len(names) < count:
+        names.add(''.join(rng.choice(letters) for _ in range(rng.randint(4, 12))))
+    return sorted(names)
+
+
+def make_script(lines, seed=0, templates=LINE_TEMPLATES):
+    rng = random.Random(seed)
+    out = []
+    for _ in range(lines):
+        template = rng.choice(templates)
+        out.append(template.format(app=rng.choice(APPS), word=rng.choice(WORDS)))
+    return '\n'.join(out) + '\n'
+
+
+def make_dispatch_script(lines, seed=0):
+    # Only commands that complete instantly with the fake backends
+    return make_script(lines, seed, [
+        "type Hello/s{word}/e",
+        "wait 0",
+        "hello {word}",
+        "typerate 500",
+        "unknowncmd {word}",
+    ])
@@ -0,0 +1,68 @@
+# benchmarks/fakes.py
+#
+# Stand-ins for the desktop backends so benchmarks measure Pach's own code
+# and run on machines without a display.
+
+import sys
+import types
+
+
+class FakePopen:
+    next_pid = 100000
+
+    def __init__(self, args, *a, **kw):
+        self.args = args
+        self.returncode = None
+        FakePopen.next_pid += 1
+        self.pid = FakePopen.next_pid
+
+    def poll(self):
+        return self.returncode
+
+    def terminate(self):
+        self.returncode = 0
+
+    def kill(self):
+        self.returncode = -9
+
+    def wait(self, timeout=None):
+        return self.returncode
+
+
+class NullKeyboard:
+    def write(self, text, interval):
+        pass
+
+    def press(self, key):
+        pass
+
+    def hotkey(self, keys):
+        pass
+
+    def paste(self, text):
+        pass
+
+
+class NullLogger:
+    def log(self, text, level='info', line=None, command=None):
+        pass
+
+
+def install():
+    pyautogui = types.ModuleType('pyautogui')
+    for name in ('write', 'typewrite', 'press', 'hotkey'):
+        setattr(pyautogui, name, lambda *a, **kw: None)
+    pyperclip = types.ModuleType('pyperclip')
+    pyperclip.copy = lambda text: None
+    pygetwindow = types.ModuleType('pygetwindow')
+    window = types.SimpleNamespace(title='Benchmark', activate=lambda: None)
+    pygetwindow.getAllTitles = lambda: [window.title]
+    pygetwindow.getWindowsWithTitle = lambda title: [window]
+    pygetwindow.getActiveWindow = lambda: window
+    sys.modules['pyautogui'] = pyautogui
+    sys.modules['pyperclip'] = pyperclip
+    sys.modules['pygetwindow'] = pygetwindow
+
+    # Only the process manager's view of subprocess is replaced
+    import core.processes
+    core.processes.subprocess = types.SimpleNamespace(Popen=FakePopen)
@@ -0,0 +1,233 @@
+# benchmarks/run.py
+#
+#   python -m benchmarks.run [--sizes 1000,10000,100000] [--only parser,highlighter]
+#                            [--output results.json] [--compare previous.json]
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+from benchmarks import fakes
+from benchmarks.corpus import make_app_names, make_dispatch_script, make_script
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+SUITES = ('parser', 'compiler', 'executor', 'completer', 'highlighter', 'editor')
+
+
+def measure(fn, repeat, number=1):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        timings.append((time.perf_counter() - start) / number)
+    return {
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'mean': statistics.fmean(timings),
+        'repeat': repeat,
+        'number': number,
+    }
+
+
+def record(results, name, size, stats, unit_count=None):
+    entry = {'name': name, 'size': size}
+    entry.update(stats)
+    if unit_count:
+        entry['per_unit_us'] = stats['min'] / unit_count * 1e6
+    results.append(entry)
+    per_unit = f"  ({entry['per_unit_us']:.3f} us/unit)" if unit_count else ''
+    print(f"{name:32} {size:>8}  min {stats['min'] * 1e3:10.3f} ms{per_unit}", flush=True)
+
+
+def make_session():
+    from core.session import create_session
+    with contextlib.redirect_stdout(io.StringIO()):
+        session = create_session(fakes.NullLogger())
+    session.executor.keyboard = fakes.NullKeyboard()
+    session.compiler.cache_path = ''  # measure compiling, not the disk cache
+    return session
+
+
+def bench_parser(results, sizes, repeat):
+    from core.parser import Parser
+    parser = Parser()
+    for size in sizes:
+        script = make_script(size)
+        record(results, 'parser.parse_script', size, measure(lambda: parser.parse_script(script), repeat), size)
+        record(results, 'parser.parse_numbered', size, measure(lambda: parser.parse_numbered(script), repeat), size)
+
+
+def bench_compiler(results, sizes, repeat):
+    session = make_session()
+    compiler = session.compiler
+    for size in sizes:
+        script = make_script(size)
+
+        def cold():
+            compiler.clear()
+            compiler.compile(script)
+        record(results, 'compiler.compile.cold', size, measure(cold, repeat), size)
+        compiler.compile(script)
+        record(results, 'compiler.compile.memory_hit', size,
+               measure(lambda: compiler.compile(script), repeat), size)
+
+
+def bench_executor(results, sizes, repeat):
+    from core.language import OP_COMMAND
+
+    session = make_session()
+    executor = session.executor
+    executor.paste_threshold = 0
+    for size in sizes:
+        program = session.compiler.compile(make_dispatch_script(size))
+        commands = [(i.name, i.args) for i in program if i.op == OP_COMMAND]
+
+        def run_program():
+            executor.control.reset()
+            with contextlib.redirect_stdout(io.StringIO()):
+                executor.run_program(program)
+
+        def run_execute():
+            with contextlib.redirect_stdout(io.StringIO()):
+                for name, args in commands:
+                    executor.execute(name, args)
+
+        record(results, 'executor.run_program', size, measure(run_program, repeat), size)
+        record(results, 'executor.execute', size, measure(run_execute, repeat), size)
+
+
+def bench_completer(results, sizes, repeat):
+    from core.completion import CompletionEngine
+    commands = ['open', 'close', 'type', 'wait', 'waitfor', 'typerate', 'hello']
+    queries = ['o', 'op', 'open a', 'open no', 'open vis', 'close f', 'type x /', 'type /(c', 'w', 'wa']
+    for size in sizes:
+        engine = CompletionEngine(commands, make_app_names(size))
+
+        def query_all():
+            for line in queries:
+                engine.complete(line)
+        record(results, 'completer.complete', size, measure(query_all, repeat, 10), len(queries))
+
+
+def qt_application():
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    try:
+        from PyQt5.QtWidgets import QApplication
+    except ImportError:
+        return None
+    return QApplication.instance() or QApplication([])
+
+
+def bench_highlighter(results, sizes, repeat):
+    if qt_application() is None:
+        print("highlighter: PyQt5 not available, skipped")
+        return
+    from ui.syntax_highlighter import HighlightRules
+    keywords = ['open', 'close', 'type', 'wait', 'waitfor', 'typerate', 'hello']
+    for size in sizes:
+        rules = HighlightRules(keywords, make_app_names(300))
+        lines = make_script(size).splitlines()
+
+        def tokenize():
+            for line in lines:
+                rules.spans(line)
+        record(results, 'highlighter.spans', size, measure(tokenize, repeat), size)
+
+
+def bench_editor(results, sizes, repeat):
+    app = qt_application()
+    if app is None:
+        print("editor: PyQt5 not available, skipped")
+        return
+    from PyQt5.QtGui import QTextCursor
+    from ui.editor import ScriptEditor
+    keywords = ['open', 'close', 'type', 'wait', 'waitfor', 'typerate', 'hello']
+    for size in sizes:
+        script = make_script(size)
+        editor = ScriptEditor(keywords=keywords, applications=make_app_names(300))
+
+        def load():
+            editor.setPlainText(script)
+            app.processEvents()
+        record(results, 'editor.setPlainText', size, measure(load, max(1, repeat // 2)), size)
+
+        cursor = editor.textCursor()
+        cursor.movePosition(QTextCursor.End)
+        editor.setTextCursor(cursor)
+
+        def complete():
+            editor.insertPlainText('\nopen no')
+            editor.update_completions()
+            editor.completer.popup().hide()
+        record(results, 'editor.update_completions', size, measure(complete, repeat, 10), 1)
+
+    # Thirty tabs sharing one compiled language, as the main window opens them
+    from ui.editor_language import EditorLanguage
+    language = EditorLanguage(keywords, make_app_names(300))
+    script = make_script(100)
+
+    def open_tabs():
+        editors = [ScriptEditor(language=language) for _ in range(30)]
+        for editor in editors:
+            editor.load_text(script)
+        app.processEvents()
+        for editor in editors:
+            editor.deleteLater()
+        app.processEvents()
+    record(results, 'editor.open_30_tabs', 100, measure(open_tabs, max(1, repeat // 2)), 30 * 100)
+
+
+def compare(results, previous_path):
+    with open(previous_path, 'r', encoding='utf-8') as f:
+        previous = {(r['name'], r['size']): r for r in json.load(f)['results']}
+    print(f"\n{'benchmark':32} {'size':>8} {'before ms':>10} {'after ms':>10} {'ratio':>7}")
+    for entry in results:
+        old = previous.get((entry['name'], entry['size']))
+        if old:
+            ratio = entry['min'] / old['min'] if old['min'] else float('inf')
+            print(f"{entry['name']:32} {entry['size']:>8} {old['min'] * 1e3:10.3f} "
+                  f"{entry['min'] * 1e3:10.3f} {ratio:7.2f}")
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(prog='benchmarks.run', description="Pach hot-path benchmarks.")
+    arg_parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                            help="comma separated script sizes in lines")
+    arg_parser.add_argument('--only', help=f"comma separated subset of: {', '.join(SUITES)}")
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    arg_parser.add_argument('--output', help="write results as JSON to this file")
+    arg_parser.add_argument('--compare', help="JSON results of an earlier run to compare against")
+    options = arg_parser.parse_args(argv)
+
+    fakes.install()
+    sizes = [int(size) for size in options.sizes.split(',') if size]
+    suites = options.only.split(',') if options.only else SUITES
+    results = []
+    for suite in suites:
+        globals()[f'bench_{suite}'](results, sizes, options.repeat)
+
+    if options.output:
+        with open(options.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                'meta': {
+                    'timestamp': time.time(),
+                    'python': sys.version.split()[0],
+                    'platform': platform.platform(),
+                    'sizes': sizes,
+                },
+                'results': results,
+            }, f, indent=2)
+    if options.compare:
+        compare(results, options.compare)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
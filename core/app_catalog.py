@@ -0,0 +1,194 @@
+# core/app_catalog.py
+
+import os
+import re
+import shlex
+import sys
+
+from core.file_io import read_index, write_index
+from core.paths import cache_dir
+
+INDEX_VERSION = 1
+
+# Known Windows programs; on other platforms apps come from .desktop files and PATH
+WINDOWS_APPS = {
+    'notepad': ['notepad.exe'],
+    'calculator': ['calc.exe'],
+}
+
+# Exec= field codes from the desktop entry spec, dropped when launching without files
+FIELD_CODE_PATTERN = re.compile(r'%[fFuUdDnNickvm]')
+
+
+def default_desktop_dirs():
+    if sys.platform.startswith('win') or sys.platform == 'darwin':
+        return []
+    data_home = os.environ.get('XDG_DATA_HOME') or os.path.join(os.path.expanduser('~'), '.local', 'share')
+    data_dirs = os.environ.get('XDG_DATA_DIRS') or '/usr/local/share:/usr/share'
+    dirs = [data_home] + [d for d in data_dirs.split(':') if d]
+    return [os.path.join(d, 'applications') for d in dirs]
+
+
+def default_path_dirs():
+    return [d for d in os.environ.get('PATH', '').split(os.pathsep) if d]
+
+
+def parse_desktop_file(path):
+    # Returns (name, command) for a launchable application entry, else None
+    entry = {}
+    in_entry = False
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith('['):
+                    if in_entry:
+                        break
+                    in_entry = line == '[Desktop Entry]'
+                elif in_entry and '=' in line:
+                    key, value = line.split('=', 1)
+                    entry.setdefault(key.strip(), value.strip())
+    except OSError:
+        return None
+
+    if entry.get('Type', 'Application') != 'Application':
+        return None
+    if entry.get('NoDisplay') == 'true' or entry.get('Hidden') == 'true':
+        return None
+    name, exec_line = entry.get('Name'), entry.get('Exec')
+    if not name or not exec_line:
+        return None
+    exec_line = FIELD_CODE_PATTERN.sub('', exec_line).replace('%%', '%')
+    try:
+        command = shlex.split(exec_line)
+    except ValueError:
+        return None
+    return (name, command) if command else None
+
+
+def scan_desktop_dir(directory):
+    apps = {}
+    for file_name in sorted(os.listdir(directory)):
+        if file_name.endswith('.desktop'):
+            parsed = parse_desktop_file(os.path.join(directory, file_name))
+            if parsed:
+                apps.setdefault(parsed[0], parsed[1])
+    return apps
+
+
+def scan_path_dir(directory):
+    apps = {}
+    windows = sys.platform.startswith('win')
+    extensions = os.environ.get('PATHEXT', '.EXE;.BAT;.CMD').lower().split(';') if windows else ()
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            try:
+                if not entry.is_file():
+                    continue
+            except OSError:
+                continue
+            name = entry.name
+            if windows:
+                stem, ext = os.path.splitext(name)
+                if ext.lower() not in extensions:
+                    continue
+                name = stem
+            elif not os.access(entry.path, os.X_OK):
+                continue
+            apps.setdefault(name, [entry.path])
+    return apps
+
+
+class AppCatalog:
+    def __init__(self, index_path=None, desktop_dirs=None, path_dirs=None, builtins=None):
+        self.index_path = cache_dir('apps.json') if index_path is None else index_path
+        self.desktop_dirs = default_desktop_dirs() if desktop_dirs is None else desktop_dirs
+        self.path_dirs = default_path_dirs() if path_dirs is None else path_dirs
+        if builtins is None:
+            builtins = WINDOWS_APPS if sys.platform.startswith('win') else {}
+        self.builtins = builtins
+
+        self._dirs = {}
+        self._apps = None        # lowercase name -> command, desktop entries and builtins
+        self._path_apps = None   # lowercase name -> command, executables on PATH
+        self._display_names = []
+        self.generation = 0      # bumped whenever the set of known apps changes
+
+    def _ensure_loaded(self):
+        if self._apps is None:
+            self.refresh()
+
+    def refresh(self, force=False):
+        cached = {} if force else self._read_index()
+        dirs = {}
+        changed = force
+
+        for kind, directories in (('desktop', self.desktop_dirs), ('path', self.path_dirs)):
+            for directory in directories:
+                if directory in dirs:
+                    continue
+                try:
+                    mtime = os.stat(directory).st_mtime
+                except OSError:
+                    changed = changed or directory in cached
+                    continue
+                entry = cached.get(directory)
+                if entry and entry.get('mtime') == mtime and entry.get('kind') == kind:
+                    dirs[directory] = entry
+                    continue
+                # Only directories whose entries changed since the last run are rescanned
+                scan = scan_desktop_dir if kind == 'desktop' else scan_path_dir
+                try:
+                    apps = scan(directory)
+                except OSError:
+                    continue
+                dirs[directory] = {'kind': kind, 'mtime': mtime, 'apps': apps}
+                changed = True
+
+        if set(cached) - set(dirs):
+            changed = True
+        self._dirs = dirs
+        self._build(dirs)
+        if changed:
+            self._write_index(dirs)
+
+    def _build(self, dirs):
+        apps, path_apps, display = {}, {}, {}
+        for name, command in self.builtins.items():
+            apps[name.lower()] = command
+            display.setdefault(name.lower(), name)
+        # Earlier directories win, matching XDG and PATH precedence
+        for entry in dirs.values():
+            target = apps if entry['kind'] == 'desktop' else path_apps
+            for name, command in entry['apps'].items():
+                key = name.lower()
+                if key not in target:
+                    target[key] = command
+                    if entry['kind'] == 'desktop':
+                        display.setdefault(key, name)
+        if apps != self._apps or path_apps != self._path_apps:
+            self.generation += 1
+        self._apps = apps
+        self._path_apps = path_apps
+        self._display_names = sorted(display.values(), key=str.lower)
+
+    def _read_index(self):
+        return read_index(self.index_path, INDEX_VERSION, 'dirs')
+
+    def _write_index(self, dirs):
+        write_index(self.index_path, INDEX_VERSION, 'dirs', dirs)
+
+    def names(self, include_path=False):
+        self._ensure_loaded()
+        if include_path:
+            return sorted(set(self._display_names) | set(self._path_apps), key=str.lower)
+        return list(self._display_names)
+
+    def resolve(self, name):
+        self._ensure_loaded()
+        key = name.strip().lower()
+        command = self._apps.get(key) or self._path_apps.get(key)
+        return list(command) if command else None
+
+    def __contains__(self, name):
+        return self.resolve(name) is not None
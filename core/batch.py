@@ -0,0 +1,221 @@
+# core/batch.py
+
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from core.control import ScriptAborted
+from core.language import APP_COMMANDS, OP_COMMAND, ScriptError, Template
+from core.linter import ERROR, Linter
+from core.output import capture_stdout
+from core.session import PLUGINS_DIR, create_session
+
+MODES = ('validate', 'dry-run', 'run', 'simulate')
+
+_worker_context = None
+
+
+def find_scripts(target):
+    if os.path.isdir(target):
+        pattern = os.path.join(target, '**', '*.psc')
+    else:
+        pattern = target
+    return sorted(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+
+
+class RecordingLogger:
+    def __init__(self, limit=200):
+        self.limit = limit
+        self.lines = []
+        self.errors = []
+
+    def log(self, text, level='info', line=None, command=None):
+        if level == 'error':
+            self.errors.append(text)  # executor errors already name their line
+        if len(self.lines) < self.limit:
+            self.lines.append(text)
+
+
+class BatchContext:
+    # One warm registry/executor/plugin set, reused for every script in a process
+    def __init__(self, plugins_dir=PLUGINS_DIR):
+        self.logger = RecordingLogger()
+        # Plugins printing on import must not end up in the JSON report on stdout
+        with capture_stdout(self.logger.log):
+            self.session = create_session(self.logger, plugins_dir)
+        executor = self.session.executor
+        self.defaults = (executor.type_interval, executor.paste_threshold)
+        self.linter = Linter(self.session.registry, executor.catalog, self.session.compiler.parser)
+        self.simulation = None
+
+    def analyze(self, script_text, warnings=None):
+        # (program, errors, desktop); unknown applications go to `warnings`, as in the editor
+        registry = self.session.registry
+        try:
+            program = self.session.compiler.compile(script_text)
+        except ScriptError as e:
+            return (), [str(e)], False
+        errors = []
+        desktop = False
+        for instruction in program:
+            if instruction.op != OP_COMMAND:
+                continue
+            if instruction.handler is None:
+                errors.append(f"line {instruction.line}: unknown command '{instruction.name}'")
+                continue
+            desktop = desktop or registry.is_desktop(instruction.name)
+            if instruction.name in APP_COMMANDS and not isinstance(instruction.operand, Template):
+                problem = self.linter.check_application(instruction.name, instruction.args)
+                if problem is not None:
+                    message = f"line {instruction.line}: {problem[1]}"
+                    if problem[0] == ERROR:
+                        errors.append(message)
+                    elif warnings is not None:
+                        warnings.append(message)
+            decoder = registry.get_decoder(instruction.name)
+            if decoder and isinstance(instruction.operand, str):
+                # The compiler keeps the raw text when decoding fails
+                try:
+                    decoder(instruction.args)
+                except ValueError as e:
+                    errors.append(f"line {instruction.line}: {instruction.name}: {e}")
+        return program, errors, desktop
+
+    def process(self, path, mode, update_golden=False):
+        started = time.perf_counter()
+        result = {'path': path, 'mode': mode, 'status': 'ok', 'desktop': False,
+                  'commands': 0, 'errors': []}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                script_text = f.read()
+            warnings = []
+            program, errors, desktop = self.analyze(script_text, warnings)
+            commands = sum(1 for i in program if i.op == OP_COMMAND)
+            result.update(commands=commands, desktop=desktop, errors=errors)
+            if warnings:
+                result['warnings'] = warnings
+            if errors:
+                result['status'] = 'invalid'
+            elif mode == 'dry-run':
+                result['plan'] = [f"{i.line}: {i.echo}" for i in program if i.op == OP_COMMAND]
+            elif mode == 'run':
+                self._run(program, result)
+            elif mode == 'simulate':
+                self._simulate(path, script_text, result, update_golden)
+        except Exception as e:
+            result.update(status='error', errors=[str(e)])
+        result['duration'] = round(time.perf_counter() - started, 6)
+        return result
+
+    def _run(self, program, result):
+        logger = self.logger
+        logger.lines, logger.errors = [], []
+        executor = self.session.executor
+        # Settings a previous script changed (typerate) must not leak into this one
+        executor.type_interval, executor.paste_threshold = self.defaults
+        executor.control.reset()
+        try:
+            with capture_stdout(logger.log):
+                executor.run_program(program)
+        except ScriptAborted:
+            result['status'] = 'aborted'
+        except ScriptError as e:
+            logger.errors.append(str(e))
+        if logger.errors:
+            result['status'] = 'failed'
+            result['errors'] = list(logger.errors)
+        result['log'] = list(logger.lines)
+
+    def _simulate(self, path, script_text, result, update_golden):
+        from core.simulation import Simulation, compare_golden, golden_path, write_golden
+
+        if self.simulation is None:
+            # Programs compiled from now on bind the simulated plugin commands
+            self.simulation = Simulation(self.session.executor)
+            self.session.compiler.clear()
+        simulation = self.simulation
+        simulation.reset()
+        self.logger.lines, self.logger.errors = [], []
+        with capture_stdout(self.logger.log):
+            status = simulation.run(self.session.compiler.compile(script_text))
+        lines = simulation.lines()
+        result.update(events=len(lines), virtual_duration=round(simulation.clock.now, 3))
+        errors = [event['message'] for event in simulation.events if event['event'] == 'error']
+        if status == 'failed':
+            # A script that stopped on an error fails whatever its golden says
+            result.update(status='failed', errors=errors)
+            return
+        golden = golden_path(path)
+        if update_golden:
+            write_golden(golden, lines)
+            result['status'] = 'updated'
+        elif not os.path.exists(golden):
+            result['status'] = 'no-golden'
+        else:
+            diff = compare_golden(lines, golden)
+            if diff:
+                result.update(status='mismatch', errors=diff[:200])
+        if errors and result['status'] in ('ok', 'no-golden', 'updated'):
+            result['errors'] = errors
+
+
+def _init_worker(plugins_dir):
+    global _worker_context
+    _worker_context = BatchContext(plugins_dir)
+
+
+def _process_in_worker(path, mode, update_golden=False):
+    return _worker_context.process(path, mode, update_golden)
+
+
+def _classify(context, path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return context.analyze(f.read())[2]
+    except Exception:
+        return False  # unreadable scripts are reported by the worker
+
+
+def run_batch(paths, mode='validate', jobs=None, plugins_dir=PLUGINS_DIR, on_result=None,
+              update_golden=False):
+    if mode not in MODES:
+        raise ValueError(f"unknown batch mode '{mode}'")
+    started = time.time()
+    clock = time.perf_counter()
+
+    # Desktop-touching scripts only need serializing when they actually run
+    local_context = BatchContext(plugins_dir) if mode == 'run' else None
+    serial = [p for p in paths if local_context and _classify(local_context, p)]
+    serial_set = set(serial)
+    parallel = [p for p in paths if p not in serial_set]
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(plugins_dir,)) as pool:
+        futures = {path: pool.submit(_process_in_worker, path, mode, update_golden) for path in parallel}
+        # The desktop queue runs here, one script at a time, while the pool works
+        for path in serial:
+            results[path] = local_context.process(path, mode)
+            if on_result:
+                on_result(results[path])
+        for path, future in futures.items():
+            try:
+                results[path] = future.result()
+            except Exception as e:
+                results[path] = {'path': path, 'mode': mode, 'status': 'error',
+                                 'errors': [str(e)], 'duration': 0.0}
+            if on_result:
+                on_result(results[path])
+
+    scripts = [results[path] for path in paths]
+    summary = {}
+    for result in scripts:
+        summary[result['status']] = summary.get(result['status'], 0) + 1
+    return {
+        'mode': mode,
+        'started': started,
+        'duration': round(time.perf_counter() - clock, 6),
+        'summary': summary,
+        'scripts': scripts,
+    }
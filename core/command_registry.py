@@ -1,14 +1,56 @@
 # core/command_registry.py
 
+import hashlib
+import threading
+
+
 class CommandRegistry:
     def __init__(self):
         self._commands = {}
+        self._decoders = {}
+        self._desktop = set()  # commands that drive the real keyboard, windows or apps
+        self.version = 0
+        self._signature = None
+        # Held by writers; a lazily loaded plugin registers all its commands
+        # under it so readers on other threads never see half a plugin
+        self.lock = threading.RLock()
 
-    def register_command(self, name, handler):
-        self._commands[name.lower()] = handler
+    def register_command(self, name, handler, decoder=None, desktop=False):
+        name = name.lower()
+        with self.lock:
+            self._commands[name] = handler
+            if decoder:
+                self._decoders[name] = decoder
+            else:
+                self._decoders.pop(name, None)
+            if desktop:
+                self._desktop.add(name)
+            else:
+                self._desktop.discard(name)
+            self.version += 1
+            self._signature = None
 
     def get_command(self, name):
         return self._commands.get(name.lower())
 
+    def get_decoder(self, name):
+        return self._decoders.get(name.lower())
+
+    def is_desktop(self, name):
+        return name.lower() in self._desktop
+
     def all_commands(self):
-        return list(self._commands.keys())
+        with self.lock:
+            return list(self._commands.keys())
+
+    def signature(self):
+        # Stable across processes: changes only when commands or their decoders change
+        with self.lock:
+            if self._signature is None:
+                digest = hashlib.sha1()
+                for name in sorted(self._commands):
+                    decoder = self._decoders.get(name)
+                    decoder_name = getattr(decoder, '__qualname__', '') if decoder else ''
+                    digest.update(f"{name}:{decoder_name};".encode('utf-8'))
+                self._signature = digest.hexdigest()
+            return self._signature
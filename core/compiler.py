@@ -0,0 +1,264 @@
+# core/compiler.py
+
+import hashlib
+import os
+import pickle
+from collections import OrderedDict, namedtuple
+
+from core.file_io import write_atomic
+from core.language import (
+    CONTROL_KEYWORDS, OP_COMMAND, OP_JUMP, OP_JUMP_IF_FALSE, OP_REPEAT_INIT, OP_REPEAT_NEXT,
+    OP_BREAK_REPEAT, OP_SET, OP_CALL, OP_RETURN, OP_HALT,
+    Condition, ScriptError, Template, has_variables, parse_value,
+)
+from core.parser import Parser
+from core.paths import cache_dir
+
+# Bump when the compiled layout or a core decoder changes meaning
+COMPILER_VERSION = 4
+
+# `echo` is the pre-formatted "> cmd args" line logged before each command runs.
+# `op` selects what the executor does with the instruction (see core/language.py);
+# `target` is the jump destination of control instructions.
+Instruction = namedtuple('Instruction', 'line name args operand handler echo op target',
+                         defaults=(OP_COMMAND, None))
+
+
+class Compiler:
+    def __init__(self, registry, parser=None, plugin_manager=None,
+                 cache_path=None, memory_size=64):
+        self.registry = registry
+        self.parser = parser or Parser()
+        self.plugin_manager = plugin_manager
+        self.cache_path = cache_dir('compiled') if cache_path is None else cache_path
+        self.memory_size = memory_size
+        self._memory = OrderedDict()
+
+    def cache_key(self, script_text):
+        digest = hashlib.sha256()
+        digest.update(f"v{COMPILER_VERSION}|{self.registry.signature()}|".encode('utf-8'))
+        if self.plugin_manager is not None:
+            digest.update(self.plugin_manager.signature().encode('utf-8'))
+        digest.update(b'|')
+        digest.update(script_text.encode('utf-8'))
+        return digest.hexdigest()
+
+    def compile(self, script_text):
+        key = self.cache_key(script_text)
+        # Bound programs hold handlers, so they are also dropped whenever a handler
+        # is replaced (a lazy plugin loading), even if the signature is unchanged
+        memory_key = (self.registry.version, key)
+        cached = self._memory.get(memory_key)
+        if cached is not None:
+            self._memory.move_to_end(memory_key)
+            return cached
+
+        entries = self._load(key)
+        if entries is None:
+            entries = self._decode(script_text)
+            self._store(key, entries)
+
+        program = tuple(self._bind(entries))
+        self._memory[memory_key] = program
+        if len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+        return program
+
+    def clear(self):
+        self._memory.clear()
+
+    def check(self, script_text):
+        # Structural errors only (blocks, procedures); nothing is cached
+        try:
+            self._decode(script_text)
+        except ScriptError as e:
+            return e
+        return None
+
+    def _decode(self, script_text):
+        # Flattens the script into (line, name, args, operand, op, target) entries:
+        # the main program, a halt, then every procedure body
+        main, procedures = self._split_procedures(self.parser.parse_numbered(script_text))
+        entries = []
+        calls = []
+        self._assemble(main, entries, calls, in_procedure=False)
+        entries.append((0, 'stop', '', None, OP_HALT, None))
+        starts = {}
+        for name, (line, body) in procedures.items():
+            starts[name] = len(entries)
+            self._assemble(body, entries, calls, in_procedure=True)
+            entries.append((line, 'return', '', None, OP_RETURN, None))
+        for index, name in calls:
+            if name not in starts:
+                raise ScriptError(entries[index][0], f"unknown procedure '{name}'")
+            entries[index] = entries[index][:5] + (starts[name],)
+        return entries
+
+    def _split_procedures(self, commands):
+        main = []
+        procedures = {}
+        body = None
+        depth = 0
+        main_depth = 0  # open blocks of the main program
+        for line, name, args in commands:
+            if body is None:
+                if name == 'define':
+                    if main_depth:
+                        raise ScriptError(line, "procedures cannot be defined inside blocks")
+                    if not args.strip() or len(args.split()) > 1:
+                        raise ScriptError(line, "define needs a single procedure name")
+                    if args.strip() in procedures:
+                        raise ScriptError(line, f"procedure '{args.strip()}' is defined twice")
+                    body = []
+                    procedures[args.strip()] = (line, body)
+                    depth = 0
+                else:
+                    if name in ('repeat', 'loop', 'if'):
+                        main_depth += 1
+                    elif name == 'end' and main_depth:
+                        main_depth -= 1
+                    main.append((line, name, args))
+                continue
+            if name == 'define':
+                raise ScriptError(line, "procedures cannot be nested")
+            if name in ('repeat', 'loop', 'if'):
+                depth += 1
+            elif name == 'end':
+                if depth == 0:
+                    body = None
+                    continue
+                depth -= 1
+            body.append((line, name, args))
+        if body is not None:
+            name = next(reversed(procedures))
+            raise ScriptError(procedures[name][0], f"define '{name}' is missing its end")
+        return main, procedures
+
+    def _assemble(self, commands, entries, calls, in_procedure):
+        blocks = []  # open repeat/loop/if blocks: [kind, line, position, pending jumps]
+        for line, name, args in commands:
+            if name not in CONTROL_KEYWORDS:
+                entries.append((line, name, args, self._operand(name, args), OP_COMMAND, None))
+                continue
+            here = len(entries)
+            if name == 'set':
+                parts = args.split(maxsplit=1)
+                if not parts or not parts[0].isidentifier():
+                    raise ScriptError(line, "set needs a variable name")
+                try:
+                    value = parse_value(parts[1] if len(parts) > 1 else '')
+                except ValueError as e:
+                    raise ScriptError(line, f"set: {e}") from None
+                entries.append((line, name, args, (parts[0], value), OP_SET, None))
+            elif name == 'repeat':
+                entries.append((line, name, args, self._repeat_count(line, args), OP_REPEAT_INIT, None))
+                entries.append((line, name, args, None, OP_REPEAT_NEXT, None))
+                blocks.append(['repeat', line, here + 1, []])
+            elif name == 'loop':
+                blocks.append(['loop', line, here, []])
+            elif name == 'if':
+                if not args.strip():
+                    raise ScriptError(line, "if needs a condition")
+                entries.append((line, name, args, Condition(args), OP_JUMP_IF_FALSE, None))
+                blocks.append(['if', line, here, []])
+            elif name == 'else':
+                if not blocks or blocks[-1][0] != 'if':
+                    raise ScriptError(line, "else without if")
+                block = blocks[-1]
+                block[0] = 'else'
+                entries.append((line, name, args, None, OP_JUMP, None))
+                self._patch(entries, [block[2]], here + 1)
+                block[3].append(here)
+            elif name == 'end':
+                if not blocks:
+                    raise ScriptError(line, "end without an open block")
+                kind, _, position, pending = blocks.pop()
+                if kind in ('repeat', 'loop'):
+                    entries.append((line, name, args, None, OP_JUMP, position))
+                    exits = pending + ([position] if kind == 'repeat' else [])
+                    self._patch(entries, exits, here + 1)
+                elif kind == 'if':
+                    self._patch(entries, [position], here)
+                else:
+                    self._patch(entries, pending, here)
+            elif name == 'break':
+                block = next((b for b in reversed(blocks) if b[0] in ('repeat', 'loop')), None)
+                if block is None:
+                    raise ScriptError(line, "break outside repeat or loop")
+                op = OP_BREAK_REPEAT if block[0] == 'repeat' else OP_JUMP
+                entries.append((line, name, args, None, op, None))
+                block[3].append(here)
+            elif name == 'call':
+                if not args.strip():
+                    raise ScriptError(line, "call needs a procedure name")
+                entries.append((line, name, args, None, OP_CALL, None))
+                calls.append((here, args.strip()))
+            elif name == 'return':
+                if not in_procedure:
+                    raise ScriptError(line, "return outside define")
+                entries.append((line, name, args, None, OP_RETURN, None))
+            elif name == 'stop':
+                entries.append((line, name, args, None, OP_HALT, None))
+        if blocks:
+            kind, line = blocks[-1][0], blocks[-1][1]
+            raise ScriptError(line, f"{'if' if kind == 'else' else kind} is missing its end")
+
+    def _repeat_count(self, line, args):
+        args = args.strip()
+        if has_variables(args):
+            return Template(args)
+        try:
+            count = int(args)
+        except ValueError:
+            raise ScriptError(line, f"repeat needs a whole number, got '{args}'") from None
+        if count < 0:
+            raise ScriptError(line, "repeat count cannot be negative")
+        return count
+
+    @staticmethod
+    def _patch(entries, indices, target):
+        for index in indices:
+            entries[index] = entries[index][:5] + (target,)
+
+    def _operand(self, name, args):
+        if has_variables(args):
+            # Expanded and decoded by the executor at runtime
+            return Template(args)
+        decoder = self.registry.get_decoder(name)
+        if decoder:
+            try:
+                return decoder(args)
+            except ValueError:
+                # Leave the raw text so the handler reports the problem at runtime
+                return args
+        return args
+
+    def _bind(self, entries):
+        get_command = self.registry.get_command
+        for line, name, args, operand, op, target in entries:
+            handler = get_command(name) if op == OP_COMMAND else None
+            yield Instruction(line, name, args, operand, handler, f"> {name} {args}", op, target)
+
+    def _cache_file(self, key):
+        return os.path.join(self.cache_path, key + '.pickle')
+
+    def _load(self, key):
+        if not self.cache_path:
+            return None
+        try:
+            with open(self._cache_file(key), 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # A stale or corrupt cache entry is simply recompiled
+            return None
+
+    def _store(self, key, entries):
+        if not self.cache_path:
+            return
+        try:
+            os.makedirs(self.cache_path, exist_ok=True)
+            write_atomic(self._cache_file(key), pickle.dumps(entries, protocol=pickle.HIGHEST_PROTOCOL), sync=False)
+        except OSError:
+            pass
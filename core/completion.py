@@ -0,0 +1,89 @@
+# core/completion.py
+
+import heapq
+from bisect import bisect_left
+from collections import Counter
+
+from core.keys import ESCAPE_SUGGESTIONS
+from core.language import APP_COMMANDS
+
+# Commands whose argument may contain /escape sequences
+ESCAPE_COMMANDS = ('type',)
+
+
+class PrefixIndex:
+    def __init__(self, words=()):
+        self.set_words(words)
+
+    def set_words(self, words):
+        # Sorted lowercase keys with the original spelling kept alongside
+        pairs = sorted({word.lower(): word for word in words}.items())
+        self._keys = [key for key, _ in pairs]
+        self._words = [word for _, word in pairs]
+
+    def __len__(self):
+        return len(self._keys)
+
+    def search(self, prefix):
+        prefix = prefix.lower()
+        start = bisect_left(self._keys, prefix)
+        end = bisect_left(self._keys, prefix + '\uffff', start)
+        return self._words[start:end]
+
+
+class CompletionEngine:
+    def __init__(self, commands=(), applications=(), escapes=ESCAPE_SUGGESTIONS):
+        self.indexes = {
+            'command': PrefixIndex(commands),
+            'application': PrefixIndex(applications),
+            'escape': PrefixIndex(escapes),
+        }
+        self.usage = Counter()
+
+    def set_commands(self, commands):
+        self.indexes['command'].set_words(commands)
+
+    def set_applications(self, applications):
+        self.indexes['application'].set_words(applications)
+
+    def record_use(self, word):
+        self.usage[word.lower()] += 1
+
+    def context(self, line):
+        # Returns (kind, prefix) for the text left of the cursor, or (None, '')
+        if '#' in line:
+            return None, ''
+        stripped = line.lstrip()
+        parts = stripped.split(None, 1)
+        if not parts:
+            return None, ''
+        if len(parts) == 1 and not stripped[-1].isspace():
+            return 'command', parts[0]
+
+        command = parts[0].lower()
+        argument = parts[1] if len(parts) > 1 else ''
+        if command in APP_COMMANDS:
+            return 'application', argument
+        if command in ESCAPE_COMMANDS:
+            slash = argument.rfind('/')
+            if slash >= 0 and not any(ch.isspace() for ch in argument[slash:]):
+                return 'escape', argument[slash:]
+        return None, ''
+
+    def complete(self, line, limit=50):
+        kind, prefix = self.context(line)
+        if kind is None or not prefix:
+            return kind, prefix, []
+        matches = self.indexes[kind].search(prefix)
+        if len(matches) == 1 and matches[0].lower() == prefix.lower():
+            return kind, prefix, []  # already fully typed
+
+        usage = self.usage
+        if len(matches) > limit or usage:
+            # Most used first, then alphabetical (matches are already sorted)
+            matches = heapq.nsmallest(
+                limit, enumerate(matches),
+                key=lambda item: (-usage.get(item[1].lower(), 0), item[0]),
+            )
+            matches = [word for _, word in matches]
+        return kind, prefix, matches
@@ -0,0 +1,74 @@
+# core/control.py
+
+import threading
+import time
+
+
+class ScriptAborted(Exception):
+    pass
+
+
+class ExecutionControl:
+    def __init__(self, poll_interval=0.05):
+        self.poll_interval = poll_interval
+        self.tracer = None  # when set, time spent in sleep() is reported as blocked
+        self._abort = threading.Event()
+        self._resume = threading.Event()
+        self._resume.set()
+
+    def reset(self):
+        self._abort.clear()
+        self._resume.set()
+
+    def abort(self):
+        self._abort.set()
+        self._resume.set()  # wake a paused script so it can exit
+
+    def pause(self):
+        self._resume.clear()
+
+    def resume(self):
+        self._resume.set()
+
+    def now(self):
+        # Clock used for timeouts; the simulator substitutes virtual time
+        return time.monotonic()
+
+    @property
+    def aborted(self):
+        return self._abort.is_set()
+
+    @property
+    def paused(self):
+        return not self._resume.is_set()
+
+    def checkpoint(self):
+        # Blocks while paused, raises once an abort has been requested
+        self._resume.wait()
+        if self._abort.is_set():
+            raise ScriptAborted()
+
+    def sleep(self, seconds):
+        if self.tracer is None:
+            return self._sleep(seconds)
+        started = time.monotonic()
+        try:
+            self._sleep(seconds)
+        finally:
+            self.tracer.add_blocked(time.monotonic() - started)
+
+    def _sleep(self, seconds):
+        deadline = time.monotonic() + max(0.0, seconds)
+        while True:
+            if self.paused:
+                paused_at = time.monotonic()
+                self.checkpoint()
+                # Time spent paused does not count towards the wait
+                deadline += time.monotonic() - paused_at
+            elif self._abort.is_set():
+                raise ScriptAborted()
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            self._abort.wait(min(remaining, self.poll_interval))
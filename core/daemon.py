@@ -0,0 +1,411 @@
+# core/daemon.py
+#
+# Long-lived executor service. Scripts arrive as jobs over a Unix domain socket
+# and run against warm sessions (registry, plugins, automation backends).
+#
+# Wire format: one JSON object per line in each direction.
+#   {"op": "submit", "script": "...", "name": "...", "priority": 0, "stream": true}
+#       -> {"type": "accepted", "job": 1, "desktop": true}
+#          {"type": "log", "job": 1, "level": "info", "message": "...", "line": 3}  (stream only)
+#          {"type": "result", "job": 1, "status": "finished", "duration": 0.1, "errors": [...]}
+#   {"op": "jobs"}                  -> {"type": "jobs", "jobs": [...]}
+#   {"op": "cancel", "job": 1}      -> {"type": "cancelled", "job": 1, "ok": true}
+#   {"op": "ping"} / {"op": "shutdown"}
+
+import heapq
+import itertools
+import json
+import os
+import queue
+import socket
+import threading
+import time
+
+from core.language import ScriptError
+from core.output import capture_stdout
+from core.paths import cache_dir
+from core.runner import ScriptRunner
+from core.session import PLUGINS_DIR, create_session
+
+MAX_REQUEST_BYTES = 16 * 1024 * 1024
+FINAL_STATUSES = ('finished', 'failed', 'aborted', 'invalid', 'cancelled')
+
+
+def default_socket_path():
+    path = os.environ.get('PACH_SOCKET')
+    if path:
+        return path
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir:
+        return os.path.join(runtime_dir, 'pach.sock')
+    return cache_dir('daemon.sock')
+
+
+class Job:
+    def __init__(self, job_id, script, name, priority, desktop):
+        self.id = job_id
+        self.script = script
+        self.name = name
+        self.priority = priority
+        self.desktop = desktop
+        self.status = 'queued'
+        self.submitted = time.time()
+        self.started = None
+        self.duration = None
+        self.errors = []
+        self.control = None  # the executor's control while running
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        subscriber = queue.SimpleQueue()
+        with self._lock:
+            if self.status in FINAL_STATUSES:
+                subscriber.put(self.result())
+            else:
+                self._subscribers.append(subscriber)
+        return subscriber
+
+    def publish(self, message):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.put(message)
+
+    def start(self, control):
+        # queued -> running; False when the job was cancelled before it got here
+        with self._lock:
+            if self.status != 'queued':
+                return False
+            self.status = 'running'
+            self.control = control
+            self.started = time.perf_counter()
+            return True
+
+    def cancel(self):
+        # Queued jobs finish as cancelled, running ones are asked to abort
+        with self._lock:
+            if self.status == 'running':
+                if self.control is not None:
+                    self.control.abort()
+                return True
+            if self.status != 'queued':
+                return False
+        self.finish('cancelled')
+        return True
+
+    def finish(self, status):
+        with self._lock:
+            if self.status in FINAL_STATUSES:
+                return  # already reported, e.g. cancelled while queued
+            self.status = status
+            if self.started is not None:
+                self.duration = round(time.perf_counter() - self.started, 6)
+            subscribers, self._subscribers = self._subscribers, []
+        result = self.result()
+        for subscriber in subscribers:
+            subscriber.put(result)
+
+    def result(self):
+        return {'type': 'result', 'job': self.id, 'status': self.status,
+                'duration': self.duration, 'errors': self.errors[:100]}
+
+    def describe(self):
+        return {'job': self.id, 'name': self.name, 'priority': self.priority,
+                'desktop': self.desktop, 'status': self.status, 'submitted': self.submitted}
+
+
+class _JobLogger:
+    # Executor logger of one worker; records go to the job it is running
+    def __init__(self):
+        self.job = None
+
+    def log(self, text, level='info', line=None, command=None):
+        job = self.job
+        if job is None:
+            return
+        if level == 'error':
+            job.errors.append(text)  # executor errors already name their line
+        job.publish({'type': 'log', 'job': job.id, 'level': level, 'message': text, 'line': line})
+
+
+class JobQueue:
+    # Highest priority first, then submission order
+    def __init__(self):
+        self._heap = []
+        self._condition = threading.Condition()
+        self._closed = False
+
+    def put(self, job):
+        with self._condition:
+            heapq.heappush(self._heap, (-job.priority, job.id, job))
+            self._condition.notify()
+
+    def get(self):
+        with self._condition:
+            while True:
+                while self._heap:
+                    job = heapq.heappop(self._heap)[2]
+                    if job.status == 'queued':
+                        return job
+                if self._closed:
+                    return None
+                self._condition.wait()
+
+    def __len__(self):
+        with self._condition:
+            return sum(1 for _, _, job in self._heap if job.status == 'queued')
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+
+class _Worker(threading.Thread):
+    def __init__(self, name, jobs, plugins_dir, preload):
+        super().__init__(name=name, daemon=True)
+        self.jobs = jobs
+        self.logger = _JobLogger()
+        self.session = create_session(self.logger, plugins_dir)
+        executor = self.session.executor
+        self.defaults = (executor.type_interval, executor.paste_threshold)
+        self.runner = ScriptRunner(executor, self.session.compiler)
+        if preload:
+            warm_up(executor)
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            self.execute(job)
+
+    def execute(self, job):
+        executor = self.session.executor
+        # Settings a previous job changed (typerate) do not carry over
+        executor.type_interval, executor.paste_threshold = self.defaults
+        executor.control.reset()
+        self.logger.job = job
+        try:
+            try:
+                self.session.compiler.compile(job.script)
+            except ScriptError as e:
+                self.logger.log(str(e), 'error', e.line)
+                job.finish('invalid')
+                return
+            if not job.start(executor.control):
+                return  # cancelled after it was taken off the queue
+            # Plugin print() output belongs to the job, not the daemon's stdout
+            with capture_stdout(self.logger.log):
+                status = self.runner.run(job.script)
+            job.finish(status)
+        finally:
+            self.logger.job = None
+            job.control = None
+
+
+def warm_up(executor):
+    # Import the automation backends now rather than during the first job
+    try:
+        executor.keyboard.gui
+    except Exception:
+        pass
+    try:
+        executor.windows.available
+    except Exception:
+        pass
+    executor.catalog.names()
+
+
+class Daemon:
+    def __init__(self, socket_path=None, workers=2, plugins_dir=PLUGINS_DIR, preload=True):
+        if not hasattr(socket, 'AF_UNIX'):
+            raise RuntimeError("the daemon needs Unix domain sockets, which this platform lacks")
+        self.socket_path = socket_path or default_socket_path()
+        # Desktop jobs share one worker so they never fight over keyboard and windows;
+        # everything else runs on the general workers
+        self.desktop_queue = JobQueue()
+        self.general_queue = JobQueue()
+        self.workers = [_Worker('pach-desktop-worker', self.desktop_queue, plugins_dir, preload)]
+        self.workers += [_Worker(f'pach-worker-{n}', self.general_queue, plugins_dir, False)
+                         for n in range(max(0, workers))]
+        self.registry = self.workers[0].session.registry
+        self.parser = self.workers[0].session.compiler.parser
+        self.jobs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._server = None
+        self._stopping = threading.Event()
+
+    def is_desktop(self, script):
+        for _, name, _ in self.parser.parse_numbered(script):
+            if self.registry.is_desktop(name):
+                return True
+        return False
+
+    def submit(self, script, name='', priority=0):
+        job = self.create_job(script, name, priority)
+        self.enqueue(job)
+        return job
+
+    def create_job(self, script, name='', priority=0):
+        # A job no worker sees yet, so callers can subscribe before it runs
+        desktop = self.is_desktop(script) or len(self.workers) == 1
+        with self._lock:
+            job = Job(next(self._ids), script, name, priority, desktop)
+            self.jobs[job.id] = job
+            self._forget_old_jobs()
+        return job
+
+    def enqueue(self, job):
+        (self.desktop_queue if job.desktop else self.general_queue).put(job)
+
+    def cancel(self, job_id):
+        job = self.jobs.get(job_id)
+        return job is not None and job.cancel()
+
+    def _forget_old_jobs(self, keep=1000):
+        if len(self.jobs) > keep:
+            for job_id in [i for i, job in self.jobs.items() if job.status in FINAL_STATUSES][:len(self.jobs) - keep]:
+                del self.jobs[job_id]
+
+    # --- Socket server ---
+    def serve_forever(self):
+        if os.path.exists(self.socket_path):
+            if _socket_alive(self.socket_path):
+                raise RuntimeError(f"a daemon is already listening on {self.socket_path}")
+            os.remove(self.socket_path)  # left behind by a daemon that died
+        os.makedirs(os.path.dirname(os.path.abspath(self.socket_path)), exist_ok=True)
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Only this user may submit scripts; the socket is created with that mode
+        # rather than chmod-ed afterwards, which would leave a window open
+        previous_umask = os.umask(0o177)
+        try:
+            self._server.bind(self.socket_path)
+        finally:
+            os.umask(previous_umask)
+        self._server.listen(64)
+        for worker in self.workers:
+            worker.start()
+        try:
+            while not self._stopping.is_set():
+                try:
+                    connection, _ = self._server.accept()
+                except OSError:
+                    break
+                threading.Thread(target=self._handle, args=(connection,), daemon=True).start()
+        finally:
+            self.close()
+
+    def shutdown(self):
+        self._stopping.set()
+        for job in list(self.jobs.values()):
+            self.cancel(job.id)
+        if self._server is not None:
+            try:
+                self._server.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._server.close()
+
+    def close(self):
+        self.desktop_queue.close()
+        self.general_queue.close()
+        for worker in self.workers:
+            worker.session.plugin_manager.close()
+            worker.session.executor.process_manager.wait_closed()
+        try:
+            os.remove(self.socket_path)
+        except OSError:
+            pass
+
+    def _handle(self, connection):
+        try:
+            with connection, connection.makefile('rwb') as stream:
+                try:
+                    line = stream.readline(MAX_REQUEST_BYTES)
+                    request = json.loads(line)
+                    for message in self._dispatch(request):
+                        stream.write(json.dumps(message).encode('utf-8') + b'\n')
+                        stream.flush()
+                except ValueError as e:
+                    stream.write(json.dumps({'type': 'error', 'message': str(e)}).encode('utf-8') + b'\n')
+                    stream.flush()
+        except OSError:
+            pass  # the client went away; its job keeps running
+
+    def _dispatch(self, request):
+        if not isinstance(request, dict):
+            raise ValueError("a request must be a JSON object")
+        op = request.get('op')
+        if op == 'submit':
+            script, name = request.get('script', ''), request.get('name') or ''
+            if not isinstance(script, str) or not isinstance(name, str):
+                raise ValueError("script and name must be strings")
+            try:
+                priority = int(request.get('priority') or 0)
+            except (TypeError, ValueError):
+                raise ValueError("priority must be a whole number") from None
+            job = self.create_job(script, name, priority)
+            # Subscribed before a worker can take the job, so no log line is missed
+            subscriber = job.subscribe() if request.get('stream', True) else None
+            self.enqueue(job)
+            yield {'type': 'accepted', 'job': job.id, 'desktop': job.desktop}
+            if subscriber is None:
+                return
+            while True:
+                message = subscriber.get()
+                if message['type'] == 'log' and not request.get('logs', True):
+                    continue
+                yield message
+                if message['type'] == 'result':
+                    return
+        elif op == 'jobs':
+            with self._lock:
+                jobs = [job.describe() for job in self.jobs.values()]
+            yield {'type': 'jobs', 'jobs': jobs,
+                   'queued': {'desktop': len(self.desktop_queue), 'general': len(self.general_queue)}}
+        elif op == 'cancel':
+            yield {'type': 'cancelled', 'job': request.get('job'), 'ok': self.cancel(request.get('job'))}
+        elif op == 'ping':
+            yield {'type': 'pong', 'pid': os.getpid()}
+        elif op == 'shutdown':
+            yield {'type': 'shutdown'}
+            self.shutdown()
+        else:
+            yield {'type': 'error', 'message': f"unknown op '{op}'"}
+
+
+def _socket_alive(path):
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+
+class DaemonClient:
+    def __init__(self, socket_path=None, timeout=None):
+        self.socket_path = socket_path or default_socket_path()
+        self.timeout = timeout
+
+    def request(self, op, **fields):
+        # Yields the daemon's reply messages as they arrive
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.settimeout(self.timeout)
+        try:
+            connection.connect(self.socket_path)
+            with connection.makefile('rwb') as stream:
+                stream.write(json.dumps(dict(fields, op=op)).encode('utf-8') + b'\n')
+                stream.flush()
+                for line in stream:
+                    yield json.loads(line)
+        finally:
+            connection.close()
+
+    def submit(self, script, name='', priority=0, stream=True):
+        return self.request('submit', script=script, name=name, priority=priority, stream=stream)
@@ -1,17 +1,67 @@
 # core/executor.py
 
-import pyautogui
-import subprocess
-import time
-from PyQt5.QtWidgets import QApplication
-import pygetwindow as gw
+from core.app_catalog import AppCatalog
+from core.control import ExecutionControl, ScriptAborted
+from core.processes import ProcessManager, executable_name
+from core.keys import KeySequence, PyAutoGuiKeyboard, TEXT, KEY
+from core.language import (
+    OP_COMMAND, OP_JUMP, OP_JUMP_IF_FALSE, OP_REPEAT_INIT, OP_REPEAT_NEXT,
+    OP_BREAK_REPEAT, OP_SET, OP_CALL, OP_RETURN, OP_HALT, MAX_CALL_DEPTH,
+    ScriptError, Template,
+)
+from core.tracing import Tracer
+from core.readiness import ProcessProbe, WaitTarget, parse_wait_target, wait_until
+from core.windows import TypeTarget, WindowRegistry, parse_type_target, parse_window_target
+
+
+def decode_seconds(text):
+    try:
+        return float(text)
+    except ValueError:
+        raise ValueError(f"expected a number, got '{text.strip()}'") from None
 
 
 class Executor:
-    def __init__(self, command_registry, logger):
+    def __init__(self, command_registry, logger, catalog=None, keyboard=None):
         self.registry = command_registry
         self.logger = logger
-        self.opened_processes = {}
+        self.catalog = catalog or AppCatalog()
+        self.keyboard = keyboard or PyAutoGuiKeyboard()
+        self.control = ExecutionControl()
+        self.tracer = None
+        self.monitor = None  # ExecutionMonitor fed with per-line progress, if any
+        self.variables = {}  # script variables of the current run
+        self.failures = 0    # commands of the current run that failed or were unknown
+
+        # Typing: seconds between characters, and the text-run length from which
+        # text is pasted through the clipboard instead (0 disables pasting)
+        self.type_interval = 0.05
+        self.paste_threshold = 200
+
+        # Readiness: polled with backoff instead of fixed sleeps
+        self.processes = ProcessProbe()
+        # Launched apps, several instances per name; closing never blocks the script
+        self.process_manager = ProcessManager(self.processes, log=self._log_background)
+        # Cached, indexed view of the desktop's windows; backend picked on first use
+        self.windows = WindowRegistry(process_name=lambda pid: self.processes.snapshot().get(pid))
+        self.ready_timeout = 10.0
+        self.focus_timeout = 2.0
+        # typeto re-checks its window's focus at most this often while typing; every
+        # check may cost a subprocess (xprop under wmctrl)
+        self.focus_check_interval = 0.5
+        self.open_settle = 1.0  # fallback delay when windows cannot be detected
+
+    def register_core_commands(self):
+        register = self.registry.register_command
+        register('open', self.cmd_open, desktop=True)
+        register('wait', self.cmd_wait, decoder=decode_seconds)
+        register('close', self.cmd_close, desktop=True)
+        register('closeall', self.cmd_closeall, desktop=True)
+        register('type', self.cmd_type, decoder=KeySequence.parse, desktop=True)
+        register('typerate', self.cmd_typerate, decoder=decode_seconds)
+        register('waitfor', self.cmd_waitfor, decoder=parse_wait_target, desktop=True)
+        register('focus', self.cmd_focus, decoder=parse_window_target, desktop=True)
+        register('typeto', self.cmd_typeto, decoder=parse_type_target, desktop=True)
 
     def execute(self, command_name, args):
         self.logger.log(f"Executing command: {command_name} with args: {args}")
@@ -21,60 +71,333 @@ class Executor:
         else:
             self.logger.log(f"Unknown command: {command_name}")
 
+    def enable_tracing(self):
+        self.tracer = Tracer()
+        self.control.tracer = self.tracer
+        return self.tracer
+
+    def disable_tracing(self):
+        self.tracer = None
+        self.control.tracer = None
+
+    def run_program(self, program, on_progress=None):
+        # Runs compiled instructions; handlers and operands are already resolved.
+        # Control instructions move the program counter, commands run their handler.
+        control = self.control
+        log = self.logger.log
+        tracer = self.tracer
+        observed = tracer is not None or self.monitor is not None
+        variables = self.variables = {}
+        self.failures = 0
+        counters = []  # remaining iterations of the open repeat blocks
+        frames = []    # (return pc, counter depth) of active calls
+        total = len(program)
+        pc = 0
+        while pc < total:
+            instruction = program[pc]
+            index = pc
+            pc += 1
+            op = instruction.op
+            if op != OP_COMMAND:
+                try:
+                    if op == OP_JUMP:
+                        control.checkpoint()  # keeps empty loops stoppable
+                        pc = instruction.target
+                    elif op == OP_REPEAT_NEXT:
+                        if counters[-1] > 0:
+                            counters[-1] -= 1
+                        else:
+                            counters.pop()
+                            pc = instruction.target
+                    elif op == OP_JUMP_IF_FALSE:
+                        if not instruction.operand.evaluate(variables):
+                            pc = instruction.target
+                    elif op == OP_SET:
+                        name, value = instruction.operand
+                        variables[name] = value.render(variables)
+                    elif op == OP_REPEAT_INIT:
+                        counters.append(self._repeat_count(instruction.operand, variables))
+                    elif op == OP_BREAK_REPEAT:
+                        counters.pop()
+                        pc = instruction.target
+                    elif op == OP_CALL:
+                        if len(frames) >= MAX_CALL_DEPTH:
+                            raise RecursionError(f"calls nested deeper than {MAX_CALL_DEPTH}")
+                        control.checkpoint()
+                        frames.append((pc, len(counters)))
+                        pc = instruction.target
+                    elif op == OP_RETURN:
+                        pc, depth = frames.pop()
+                        del counters[depth:]
+                    elif op == OP_HALT:
+                        return
+                except (NameError, ValueError, ZeroDivisionError, RecursionError) as e:
+                    raise ScriptError(instruction.line, f"{instruction.name}: {e}") from None
+                continue
+
+            control.checkpoint()
+            if type(instruction.operand) is Template:
+                instruction = self._expand(instruction, variables)
+            if on_progress:
+                on_progress(index, total, instruction)
+            line, name = instruction.line, instruction.name
+            log(instruction.echo, line=line, command=name)
+            handler = instruction.handler
+            if handler is None:
+                self.failures += 1
+                if self.monitor is not None:
+                    self.monitor.command_finished(line, None, f"unknown command '{name}'")
+                log(f"Unknown command: {name}", 'error', line, name)
+                continue
+            if observed:
+                self._run_observed(instruction)
+                continue
+            try:
+                handler(instruction.operand)
+            except ScriptAborted:
+                raise
+            except Exception as e:
+                self.failures += 1
+                log(f"Error executing command '{name}' on line {line}: {e}", 'error', line, name)
+
+    def _expand(self, instruction, variables):
+        try:
+            args = instruction.operand.render(variables)
+        except NameError as e:
+            raise ScriptError(instruction.line, f"{instruction.name}: {e}") from None
+        operand = args
+        decoder = self.registry.get_decoder(instruction.name)
+        if decoder:
+            try:
+                operand = decoder(args)
+            except ValueError:
+                operand = args
+        return instruction._replace(args=args, operand=operand, echo=f"> {instruction.name} {args}")
+
+    @staticmethod
+    def _repeat_count(count, variables):
+        if isinstance(count, Template):
+            text = count.render(variables).strip()
+            try:
+                count = int(float(text))
+            except ValueError:
+                raise ValueError(f"repeat needs a number, got '{text}'") from None
+        return max(0, count)
+
+    def _run_observed(self, instruction):
+        # Slow path of run_program: the command is timed for the tracer and/or monitor
+        line, name = instruction.line, instruction.name
+        tracer, monitor = self.tracer, self.monitor
+        monitor_start = monitor.command_started(line) if monitor is not None else None
+        start = tracer.begin() if tracer is not None else None
+        try:
+            instruction.handler(instruction.operand)
+        except ScriptAborted:
+            if tracer is not None:
+                tracer.end(instruction, start, 'aborted')
+            raise  # neither completed nor failed
+        except Exception as e:
+            self.failures += 1
+            error = str(e) or type(e).__name__
+            if tracer is not None:
+                tracer.end(instruction, start, error)
+            if monitor is not None:
+                monitor.command_finished(line, monitor_start, error)
+            self.logger.log(f"Error executing command '{name}' on line {line}: {e}", 'error', line, name)
+        else:
+            if tracer is not None:
+                tracer.end(instruction, start)
+            if monitor is not None:
+                monitor.command_finished(line, monitor_start)
+
     def cmd_open(self, app_name):
-        app_name = app_name.lower()
-        apps = {
-            'notepad': 'notepad.exe',
-            'calculator': 'calc.exe',
-        }
-        exe = apps.get(app_name)
-        if not exe:
+        app_name = app_name.strip().lower()
+        command = self.catalog.resolve(app_name)
+        if not command:
             self.logger.log(f"Unknown application '{app_name}'")
             return
-        proc = subprocess.Popen(exe)
-        self.opened_processes[app_name] = proc
-        self.logger.log(f"Opened {app_name}")
-
-        # Wait a moment for app to open
-        time.sleep(1)
-        
-        # Focus window (Windows only)
+        self.process_manager.launch(app_name, command)
+        self.windows.invalidate()
+        count = len(self.process_manager.instances(app_name))
+        self.logger.log(f"Opened {app_name}" + (f" (instance {count})" if count > 1 else ""))
+
+        if not self.windows.available:
+            # No window detection on this platform, give the app a moment instead
+            self.control.sleep(self.open_settle)
+            return
+
+        # Focus the app's window as soon as it appears
         try:
-            windows = gw.getWindowsWithTitle(app_name.capitalize())
-            if windows:
-                windows[0].activate()
+            window = wait_until(lambda: self.app_window(app_name), self.ready_timeout, self.control)
+            if window is None:
+                self.logger.log(f"No {app_name} window appeared within {self.ready_timeout:g} seconds", 'warning')
+            elif self.windows.focus(window):
                 self.logger.log(f"Focused {app_name} window")
+        except ScriptAborted:
+            raise
         except Exception as e:
             self.logger.log(f"Failed to focus {app_name} window: {e}")
 
-    def cmd_wait(self, seconds_str):
+    def cmd_wait(self, seconds):
         try:
-            seconds = float(seconds_str)
-            self.logger.log(f"Waiting for {seconds} seconds...")
-            QApplication.processEvents()  # keep UI responsive during wait
-            time.sleep(seconds)
+            seconds = float(seconds)
         except ValueError:
-            self.logger.log(f"Invalid wait time: {seconds_str}")
+            self.logger.log(f"Invalid wait time: {seconds}")
+            return
+        self.logger.log(f"Waiting for {seconds} seconds...")
+        self.control.sleep(seconds)
 
-    def cmd_close(self, app_name):
-        app_name = app_name.lower()
-        proc = self.opened_processes.get(app_name)
-        if proc:
-            proc.terminate()
-            proc.wait()
-            self.logger.log(f"Closed {app_name}")
-            del self.opened_processes[app_name]
+    def cmd_waitfor(self, target):
+        if not isinstance(target, WaitTarget):
+            try:
+                target = parse_wait_target(target)
+            except ValueError as e:
+                self.logger.log(f"Invalid waitfor: {e}")
+                return
+        timeout = self.ready_timeout if target.timeout is None else target.timeout
+
+        if target.kind == 'window':
+            if not self.windows.available:
+                raise RuntimeError("window detection is not available on this platform")
+            probe = self.windows.find
         else:
+            probe = self.processes.find
+
+        self.logger.log(f"Waiting for {target.kind} '{target.name}'...")
+        if not wait_until(lambda: probe(target.name), timeout, self.control):
+            raise TimeoutError(f"{target.kind} '{target.name}' not found within {timeout:g} seconds")
+        self.logger.log(f"Found {target.kind} '{target.name}'")
+
+    def cmd_close(self, app_name):
+        # Only instances this script opened
+        self._close(app_name.strip().lower(), external=False)
+
+    def cmd_closeall(self, app_name):
+        # Also instances started elsewhere, found by the app's executable name
+        self._close(app_name.strip().lower(), external=True)
+
+    def _close(self, app_name, external):
+        process_names = []
+        if external:
+            command = self.catalog.resolve(app_name)
+            executable = executable_name(command) if command else None
+            if executable:
+                process_names.append(executable)
+        count = self.process_manager.close(app_name, process_names, external)
+        self.windows.invalidate()
+        if count:
+            self.logger.log(f"Closing {app_name}" + (f" ({count} processes)" if count > 1 else ""))
+        elif external:
             self.logger.log(f"No running instance of {app_name} found.")
+        else:
+            self.logger.log(f"No instance of {app_name} opened by this script; "
+                            f"'closeall {app_name}' also closes ones started elsewhere.")
+
+    def _log_background(self, text, level='info'):
+        # Messages from the process reaper thread
+        self.logger.log(text, level)
+
+    def app_window(self, target):
+        # Window of an app this script launched, else of a process or title matching `target`
+        key = target.strip().lower()
+        return self.windows.window_for_app(key, self.process_manager.instances(key))
+
+    def _find_target_window(self, target):
+        if not self.windows.available:
+            raise RuntimeError("window detection is not available on this platform")
+        window = wait_until(lambda: self.app_window(target), self.focus_timeout, self.control)
+        if window is None:
+            raise LookupError(f"no window found for '{target}' within {self.focus_timeout:g} seconds")
+        return window
+
+    def _is_active(self, window):
+        active = self.windows.active_window()
+        return active is not None and active.handle == window.handle
+
+    def _focus_window(self, window):
+        # Activates the window and waits until the desktop reports it active
+        if not self.windows.reports_active:
+            self.windows.focus(window)
+            return  # the backend cannot tell which window is active
+        if self._is_active(window):
+            return
+        self.windows.focus(window)
+        if not wait_until(lambda: self._is_active(window), self.focus_timeout, self.control):
+            raise RuntimeError(f"could not focus '{window.title}'")
+
+    def cmd_focus(self, target):
+        target = parse_window_target(target)
+        window = self._find_target_window(target)
+        self._focus_window(window)
+        self.logger.log(f"Focused {window.title}")
+
+    def cmd_typeto(self, target):
+        # Like type, but only into the given window: it is focused first and typing
+        # stops (rather than going elsewhere) if it cannot be focused again
+        if not isinstance(target, TypeTarget):
+            target = parse_type_target(target)
+        window = self._find_target_window(target.window)
+        self.logger.log(f"Typing into {window.title}: {target.keys.raw}")
+        self._focus_window(window)
+        guard = None
+        if self.windows.reports_active:
+            checked = [self.control.now()]  # just focused
+            guard = lambda: self._keep_focus(window, checked)
+        self.send_keys(target.keys.events, guard)
+
+    def _keep_focus(self, window, checked):
+        now = self.control.now()
+        if now - checked[0] < self.focus_check_interval:
+            return
+        checked[0] = now
+        if self._is_active(window):
+            return
+        active = self.windows.active_title()
+        self.logger.log(f"Focus moved to '{active}', focusing {window.title} again", 'warning')
+        self._focus_window(window)
 
-    def cmd_type(self, text):
-        self.logger.log(f"Typing text: {text}")
-
-        # Replace special sequences
-        text = text.replace('/e', '\n')
-        text = text.replace('/t', '\t')
-        text = text.replace('/b', '\b')
-        text = text.replace('/s', ' ')
-        
-        time.sleep(0.5)  # small delay to ensure target window is focused
-        pyautogui.typewrite(text, interval=0.05)
+    def cmd_type(self, keys):
+        # Compiled scripts pass a pre-decoded KeySequence, ad-hoc calls pass raw text
+        if not isinstance(keys, KeySequence):
+            keys = KeySequence.parse(keys)
+        self.logger.log(f"Typing text: {keys.raw}")
+        # Types into whatever has focus right away; scripts that need a particular
+        # window say so with focus or typeto, which wait for it
+        self.send_keys(keys.events)
+
+    def send_keys(self, events, guard=None):
+        # guard, when given, runs before every key and chunk of text (typeto's focus check)
+        keyboard = self.keyboard
+        control = self.control
+        for kind, value in events:
+            control.checkpoint()
+            if guard is not None:
+                guard()
+            if kind == TEXT:
+                if self.paste_threshold and (len(value) >= self.paste_threshold or not value.isascii()):
+                    keyboard.paste(value)
+                    continue
+                # Type in short chunks so pause/abort take effect mid-text
+                for start in range(0, len(value), 20):
+                    control.checkpoint()
+                    if guard is not None and start:
+                        guard()
+                    chunk = value[start:start + 20]
+                    keyboard.write(chunk, self.type_interval)
+                    if self.tracer is not None:
+                        # The backend sleeps between characters; count that as blocked time
+                        self.tracer.add_blocked(len(chunk) * self.type_interval)
+            elif kind == KEY:
+                keyboard.press(value)
+            else:
+                keyboard.hotkey(value)
+
+    def cmd_typerate(self, chars_per_second):
+        try:
+            rate = float(chars_per_second)
+        except ValueError:
+            self.logger.log(f"Invalid typing rate: {chars_per_second}")
+            return
+        # 0 means as fast as the backend can type
+        self.type_interval = 1.0 / rate if rate > 0 else 0.0
+        self.logger.log(f"Typing rate set to {rate:g} characters per second")
@@ -0,0 +1,65 @@
+# core/file_io.py
+
+import hashlib
+import json
+import os
+import threading
+
+
+def content_hash(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def read_text(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def write_atomic(path, data, sync=True):
+    # The new content (text or bytes) goes to a hidden temp file next to the
+    # target and replaces it in one rename, so a crash mid-write never leaves a
+    # truncated file. Caches that are simply rebuilt when lost pass sync=False.
+    directory, name = os.path.split(os.path.abspath(path))
+    tmp_path = os.path.join(directory, f".{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        if isinstance(data, bytes):
+            f = open(tmp_path, 'wb')
+        else:
+            f = open(tmp_path, 'w', encoding='utf-8')
+        with f:
+            f.write(data)
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+        try:
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o7777)
+        except OSError:
+            pass  # new file, keep the default mode
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def read_index(path, version, key):
+    # `key` of a versioned JSON cache index, or {} when missing, corrupt or stale
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get('version') != version:
+        return {}
+    return data.get(key, {})
+
+
+def write_index(path, version, key, value):
+    # Counterpart of read_index; a cache that cannot be written is rebuilt next time
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        write_atomic(path, json.dumps({'version': version, key: value}, separators=(',', ':')), sync=False)
+    except OSError:
+        pass
@@ -0,0 +1,130 @@
+# core/keys.py
+
+import re
+import sys
+
+# Key event kinds produced by KeySequence.parse
+TEXT = 'text'     # literal run of characters
+KEY = 'key'       # single key press
+CHORD = 'chord'   # keys held together, e.g. ('ctrl', 'tab')
+
+# Single escapes usable anywhere in `type` text
+ESCAPES = {
+    '/e': (KEY, 'enter'),
+    '/t': (KEY, 'tab'),
+    '/b': (KEY, 'backspace'),
+    '/s': (TEXT, ' '),
+    '/ct': (KEY, 'ctrl'),
+}
+
+# Names accepted inside a chord such as /(ct + t) or /(ctrl + shift + esc).
+# Other single letters are literal keys, so /(ct + s) is ctrl+s; `t` stays tab
+# because the documented /(ct + t) means ctrl+tab.
+KEY_ALIASES = {
+    'ct': 'ctrl', 'ctrl': 'ctrl', 'control': 'ctrl',
+    'sh': 'shift', 'shift': 'shift',
+    'al': 'alt', 'alt': 'alt',
+    'wn': 'win', 'win': 'win',
+    'enter': 'enter',
+    't': 'tab', 'tab': 'tab',
+    'bs': 'backspace', 'backspace': 'backspace',
+    'space': 'space',
+    'es': 'esc', 'esc': 'esc',
+    'del': 'delete', 'delete': 'delete',
+}
+NAMED_KEY_PATTERN = re.compile(r'f([1-9]|1[0-9]|2[0-4])|up|down|left|right|home|end|pageup|pagedown|insert')
+
+# Offered by the editor's completer after `type`
+ESCAPE_SUGGESTIONS = ['/e', '/t', '/b', '/s', '/ct', '/(ct + t)']
+
+ESCAPE_PATTERN = re.compile(r'/\(([^()]*)\)|/ct|/[etbs]')
+
+
+def parse_chord(body):
+    keys = []
+    for part in body.split('+'):
+        name = part.strip().lower()
+        if len(name) == 1 and name not in KEY_ALIASES:
+            keys.append(name)
+        elif name in KEY_ALIASES:
+            keys.append(KEY_ALIASES[name])
+        elif NAMED_KEY_PATTERN.fullmatch(name):
+            keys.append(name)
+        else:
+            return None
+    return tuple(keys) if keys else None
+
+
+def parse_events(raw):
+    events = []
+    text = []
+
+    def flush_text():
+        if text:
+            events.append((TEXT, ''.join(text)))
+            text.clear()
+
+    position = 0
+    for match in ESCAPE_PATTERN.finditer(raw):
+        text.append(raw[position:match.start()])
+        position = match.end()
+        if match.group(1) is not None:
+            chord = parse_chord(match.group(1))
+            if chord is None:
+                text.append(match.group(0))  # not a chord we understand, type it literally
+                continue
+            event = (KEY, chord[0]) if len(chord) == 1 else (CHORD, chord)
+        else:
+            event = ESCAPES[match.group(0)]
+
+        if event[0] == TEXT:
+            text.append(event[1])
+        else:
+            flush_text()
+            events.append(event)
+    text.append(raw[position:])
+    flush_text()
+    return tuple(events)
+
+
+class KeySequence:
+    # Pre-decoded argument of the `type` command
+    __slots__ = ('raw', 'events')
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.events = parse_events(raw)
+
+    @classmethod
+    def parse(cls, raw):
+        return cls(raw)
+
+    def __repr__(self):
+        return f"KeySequence({self.raw!r})"
+
+
+class PyAutoGuiKeyboard:
+    # Real keyboard output; pyautogui and pyperclip are imported on first use
+    def __init__(self):
+        self._gui = None
+
+    @property
+    def gui(self):
+        if self._gui is None:
+            import pyautogui
+            self._gui = pyautogui
+        return self._gui
+
+    def write(self, text, interval):
+        self.gui.write(text, interval=interval)
+
+    def press(self, key):
+        self.gui.press(key)
+
+    def hotkey(self, keys):
+        self.gui.hotkey(*keys)
+
+    def paste(self, text):
+        import pyperclip
+        pyperclip.copy(text)
+        self.hotkey(('command', 'v') if sys.platform == 'darwin' else ('ctrl', 'v'))
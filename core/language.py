@@ -0,0 +1,173 @@
+# core/language.py
+#
+# Control flow for Pach scripts:
+#
+#   set name value          variables, used as $name or ${name} in any argument;
+#                           $$ is a literal $, and $ before a digit ($5) is plain text
+#   set i = $i + 1          with "=", the value is arithmetic: a, or a op b with + - * /
+#   repeat N ... end        counted loop, N may be a variable
+#   loop ... end            loops until break (or the script is stopped)
+#   if a == b ... else ... end
+#   define name ... end     procedure, run with `call name`
+#   break / return / stop
+
+import re
+
+CONTROL_KEYWORDS = ('set', 'repeat', 'loop', 'if', 'else', 'end',
+                    'define', 'call', 'break', 'return', 'stop')
+
+# Core commands whose argument is an application name
+APP_COMMANDS = ('open', 'close', 'closeall', 'focus')
+
+# Opcodes of compiled instructions
+OP_COMMAND = 0        # call handler(operand)
+OP_JUMP = 1           # pc = target
+OP_JUMP_IF_FALSE = 2  # if not operand (Condition): pc = target
+OP_REPEAT_INIT = 3    # push operand (count) on the counter stack
+OP_REPEAT_NEXT = 4    # counter left: decrement and continue, else pop and pc = target
+OP_BREAK_REPEAT = 5   # pop counter, pc = target
+OP_SET = 6            # variables[operand[0]] = operand[1]
+OP_CALL = 7           # push return frame, pc = target
+OP_RETURN = 8         # pop return frame
+OP_HALT = 9           # end of the main program
+
+MAX_CALL_DEPTH = 100
+
+VARIABLE_PATTERN = re.compile(r'\$\$|\$\{([A-Za-z_]\w*)\}|\$([A-Za-z_]\w*)')
+_OPERAND = r'(-?\d+(?:\.\d+)?|\$\{[A-Za-z_]\w*\}|\$[A-Za-z_]\w*)'
+ARITHMETIC_PATTERN = re.compile(rf'^\s*{_OPERAND}\s*(?:([-+*/])\s*{_OPERAND}\s*)?$')
+CONDITION_PATTERN = re.compile(r'^(.*?)\s*(==|!=|<=|>=|<|>)\s*(.*)$')
+
+
+class ScriptError(Exception):
+    def __init__(self, line, message):
+        super().__init__(f"line {line}: {message}")
+        self.line = line
+        self.message = message
+
+
+def format_number(value):
+    return str(int(value)) if float(value).is_integer() else str(value)
+
+
+def has_variables(text):
+    return '$' in text and VARIABLE_PATTERN.search(text) is not None
+
+
+def variable_names(text):
+    if '$' not in text:
+        return []
+    return [match.group(1) or match.group(2) for match in VARIABLE_PATTERN.finditer(text)
+            if match.group(0) != '$$']
+
+
+def undefined_variables(commands):
+    # (line, name) of every $name used in parsed (line, command, args) entries
+    # that no `set` in the script assigns; such lines would stop the script
+    assigned = {args.split(maxsplit=1)[0] for _, name, args in commands if name == 'set' and args.strip()}
+    return [(line, variable) for line, name, args in commands
+            for variable in variable_names(args if name != 'set' else args.partition(' ')[2])
+            if variable not in assigned]
+
+
+class Template:
+    # Argument text with $variables, split once at compile time
+    __slots__ = ('parts',)
+
+    def __init__(self, text):
+        parts = []
+        literal = []
+        position = 0
+        for match in VARIABLE_PATTERN.finditer(text):
+            literal.append(text[position:match.start()])
+            position = match.end()
+            if match.group(0) == '$$':
+                literal.append('$')
+                continue
+            parts.append(''.join(literal))
+            parts.append(match.group(1) or match.group(2))
+            literal = []
+        literal.append(text[position:])
+        parts.append(''.join(literal))
+        self.parts = tuple(parts)
+
+    def render(self, variables):
+        parts = self.parts
+        out = [parts[0]]
+        for index in range(1, len(parts), 2):
+            name = parts[index]
+            if name not in variables:
+                raise NameError(f"undefined variable '${name}'")
+            out.append(variables[name])
+            out.append(parts[index + 1])
+        return ''.join(out)
+
+
+class Arithmetic:
+    __slots__ = ('left', 'op', 'right')
+
+    def __init__(self, left, op=None, right=None):
+        self.left = Template(left)
+        self.op = op
+        self.right = Template(right) if op else None
+
+    def render(self, variables):
+        try:
+            left = float(self.left.render(variables))
+            right = float(self.right.render(variables)) if self.op else None
+        except ValueError:
+            raise ValueError("arithmetic needs numbers") from None
+        if self.op is None:
+            return format_number(left)
+        if self.op == '+':
+            return format_number(left + right)
+        if self.op == '-':
+            return format_number(left - right)
+        if self.op == '*':
+            return format_number(left * right)
+        if right == 0:
+            raise ZeroDivisionError("division by zero")
+        return format_number(left / right)
+
+
+def parse_value(text):
+    # "= a op b" is arithmetic; anything else is text, so 2024-10 stays a string
+    if not text.lstrip().startswith('='):
+        return Template(text.strip())
+    match = ARITHMETIC_PATTERN.match(text.lstrip()[1:])
+    if not match:
+        raise ValueError(f"expected '= a' or '= a op b' with numbers or variables, got '{text.lstrip()[1:].strip()}'")
+    return Arithmetic(*match.groups())
+
+
+class Condition:
+    __slots__ = ('left', 'op', 'right')
+
+    def __init__(self, text):
+        match = CONDITION_PATTERN.match(text.strip())
+        if match:
+            self.left, self.op, self.right = Template(match.group(1)), match.group(2), Template(match.group(3))
+        else:
+            self.left, self.op, self.right = Template(text.strip()), None, None
+
+    def evaluate(self, variables):
+        left = self.left.render(variables).strip()
+        if self.op is None:
+            return left.lower() not in ('', '0', 'false', 'no')
+        right = self.right.render(variables).strip()
+        try:
+            left, right = float(left), float(right)
+        except ValueError:
+            pass  # compare as text
+        op = self.op
+        if op == '==':
+            return left == right
+        if op == '!=':
+            return left != right
+        if op == '<':
+            return left < right
+        if op == '>':
+            return left > right
+        if op == '<=':
+            return left <= right
+        return left >= right
@@ -0,0 +1,137 @@
+# core/linter.py
+
+import re
+import threading
+from collections import namedtuple
+
+from core.keys import parse_chord
+from core.language import APP_COMMANDS, CONTROL_KEYWORDS, has_variables, undefined_variables
+from core.parser import Parser
+
+ERROR = 'error'
+WARNING = 'warning'
+
+# line is 1-based; start and length are columns within the line
+Diagnostic = namedtuple('Diagnostic', 'line start length severity message')
+
+CHORD_PATTERN = re.compile(r'/\(([^()]*)\)|/\([^)]*$')
+
+LINE_CACHE_SIZE = 8192
+
+
+class Linter:
+    # Static checks over a script: unknown commands and apps, arguments the
+    # command's decoder rejects, malformed `type` chords, variables no `set`
+    # assigns and block structure.
+    # Per-line results are cached by line text, so re-linting after an edit only
+    # re-checks the lines that changed. The cache is dropped when commands or
+    # installed applications change, and is shared safely between the GUI
+    # thread and the background lint worker.
+    def __init__(self, registry, applications=(), parser=None, compiler=None):
+        self.registry = registry
+        self.applications = applications  # anything supporting `name in applications`
+        self.parser = parser or Parser()
+        self.compiler = compiler
+        self._lock = threading.Lock()
+        self._cache = {}
+        self._cache_key = self._current_key()
+
+    def _current_key(self):
+        # Results depend on the registered commands and on which apps are installed
+        return self.registry.version, getattr(self.applications, 'generation', None)
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache = {}
+
+    def lint(self, text):
+        diagnostics = []
+        with self._lock:
+            key = self._current_key()
+            if self._cache_key != key:
+                self._cache = {}
+                self._cache_key = key
+            cache = self._cache
+            for line_no, line in enumerate(text.splitlines(), 1):
+                found = cache.get(line)
+                if found is None:
+                    found = tuple(self.check_line(line))
+                    if len(cache) >= LINE_CACHE_SIZE:
+                        cache.clear()
+                    cache[line] = found
+                for start, length, severity, message in found:
+                    diagnostics.append(Diagnostic(line_no, start, length, severity, message))
+
+        if '$' in text:
+            lines = text.splitlines()
+            for line_no, name in undefined_variables(self.parser.parse_numbered(text)):
+                match = re.search(rf'\$\{{{name}\}}|\${name}\b', lines[line_no - 1])
+                start, end = match.span() if match else (0, 0)
+                diagnostics.append(Diagnostic(line_no, start, end - start, ERROR,
+                                              f"Variable '{name}' is never set; use $$ for a literal $"))
+            diagnostics.sort(key=lambda d: (d.line, d.start))
+
+        if self.compiler is not None:
+            error = self.compiler.check(text)
+            if error is not None:
+                lines = text.splitlines()
+                length = len(lines[error.line - 1]) if 0 < error.line <= len(lines) else 0
+                diagnostics.append(Diagnostic(error.line, 0, length, ERROR, error.message))
+                diagnostics.sort(key=lambda d: (d.line, d.start))
+        return diagnostics
+
+    def check_line(self, line):
+        # Yields (start, length, severity, message) for one source line
+        cmd, args = self.parser.parse_line(line)
+        if not cmd:
+            return
+        cmd_start = len(line) - len(line.lstrip())
+        args_start = line.find(args, cmd_start + len(cmd)) if args else len(line)
+
+        if cmd in CONTROL_KEYWORDS:
+            return
+        if self.registry.get_command(cmd) is None:
+            yield (cmd_start, len(cmd), ERROR, f"Unknown command '{cmd}'")
+            return
+        if has_variables(args):
+            return  # checked when the script runs
+
+        decoder = self.registry.get_decoder(cmd)
+        if decoder:
+            try:
+                decoder(args)
+            except ValueError as e:
+                yield (args_start, max(1, len(args)), ERROR, f"{cmd}: {e}")
+
+        if cmd in APP_COMMANDS:
+            problem = self.check_application(cmd, args)
+            if problem is not None:
+                severity, message = problem
+                if args.strip():
+                    yield (args_start, len(args), severity, message)
+                else:
+                    yield (cmd_start, len(cmd), severity, message)
+
+        if cmd == 'type':
+            for match in CHORD_PATTERN.finditer(args):
+                start = args_start + match.start()
+                if match.group(1) is None:
+                    yield (start, len(match.group(0)), WARNING, "Unclosed key chord; it will be typed literally")
+                elif parse_chord(match.group(1)) is None:
+                    yield (start, len(match.group(0)), ERROR,
+                           f"Unknown key in chord '{match.group(0)}'; it would be typed literally")
+
+    def check_application(self, cmd, args):
+        # (severity, message) when the app argument of an APP_COMMANDS command is wrong
+        name = args.strip()
+        if not name:
+            if self.registry.get_decoder(cmd) is None:  # otherwise the decoder reports it
+                return ERROR, f"{cmd} needs an application name"
+        # focus also takes window titles, which no catalog knows
+        elif self.applications is not None and name not in self.applications and cmd != 'focus':
+            return WARNING, f"Unknown application '{name}'"
+        return None
+
+
+def has_errors(diagnostics):
+    return any(d.severity == ERROR for d in diagnostics)
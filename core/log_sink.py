@@ -0,0 +1,68 @@
+# core/log_sink.py
+
+import logging
+import logging.handlers
+import os
+import queue
+import time
+from collections import namedtuple
+
+LogRecord = namedtuple('LogRecord', 'timestamp level message line command')
+
+LEVELS = {
+    'debug': logging.DEBUG,
+    'info': logging.INFO,
+    'warning': logging.WARNING,
+    'error': logging.ERROR,
+}
+
+
+class LogSink:
+    # Thread-safe logger: producers only enqueue, a consumer drains in batches
+    def __init__(self, file_path=None, max_bytes=1_000_000, backup_count=3, buffered=True):
+        # An unbuffered sink only mirrors to the file, for loggers nobody drains
+        self._queue = queue.SimpleQueue() if buffered else None
+        self._file_logger = None
+        if file_path:
+            self.mirror_to_file(file_path, max_bytes, backup_count)
+
+    def mirror_to_file(self, file_path, max_bytes=1_000_000, backup_count=3):
+        directory = os.path.dirname(os.path.abspath(file_path))
+        os.makedirs(directory, exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(
+            file_path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(message)s'))
+        file_logger = logging.getLogger(f'pach.sink.{id(self)}')
+        file_logger.propagate = False
+        file_logger.setLevel(logging.DEBUG)
+        file_logger.handlers = [handler]
+        self._file_logger = file_logger
+
+    def close(self):
+        if self._file_logger:
+            for handler in self._file_logger.handlers:
+                handler.close()
+            self._file_logger.handlers = []
+            self._file_logger = None
+
+    def log(self, text, level='info', line=None, command=None):
+        if self._queue is not None:
+            self._queue.put(LogRecord(time.time(), level, text, line, command))
+        if self._file_logger:
+            prefix = f"[line {line}] " if line is not None else ''
+            self._file_logger.log(LEVELS.get(level, logging.INFO), prefix + text)
+
+    def empty(self):
+        return self._queue is None or self._queue.empty()
+
+    def drain(self, limit=None):
+        records = []
+        if self._queue is None:
+            return records
+        get = self._queue.get_nowait
+        try:
+            while limit is None or len(records) < limit:
+                records.append(get())
+        except queue.Empty:
+            pass
+        return records
@@ -0,0 +1,63 @@
+# core/monitor.py
+
+import threading
+import time
+from collections import namedtuple
+
+DONE = 'done'
+FAILED = 'failed'
+
+# Per source line: status, how often it ran, total and last duration in seconds,
+# and the error of the last failed run. Records are replaced, never mutated, so
+# a reader may keep them while the script goes on.
+LineRecord = namedtuple('LineRecord', 'line status runs seconds last error')
+
+
+class ExecutionMonitor:
+    # Live per-line state of a running script, written by the runner thread and
+    # drained by the UI at its own pace: take_changes() returns everything that
+    # changed since the previous call in one batch, however many commands ran.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.lines = {}
+            self.current = None
+            self._changed = set()
+            self._dirty = True
+
+    def command_started(self, line):
+        with self._lock:
+            self.current = line
+            self._dirty = True
+        return time.perf_counter()
+
+    def command_finished(self, line, start, error=None):
+        elapsed = time.perf_counter() - start if start is not None else 0.0
+        with self._lock:
+            record = self.lines.get(line)
+            if record is None:
+                record = LineRecord(line, DONE, 0, 0.0, 0.0, None)
+            status = FAILED if error is not None or record.status == FAILED else DONE
+            self.lines[line] = record._replace(
+                status=status, runs=record.runs + 1, seconds=record.seconds + elapsed,
+                last=elapsed, error=error if error is not None else record.error)
+            self._changed.add(line)
+            self._dirty = True
+
+    def script_ended(self):
+        with self._lock:
+            self.current = None
+            self._dirty = True
+
+    def take_changes(self):
+        # (current line, {line: LineRecord}) or None when nothing changed
+        with self._lock:
+            if not self._dirty:
+                return None
+            changed = {line: self.lines[line] for line in self._changed}
+            self._changed = set()
+            self._dirty = False
+            return self.current, changed
@@ -0,0 +1,67 @@
+# core/output.py
+
+import contextlib
+import sys
+import threading
+
+_install_lock = threading.Lock()
+
+
+class _RoutedStream:
+    # Stands in for sys.stdout: text written on a thread that is capturing goes
+    # to that thread's sink, everything else to the original stream
+    def __init__(self, stream):
+        self.stream = stream
+        self.sinks = {}  # thread ident -> _LineSink
+
+    def write(self, text):
+        sink = self.sinks.get(threading.get_ident())
+        if sink is None:
+            return self.stream.write(text)
+        sink.write(text)
+        return len(text)
+
+    def flush(self):
+        if threading.get_ident() not in self.sinks:
+            self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+class _LineSink:
+    def __init__(self, log):
+        self.log = log
+        self._partial = ''
+
+    def write(self, text):
+        lines = (self._partial + text).split('\n')
+        self._partial = lines.pop()
+        for line in lines:
+            self.log(line)
+
+    def close(self):
+        if self._partial:
+            self.log(self._partial)
+            self._partial = ''
+
+
+@contextlib.contextmanager
+def capture_stdout(log):
+    # print() output of the current thread becomes log(line) calls, so plugin
+    # output lands in the script's log; other threads print as usual
+    with _install_lock:
+        if not isinstance(sys.stdout, _RoutedStream):
+            sys.stdout = _RoutedStream(sys.stdout)
+        router = sys.stdout
+    ident = threading.get_ident()
+    previous = router.sinks.get(ident)
+    sink = router.sinks[ident] = _LineSink(log)
+    try:
+        yield
+    finally:
+        sink.close()
+        if previous is None:
+            del router.sinks[ident]
+        else:
+            router.sinks[ident] = previous
@@ -13,10 +13,14 @@ class Parser:
         args = parts[1] if len(parts) > 1 else ""
         return cmd, args
 
-    def parse_script(self, script_text):
+    def parse_numbered(self, script_text):
+        # Same as parse_script but keeps the 1-based source line of each command
         commands = []
-        for line in script_text.strip().splitlines():
+        for line_no, line in enumerate(script_text.splitlines(), 1):
             cmd, args = self.parse_line(line)
             if cmd:
-                commands.append((cmd, args))
+                commands.append((line_no, cmd, args))
         return commands
+
+    def parse_script(self, script_text):
+        return [(cmd, args) for _, cmd, args in self.parse_numbered(script_text)]
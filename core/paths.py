@@ -0,0 +1,15 @@
+# core/paths.py
+
+import os
+import sys
+
+
+def cache_dir(*parts):
+    base = os.environ.get('PACH_CACHE_DIR')
+    if not base:
+        if sys.platform.startswith('win'):
+            root = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+        else:
+            root = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+        base = os.path.join(root, 'pach')
+    return os.path.join(base, *parts)
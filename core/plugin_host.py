@@ -0,0 +1,167 @@
+# core/plugin_host.py
+
+import contextlib
+import io
+import multiprocessing
+import threading
+import time
+import traceback
+
+from core.control import ScriptAborted
+
+# Wire format, pickled tuples over a Pipe:
+#   request  (call_id, folder, folder_path, command, args)
+#   response (call_id, ok, output, error)
+
+DEFAULT_TIMEOUT = 30.0
+CALL_POLL = 0.05  # seconds between checks for an abort while a call runs
+
+
+def _worker_main(conn):
+    from core.command_registry import CommandRegistry
+    from core.plugin_manager import load_plugin_module
+
+    registry = CommandRegistry()
+    loaded = set()
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, OSError):
+            return
+        if request is None:
+            return
+        call_id, folder, folder_path, command, args = request
+        output = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(output):
+                if folder not in loaded:
+                    # Import and register once; later calls reuse the warm plugin
+                    load_plugin_module(folder, folder_path).Plugin(registry).register()
+                    loaded.add(folder)
+                handler = registry.get_command(command)
+                if handler is None:
+                    raise LookupError(f"plugin {folder} has no command '{command}'")
+                # The plugin's decoder lives here, so the handler gets the same
+                # decoded argument as in-process; editors cannot pre-check it
+                decoder = registry.get_decoder(command)
+                handler(decoder(args) if decoder else args)
+            conn.send((call_id, True, output.getvalue(), None))
+        except Exception as e:
+            conn.send((call_id, False, output.getvalue(), f"{type(e).__name__}: {e}"))
+            traceback.clear_frames(e.__traceback__)
+
+
+class _Worker:
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def stop(self, kill=False):
+        if kill:
+            self.process.kill()
+        else:
+            try:
+                self.conn.send(None)
+            except (OSError, ValueError):
+                pass
+        self.process.join(1.0)
+        if self.process.is_alive():
+            self.process.kill()
+        self.conn.close()
+
+
+class PluginHost:
+    # One warm worker process for the isolated plugins of a session. Commands run
+    # one at a time in script order on the session's runner thread, so a single
+    # worker is all a session uses; parallel scripts have their own sessions.
+    def __init__(self, default_timeout=DEFAULT_TIMEOUT):
+        self.default_timeout = default_timeout
+        self._context = multiprocessing.get_context('spawn')
+        self._worker = None
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._closed = False
+
+    def _discard(self):
+        # A crashed, hung or abandoned worker is killed; the next call starts a new one
+        self._worker.stop(kill=True)
+        self._worker = None
+
+    def call(self, folder, folder_path, command, args, timeout=None, control=None):
+        # Waits for the result in short slices so stop, abort and the failsafe
+        # (through `control`) interrupt a long plugin call
+        timeout = self.default_timeout if timeout is None else timeout
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("plugin host is closed")
+            if self._worker is None:
+                self._worker = _Worker(self._context)  # started on demand, then kept warm
+            worker = self._worker
+            self._next_id += 1
+            response = None
+            try:
+                worker.conn.send((self._next_id, folder, folder_path, command, args))
+                deadline = time.monotonic() + timeout
+                while time.monotonic() < deadline:
+                    if worker.conn.poll(min(CALL_POLL, deadline - time.monotonic())):
+                        response = worker.conn.recv()
+                        break
+                    if control is not None:
+                        paused_at = time.monotonic()
+                        control.checkpoint()
+                        deadline += time.monotonic() - paused_at  # time paused does not count
+            except ScriptAborted:
+                self._discard()
+                raise
+            except (EOFError, OSError):
+                self._discard()
+                raise RuntimeError(f"plugin worker for '{command}' crashed") from None
+            if response is None:
+                self._discard()
+                raise TimeoutError(f"plugin command '{command}' timed out after {timeout:g} seconds")
+
+        _, ok, output, error = response
+        if not ok:
+            raise PluginCallError(error, output)
+        return output
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            if self._worker is not None:
+                self._worker.stop()
+                self._worker = None
+
+
+class PluginCallError(RuntimeError):
+    def __init__(self, message, output=''):
+        super().__init__(message)
+        self.output = output
+
+
+class RemoteHandler:
+    # Registered in CommandRegistry in place of the plugin's own handler
+    def __init__(self, host, folder, folder_path, command, timeout=None, owner=None):
+        self.host = host
+        self.folder = folder
+        self.folder_path = folder_path
+        self.command = command
+        self.timeout = timeout
+        self.owner = owner  # PluginManager: its logger receives the plugin's output, its control stops calls
+
+    def _log_output(self, output):
+        logger = self.owner.logger if self.owner else None
+        if logger and output:
+            for line in output.rstrip('\n').splitlines():
+                logger.log(line)
+
+    def __call__(self, args):
+        try:
+            output = self.host.call(self.folder, self.folder_path, self.command, args, self.timeout,
+                                    self.owner.control if self.owner else None)
+        except PluginCallError as e:
+            self._log_output(e.output)
+            raise
+        self._log_output(output)
@@ -1,25 +1,195 @@
 # core/plugin_manager.py
 
-import importlib
+import importlib.util
+import json
 import os
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from core.file_io import read_index, write_index
+from core.output import capture_stdout
+from core.paths import cache_dir
+
+INDEX_VERSION = 1
+
+
+def load_plugin_module(folder, folder_path):
+    # Load plugin.py under a private module name instead of putting plugins/ on sys.path
+    module_name = f'pach_plugin_{folder}'
+    module = sys.modules.get(module_name)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(module_name, os.path.join(folder_path, 'plugin.py'))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        sys.modules[module_name] = module
+    return module
+
 
 class PluginManager:
-    def __init__(self, command_registry):
+    def __init__(self, command_registry, logger=None, index_path=None, isolate=None, host=None, control=None):
         self.command_registry = command_registry
+        self.logger = logger
+        # Isolated plugins run in worker processes; per plugin via "isolated" in the manifest
+        if isolate is None:
+            isolate = os.environ.get('PACH_ISOLATE_PLUGINS') == '1'
+        self.isolate = isolate
+        self.host = host
+        self.control = control  # the executor's ExecutionControl; stops isolated calls
+        self.index_path = cache_dir('plugins.json') if index_path is None else index_path
         self.plugins = []
+        self.manifests = {}
+        self.messages = []  # (text, level) history, for loggers attached later
+        self._folders = {}  # plugin folder name -> absolute folder path
+        self._loaded = {}   # plugin folder name -> Plugin instance
+        self._lock = threading.RLock()
+
+    def report(self, text, level='info'):
+        self.messages.append((text, level))
+        if self.logger:
+            self.logger.log(text, level)
 
-    def load_plugins(self, plugins_dir='plugins'):
-        sys.path.insert(0, plugins_dir)
-        for folder in os.listdir(plugins_dir):
+    def load_plugins(self, plugins_dir='plugins', jobs=4):
+        plugins_dir = os.path.abspath(plugins_dir)
+        eager = []
+        for folder, manifest in self.index_manifests(plugins_dir).items():
+            self._folders[folder] = os.path.join(plugins_dir, folder)
+            self.manifests[folder] = manifest
+            commands = manifest.get('commands')
+            if commands and (self.isolate or manifest.get('isolated')):
+                self._register_remote(folder, manifest)
+            elif commands and not manifest.get('eager'):
+                # Only the names are registered; the plugin is imported on first use
+                for name in commands:
+                    self.command_registry.register_command(name, self._lazy_handler(folder, name))
+            else:
+                if self.isolate or manifest.get('isolated'):
+                    # Without a command list nothing can be registered remotely
+                    self.report(f"Plugin {folder} lists no commands in its manifest; "
+                                f"it runs in-process, not isolated", 'warning')
+                eager.append(folder)
+
+        if not eager:
+            return
+        # Imports run in parallel; registration stays in a stable order
+        with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(eager)))) as pool:
+            modules = list(pool.map(self._import_quietly, eager))
+        for folder, module in zip(eager, modules):
+            if module is not None:
+                self._register(folder, module)
+
+    def index_manifests(self, plugins_dir):
+        # Manifests are cached per plugins folder and re-read only when their mtime changes
+        index = self._read_index()
+        cached = index.get(plugins_dir, {})
+        manifests, entries = {}, {}
+        changed = False
+        for folder in sorted(os.listdir(plugins_dir)):
             folder_path = os.path.join(plugins_dir, folder)
-            if os.path.isdir(folder_path):
-                try:
-                    plugin_module = importlib.import_module(f'{folder}.plugin')
-                    plugin = plugin_module.Plugin(self.command_registry)
-                    plugin.register()
-                    self.plugins.append(plugin)
-                    print(f"Loaded plugin: {folder}")
-                except Exception as e:
-                    print(f"Failed to load plugin {folder}: {e}")
-        sys.path.pop(0)
+            if not os.path.isfile(os.path.join(folder_path, 'plugin.py')):
+                continue
+            manifest_path = os.path.join(folder_path, 'manifest.json')
+            try:
+                mtime = os.stat(manifest_path).st_mtime
+            except OSError:
+                mtime = None
+            entry = cached.get(folder)
+            if entry is None or entry.get('mtime') != mtime:
+                entry = {'mtime': mtime, 'manifest': self.read_manifest(folder_path)}
+                changed = True
+            entries[folder] = entry
+            manifests[folder] = entry['manifest']
+
+        if changed or set(cached) != set(entries):
+            index[plugins_dir] = entries
+            self._write_index(index)
+        return manifests
+
+    def read_manifest(self, folder_path):
+        try:
+            with open(os.path.join(folder_path, 'manifest.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _read_index(self):
+        return read_index(self.index_path, INDEX_VERSION, 'plugins')
+
+    def _write_index(self, index):
+        write_index(self.index_path, INDEX_VERSION, 'plugins', index)
+
+    def _register_remote(self, folder, manifest):
+        from core.plugin_host import PluginHost, RemoteHandler
+
+        if self.host is None:
+            self.host = PluginHost()
+        timeouts = manifest.get('timeouts', {})
+        for name in manifest['commands']:
+            timeout = timeouts.get(name, manifest.get('timeout'))
+            handler = RemoteHandler(self.host, folder, self._folders[folder], name, timeout, self)
+            self.command_registry.register_command(name, handler)
+        self.report(f"Plugin {folder} will run in a worker process")
+
+    def close(self):
+        if self.host is not None:
+            self.host.close()
+            self.host = None
+
+    def _import_quietly(self, folder):
+        # Anything the plugin prints while importing goes to the plugin log, not stdout
+        try:
+            with capture_stdout(self.report):
+                return load_plugin_module(folder, self._folders[folder])
+        except Exception as e:
+            self.report(f"Failed to load plugin {folder}: {e}", 'error')
+            return None
+
+    def _register(self, folder, module):
+        try:
+            with capture_stdout(self.report):
+                plugin = module.Plugin(self.command_registry)
+                plugin.register()
+        except Exception as e:
+            self.report(f"Failed to load plugin {folder}: {e}", 'error')
+            return None
+        self._loaded[folder] = plugin
+        self.plugins.append(plugin)
+        self.report(f"Loaded plugin: {folder}")
+        return plugin
+
+    def load(self, folder):
+        with self._lock:
+            if folder in self._loaded:
+                return self._loaded[folder]
+            module = self._import_quietly(folder)
+            if module is None:
+                return None
+            # The plugin's handlers replace its stubs in one step as far as the
+            # GUI and lint threads reading the registry are concerned
+            with self.command_registry.lock:
+                return self._register(folder, module)
+
+    def is_loaded(self, folder):
+        return folder in self._loaded
+
+    def _lazy_handler(self, folder, name):
+        # Programs compiled before the plugin loaded stay bound to this stub, so
+        # it resolves the real handler once and calls it directly from then on
+        target = None
+
+        def handler(args):
+            nonlocal target
+            if target is None:
+                if self.load(folder) is None:
+                    raise RuntimeError(f"plugin {folder} could not be loaded")
+                real = self.command_registry.get_command(name)
+                if real is None or real is handler:
+                    raise RuntimeError(f"plugin {folder} did not register command '{name}'")
+                target = real
+            return target(args)
+        handler.plugin = folder
+        return handler
+
+    def signature(self):
+        return ';'.join(f"{folder}={manifest.get('version', '')}"
+                        for folder, manifest in sorted(self.manifests.items()))
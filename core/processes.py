@@ -0,0 +1,241 @@
+# core/processes.py
+
+import os
+import shlex
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+from core.readiness import ProcessProbe, normalize_process_name
+
+
+# argv[0] of catalog commands that are not the app itself. Pass-through
+# launchers run the rest of argv; opaque ones start something argv cannot tell.
+PASS_THROUGH_LAUNCHERS = {'env', 'nohup', 'setsid', 'exec'}
+OPAQUE_LAUNCHERS = {'gtk-launch', 'xdg-open', 'gio', 'snap', 'start'}
+SHELLS = {'sh', 'bash', 'dash', 'zsh', 'fish'}
+# Processes named like these run many unrelated programs, so they are never closed by name
+INTERPRETERS = SHELLS | {'python', 'python2', 'python3', 'pythonw', 'perl', 'ruby', 'node', 'java',
+                         'javaw', 'mono', 'wine', 'cmd', 'powershell', 'pwsh'}
+
+
+def executable_name(command):
+    # Process name of the app a catalog command starts, looking through launchers
+    # and `sh -c` ("flatpak run org.gnome.Calculator" -> "calculator"); None when
+    # the app runs under an interpreter or argv does not tell
+    args = list(command)
+    while args:
+        name = normalize_process_name(args[0])
+        if name == 'flatpak':
+            rest = args[args.index('run') + 1:] if 'run' in args else []
+            app_id = next((arg for arg in rest if not arg.startswith('-')), None)
+            return app_id.rsplit('.', 1)[-1].lower() if app_id else None
+        if name in SHELLS and '-c' in args[:-1]:
+            try:
+                args = shlex.split(args[args.index('-c') + 1])
+            except ValueError:
+                return None
+        elif name in PASS_THROUGH_LAUNCHERS:
+            # env -u NAME VAR=value app ...
+            args = args[1:]
+            while args and (args[0].startswith('-') or '=' in args[0]):
+                args = args[2:] if args[0] in ('-u', '-C', '--unset', '--chdir') else args[1:]
+        elif name in OPAQUE_LAUNCHERS or name in INTERPRETERS:
+            return None
+        else:
+            return name
+    return None
+
+
+class ManagedProcess:
+    __slots__ = ('app', 'proc', 'pid', 'started')
+
+    def __init__(self, app, proc):
+        self.app = app
+        self.proc = proc
+        self.pid = proc.pid
+        self.started = time.monotonic()
+
+
+class _Closing:
+    # A process asked to exit: terminated first, killed once `deadline` passes
+    __slots__ = ('app', 'pid', 'proc', 'deadline', 'forced')
+
+    def __init__(self, app, pid, proc, deadline):
+        self.app = app
+        self.pid = pid
+        self.proc = proc  # Popen for processes we launched, None for external ones
+        self.deadline = deadline
+        self.forced = False
+
+
+def signal_process(pid, force=False):
+    # Terminate (or kill) a process we did not start ourselves
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil is not None:
+        try:
+            process = psutil.Process(pid)
+            process.kill() if force else process.terminate()
+        except psutil.Error:
+            pass
+        return
+    if sys.platform.startswith('win'):
+        args = ['taskkill', '/pid', str(pid)] + (['/f'] if force else [])
+        subprocess.run(args, capture_output=True, check=False)
+        return
+    try:
+        os.kill(pid, signal.SIGKILL if force else signal.SIGTERM)
+    except OSError:
+        pass
+
+
+def pid_alive(pid, probe=None):
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil is not None:
+        return psutil.pid_exists(pid)
+    if sys.platform.startswith('win'):
+        return probe is not None and pid in probe.snapshot()
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # exists, owned by someone else
+    return True
+
+
+class ProcessManager:
+    # Tracks every process a script launches, per app name. Closing never blocks
+    # the script: processes are terminated right away and a background reaper
+    # collects them, killing any that outlive the grace period.
+    def __init__(self, probe=None, grace=3.0, kill_timeout=2.0, reap_interval=0.25, log=None):
+        self.probe = probe or ProcessProbe()
+        self.grace = grace
+        self.kill_timeout = kill_timeout
+        self.reap_interval = reap_interval
+        self.log = log  # callable(text, level) for reaper messages
+        self._instances = {}  # app name -> [ManagedProcess], oldest first
+        self._closing = []
+        self._lock = threading.RLock()
+        self._reaper = None
+
+    def launch(self, app, command, **popen_args):
+        proc = subprocess.Popen(command, **popen_args)
+        with self._lock:
+            self._instances.setdefault(app, []).append(ManagedProcess(app, proc))
+        self._ensure_reaper()
+        return proc
+
+    def instances(self, app):
+        with self._lock:
+            return [managed.pid for managed in self._instances.get(app, ())
+                    if managed.proc.poll() is None]
+
+    def close(self, app, process_names=(), external=False):
+        # Closes every instance of `app` this manager launched. Only with
+        # `external`, and when there is none (or it was a launcher that already
+        # exited), processes named like the app or one of `process_names` are
+        # closed instead. Returns the number of processes asked to exit.
+        deadline = time.monotonic() + self.grace
+        with self._lock:
+            self.reap()
+            owned = self._instances.pop(app, [])
+            closing_pids = {entry.pid for entry in self._closing}
+            targets = [(managed.pid, managed.proc) for managed in owned]
+            if not targets and external:
+                names = {normalize_process_name(app)} | {normalize_process_name(n) for n in process_names}
+                pids = set()
+                for name in names:
+                    pids.update(self.probe.find_all(name, fresh=True))
+                pids.discard(os.getpid())
+                targets = [(pid, None) for pid in sorted(pids - closing_pids)]
+            for pid, proc in targets:
+                self._terminate(pid, proc, force=False)
+                self._closing.append(_Closing(app, pid, proc, deadline))
+        if targets:
+            self._ensure_reaper()
+        return len(targets)
+
+    def pending(self):
+        with self._lock:
+            return len(self._closing)
+
+    def wait_closed(self, timeout=None):
+        # At exit, so apps that ignore terminate are still killed; scripts never
+        # wait on close
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self.reap()
+                if not self._closing:
+                    return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(min(self.reap_interval, 0.05))
+
+    def reap(self):
+        with self._lock:
+            for app in list(self._instances):
+                alive = [managed for managed in self._instances[app] if managed.proc.poll() is None]
+                if alive:
+                    self._instances[app] = alive
+                else:
+                    del self._instances[app]
+
+            now = time.monotonic()
+            still_closing = []
+            for entry in self._closing:
+                if not self._alive(entry):
+                    continue
+                if now < entry.deadline:
+                    still_closing.append(entry)
+                elif not entry.forced:
+                    self._terminate(entry.pid, entry.proc, force=True)
+                    entry.forced = True
+                    entry.deadline = now + self.kill_timeout
+                    self._report(f"{entry.app} (pid {entry.pid}) did not exit in {self.grace:g} seconds, killing it", 'warning')
+                    still_closing.append(entry)
+                else:
+                    self._report(f"{entry.app} (pid {entry.pid}) could not be killed", 'error')
+            self._closing = still_closing
+
+    def _alive(self, entry):
+        if entry.proc is not None:
+            return entry.proc.poll() is None
+        return pid_alive(entry.pid, self.probe)
+
+    def _terminate(self, pid, proc, force):
+        if proc is None:
+            signal_process(pid, force)
+            return
+        try:
+            proc.kill() if force else proc.terminate()
+        except OSError:
+            pass  # already gone
+
+    def _report(self, text, level):
+        if self.log:
+            self.log(text, level)
+
+    def _ensure_reaper(self):
+        with self._lock:
+            if self._reaper is None:
+                self._reaper = threading.Thread(target=self._reap_loop, name='pach-process-reaper', daemon=True)
+                self._reaper.start()
+
+    def _reap_loop(self):
+        while True:
+            time.sleep(self.reap_interval)
+            with self._lock:
+                self.reap()
+                if not self._instances and not self._closing:
+                    self._reaper = None
+                    return
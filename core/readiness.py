@@ -0,0 +1,153 @@
+# core/readiness.py
+
+import os
+import subprocess
+import sys
+import time
+from collections import namedtuple
+
+WaitTarget = namedtuple('WaitTarget', 'kind name timeout')
+
+WAIT_KINDS = ('window', 'process')
+
+
+def parse_wait_target(text):
+    # "window <title> [within <seconds>]" or "process <name> [within <seconds>]"
+    parts = text.split(None, 1)
+    if len(parts) < 2 or parts[0].lower() not in WAIT_KINDS:
+        raise ValueError(f"expected 'window <title>' or 'process <name>', got '{text}'")
+    kind, name = parts[0].lower(), parts[1].strip()
+    timeout = None
+    head, sep, tail = name.rpartition(' within ')
+    if sep:
+        timeout = float(tail)
+        name = head.strip()
+    if not name:
+        raise ValueError(f"missing {kind} name")
+    return WaitTarget(kind, name, timeout)
+
+
+def wait_until(predicate, timeout, control, initial_interval=0.05, max_interval=0.5, backoff=1.5):
+    # Polls predicate with exponential backoff; returns its result or None on timeout
+    deadline = control.now() + timeout
+    interval = initial_interval
+    while True:
+        result = predicate()
+        if result:
+            return result
+        remaining = deadline - control.now()
+        if remaining <= 0:
+            return None
+        control.sleep(min(interval, remaining))
+        interval = min(interval * backoff, max_interval)
+
+
+# Longest process name /proc/<pid>/comm reports (TASK_COMM_LEN - 1)
+COMM_LENGTH = 15
+
+
+def normalize_process_name(name):
+    name = os.path.basename(name.strip()).lower()
+    return name[:-4] if name.endswith('.exe') else name
+
+
+class ProcessProbe:
+    def __init__(self, ttl=0.25):
+        self.ttl = ttl
+        self._snapshot = {}
+        self._taken = 0.0
+        self._seen = {}  # normalized name -> pid last seen running under that name
+
+    def snapshot(self):
+        now = time.monotonic()
+        if now - self._taken > self.ttl:
+            self._snapshot = self._list_processes()
+            self._taken = now
+        return self._snapshot
+
+    def _list_processes(self):
+        try:
+            import psutil
+        except ImportError:
+            psutil = None
+        if psutil is not None:
+            processes = {}
+            for proc in psutil.process_iter(['name']):
+                processes[proc.pid] = proc.info.get('name') or ''
+            return processes
+        if sys.platform.startswith('win'):
+            return self._list_windows_processes()
+        return self._list_proc_processes()
+
+    def _list_proc_processes(self):
+        processes = {}
+        try:
+            entries = os.listdir('/proc')
+        except OSError:
+            return processes
+        for entry in entries:
+            if entry.isdigit():
+                name = self._proc_name(int(entry))
+                if name is not None:
+                    processes[int(entry)] = name
+        return processes
+
+    def _proc_name(self, pid):
+        try:
+            with open(f'/proc/{pid}/comm', 'r') as f:
+                name = f.read().strip()
+        except OSError:
+            return None
+        if len(name) == COMM_LENGTH:
+            # The kernel cuts comm to 15 characters; argv[0] has the full name
+            # ("gnome-calculato" -> "gnome-calculator")
+            try:
+                with open(f'/proc/{pid}/cmdline', 'rb') as f:
+                    argv0 = f.read().split(b'\0', 1)[0].decode('utf-8', 'replace')
+            except OSError:
+                return name
+            full_name = os.path.basename(argv0)
+            if full_name.startswith(name):
+                return full_name
+        return name
+
+    def _list_windows_processes(self):
+        processes = {}
+        try:
+            output = subprocess.run(['tasklist', '/fo', 'csv', '/nh'], capture_output=True,
+                                    text=True, check=False).stdout
+        except OSError:
+            return processes
+        for row in output.splitlines():
+            fields = [field.strip('"') for field in row.split('","')]
+            if len(fields) > 1 and fields[1].isdigit():
+                processes[int(fields[1])] = fields[0]
+        return processes
+
+    def _still_named(self, pid, name):
+        # Cheap re-check of a previously seen pid without enumerating everything
+        if os.path.isdir('/proc'):
+            current = self._proc_name(pid)
+            return current is not None and normalize_process_name(current) == name
+        current = self.snapshot().get(pid)
+        return current is not None and normalize_process_name(current) == name
+
+    def find(self, name):
+        name = normalize_process_name(name)
+        pid = self._seen.get(name)
+        if pid is not None:
+            if self._still_named(pid, name):
+                return pid
+            del self._seen[name]
+        for pid, process_name in self.snapshot().items():
+            if normalize_process_name(process_name) == name:
+                self._seen[name] = pid
+                return pid
+        return None
+
+    def find_all(self, name, fresh=False):
+        name = normalize_process_name(name)
+        if fresh:
+            self._taken = 0.0
+        return sorted(pid for pid, process_name in self.snapshot().items()
+                      if normalize_process_name(process_name) == name)
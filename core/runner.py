@@ -0,0 +1,66 @@
+# core/runner.py
+
+import threading
+
+from core.control import ScriptAborted
+from core.language import ScriptError
+
+
+class ScriptRunner:
+    def __init__(self, executor, compiler, on_progress=None, on_finished=None):
+        self.executor = executor
+        self.compiler = compiler
+        self.on_progress = on_progress
+        self.on_finished = on_finished
+        self._thread = None
+        self._running = False
+
+    @property
+    def control(self):
+        return self.executor.control
+
+    def is_running(self):
+        return self._running
+
+    def start(self, script_text):
+        if self.is_running():
+            return False
+        self.control.reset()
+        self._running = True
+        self._thread = threading.Thread(target=self.run, args=(script_text,), daemon=True)
+        self._thread.start()
+        return True
+
+    def pause(self):
+        self.control.pause()
+
+    def resume(self):
+        self.control.resume()
+
+    def abort(self):
+        self.control.abort()
+
+    def wait(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run(self, script_text):
+        status = 'finished'
+        try:
+            program = self.compiler.compile(script_text)
+            self.executor.run_program(program, self.on_progress)
+        except ScriptAborted:
+            status = 'aborted'
+        except Exception as e:
+            self.executor.logger.log(f"Script failed: {e}")
+            status = 'failed'
+            monitor = self.executor.monitor
+            if monitor is not None and isinstance(e, ScriptError):
+                monitor.command_finished(e.line, None, e.message)
+        if self.executor.monitor is not None:
+            self.executor.monitor.script_ended()
+
+        self._running = False
+        if self.on_finished:
+            self.on_finished(status)
+        return status
@@ -0,0 +1,26 @@
+# core/session.py
+
+import os
+from collections import namedtuple
+
+from core.command_registry import CommandRegistry
+from core.compiler import Compiler
+from core.executor import Executor
+from core.parser import Parser
+from core.plugin_manager import PluginManager
+
+PLUGINS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'plugins')
+
+Session = namedtuple('Session', 'registry executor plugin_manager compiler')
+
+
+def create_session(logger, plugins_dir=PLUGINS_DIR, isolate_plugins=None):
+    # Registry, executor with core commands, plugins and compiler, without any Qt
+    registry = CommandRegistry()
+    executor = Executor(registry, logger)
+    executor.register_core_commands()
+    plugin_manager = PluginManager(registry, logger, isolate=isolate_plugins, control=executor.control)
+    if plugins_dir and os.path.isdir(plugins_dir):
+        plugin_manager.load_plugins(plugins_dir)
+    compiler = Compiler(registry, Parser(), plugin_manager)
+    return Session(registry, executor, plugin_manager, compiler)
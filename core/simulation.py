@@ -0,0 +1,246 @@
+# core/simulation.py
+#
+# Runs scripts against a simulated desktop: waits advance a virtual clock and
+# open/close/focus/typing/plugin calls are recorded as events instead of being
+# performed. The event log is JSON Lines and can be compared to a golden file.
+
+import difflib
+import json
+import os
+
+from core.control import ExecutionControl
+from core.language import ScriptError
+from core.readiness import normalize_process_name
+from core.windows import Window, WindowRegistry
+
+GOLDEN_SUFFIX = '.golden.jsonl'
+
+
+def golden_path(script_path):
+    root, ext = os.path.splitext(script_path)
+    return (root if ext == '.psc' else script_path) + GOLDEN_SUFFIX
+
+
+class VirtualClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def advance(self, seconds):
+        self.now += max(0.0, seconds)
+
+
+class SimulatedControl(ExecutionControl):
+    # Pause and abort still work; sleeping only moves the virtual clock
+    def __init__(self, clock):
+        super().__init__()
+        self.clock = clock
+
+    def now(self):
+        return self.clock.now
+
+    def _sleep(self, seconds):
+        self.checkpoint()
+        self.clock.advance(seconds)
+
+
+class RecordingKeyboard:
+    def __init__(self, simulation):
+        self.simulation = simulation
+
+    def write(self, text, interval):
+        # The executor writes long text in chunks; they form one `type` event
+        simulation = self.simulation
+        last = simulation.events[-1] if simulation.events else None
+        if last is not None and last['event'] == 'type' and simulation.typing:
+            last['text'] += text
+        else:
+            simulation.record('type', text=text)
+            simulation.typing = True
+        simulation.clock.advance(len(text) * interval)
+
+    def press(self, key):
+        self.simulation.record('key', key=key)
+
+    def hotkey(self, keys):
+        self.simulation.record('hotkey', keys=list(keys))
+
+    def paste(self, text):
+        self.simulation.record('paste', text=text)
+
+
+class SimulatedCatalog:
+    # Every name resolves, so scripts simulate the same on any machine
+    def __init__(self, catalog):
+        self.catalog = catalog
+
+    def resolve(self, name):
+        return self.catalog.resolve(name) or [name.strip().lower()]
+
+    def names(self, include_path=False):
+        return self.catalog.names(include_path)
+
+    def __contains__(self, name):
+        return True
+
+
+class SimulatedProcessManager:
+    def __init__(self, simulation):
+        self.simulation = simulation
+
+    def launch(self, app, command, **popen_args):
+        simulation = self.simulation
+        simulation.apps.setdefault(app, []).append(normalize_process_name(command[0]))
+        simulation.record('open', app=app)
+        return None
+
+    def instances(self, app):
+        return list(range(len(self.simulation.apps.get(app, ()))))
+
+    def close(self, app, process_names=(), external=False):
+        simulation = self.simulation
+        count = len(simulation.apps.pop(app, ()))
+        if simulation.active == app:
+            simulation.active = next(reversed(simulation.apps), None)
+        simulation.record('close', app=app, closed=count)
+        return count
+
+
+class SimulatedWindowBackend:
+    # One window per open app, titled with the app name
+    name = 'simulated'
+    reports_active = True
+
+    def __init__(self, simulation):
+        self.simulation = simulation
+
+    def windows(self):
+        return [Window(app, app, None) for app in self.simulation.apps]
+
+    def activate(self, handle):
+        self.simulation.active = handle
+        self.simulation.record('focus', window=handle)
+        return True
+
+    def active(self):
+        return self.simulation.active
+
+
+class SimulatedProcesses:
+    def __init__(self, simulation):
+        self.simulation = simulation
+
+    def find(self, name):
+        name = normalize_process_name(name)
+        for app, process_names in self.simulation.apps.items():
+            if name == app or name in process_names:
+                return app
+        return None
+
+    def find_all(self, name, fresh=False):
+        return [self.find(name)] if self.find(name) else []
+
+
+class RecordedCommand:
+    # Stands in for a plugin command: the call is logged, the plugin never runs
+    def __init__(self, simulation, name):
+        self.simulation = simulation
+        self.name = name
+
+    def __call__(self, args):
+        args = getattr(args, 'raw', args)
+        self.simulation.record('plugin', command=self.name, args=str(args))
+
+
+class SimulationLogger:
+    # Passes records on and turns errors into events, so goldens capture failures
+    def __init__(self, logger, simulation):
+        self.logger = logger
+        self.simulation = simulation
+
+    def log(self, text, level='info', line=None, command=None):
+        if level == 'error':
+            self.simulation.record('error', message=text)
+        if self.logger is not None:
+            self.logger.log(text, level, line, command)
+
+
+class Simulation:
+    # Installs the simulated backends on an executor. Install before compiling:
+    # compiled programs hold the command handlers that were registered then.
+    def __init__(self, executor, record_plugins=True):
+        self.executor = executor
+        self.clock = VirtualClock()
+        self.events = []
+        self.apps = {}  # open app -> process names of its instances
+        self.active = None
+        self.line = None
+        self.typing = False
+        self._defaults = (executor.type_interval, executor.paste_threshold)
+
+        executor.control = SimulatedControl(self.clock)
+        executor.control.tracer = executor.tracer
+        executor.keyboard = RecordingKeyboard(self)
+        executor.catalog = SimulatedCatalog(executor.catalog)
+        executor.process_manager = SimulatedProcessManager(self)
+        # No caching: the simulated desktop changes between consecutive commands
+        executor.windows = WindowRegistry(SimulatedWindowBackend(self), ttl=0)
+        executor.processes = SimulatedProcesses(self)
+        executor.logger = SimulationLogger(executor.logger, self)
+
+        if record_plugins:
+            registry = executor.registry
+            for name in registry.all_commands():
+                handler = registry.get_command(name)
+                if getattr(handler, '__self__', None) is not executor:
+                    registry.register_command(name, RecordedCommand(self, name),
+                                              registry.get_decoder(name), registry.is_desktop(name))
+
+    def reset(self):
+        self.clock.now = 0.0
+        self.events = []
+        self.apps = {}
+        self.active = None
+        self.line = None
+        self.typing = False
+        # Settings a previous script changed (typerate) must not leak into this one
+        self.executor.type_interval, self.executor.paste_threshold = self._defaults
+        self.executor.control.reset()
+
+    def record(self, event, **fields):
+        self.typing = False
+        entry = {'t': round(self.clock.now, 3), 'line': self.line, 'event': event}
+        entry.update(fields)
+        self.events.append(entry)
+
+    def _on_progress(self, index, total, instruction):
+        self.line = instruction.line
+        self.typing = False
+
+    def run(self, program):
+        # Returns 'finished' or 'failed'; the events stay in self.events
+        try:
+            self.executor.run_program(program, self._on_progress)
+        except ScriptError as e:
+            self.record('error', message=str(e))
+            return 'failed'
+        self.line = None
+        self.record('end')
+        return 'finished'
+
+    def lines(self):
+        return [json.dumps(event, ensure_ascii=False) for event in self.events]
+
+
+def read_golden(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.rstrip('\n') for line in f if line.strip()]
+
+
+def write_golden(path, lines):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(''.join(line + '\n' for line in lines))
+
+
+def compare_golden(lines, path):
+    # Unified diff against the golden file; empty when they match
+    return list(difflib.unified_diff(read_golden(path), lines, path, 'simulated', lineterm=''))
@@ -0,0 +1,101 @@
+# core/tracing.py
+
+import json
+import os
+import time
+from collections import namedtuple
+
+TraceEvent = namedtuple('TraceEvent', 'line name args start duration blocked error')
+
+
+class LatencyHistogram:
+    # Power-of-two buckets in microseconds: bucket n holds durations in [2^(n-1), 2^n)
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.blocked = 0.0
+        self.errors = 0
+        self.min = None
+        self.max = 0.0
+
+    def add(self, duration, blocked=0.0, error=False):
+        bucket = int(duration * 1e6).bit_length()
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += duration
+        self.blocked += blocked
+        self.errors += bool(error)
+        self.min = duration if self.min is None else min(self.min, duration)
+        self.max = max(self.max, duration)
+
+    def percentile(self, fraction):
+        # Upper bound of the bucket containing the requested rank
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min((1 << bucket) / 1e6, self.max)
+        return self.max
+
+
+class Tracer:
+    def __init__(self):
+        self.events = []
+        self.histograms = {}
+        self.origin = time.perf_counter()
+        self._blocked = 0.0
+
+    def add_blocked(self, seconds):
+        self._blocked += seconds
+
+    def begin(self):
+        self._blocked = 0.0
+        return time.perf_counter()
+
+    def end(self, instruction, start, error=None):
+        duration = time.perf_counter() - start
+        blocked = min(self._blocked, duration)
+        self.events.append(TraceEvent(instruction.line, instruction.name, instruction.args,
+                                      start - self.origin, duration, blocked, error))
+        histogram = self.histograms.get(instruction.name)
+        if histogram is None:
+            histogram = self.histograms[instruction.name] = LatencyHistogram()
+        histogram.add(duration, blocked, error)
+
+    def chrome_trace(self):
+        pid = os.getpid()
+        events = []
+        for event in self.events:
+            args = {'line': event.line, 'args': event.args,
+                    'blocked_ms': round(event.blocked * 1e3, 3),
+                    'work_ms': round((event.duration - event.blocked) * 1e3, 3)}
+            if event.error:
+                args['error'] = event.error
+            events.append({
+                'name': event.name, 'cat': 'command', 'ph': 'X',
+                'ts': round(event.start * 1e6, 3), 'dur': round(event.duration * 1e6, 3),
+                'pid': pid, 'tid': 1, 'args': args,
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write_chrome_trace(self, path):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f)
+
+    def summary_table(self):
+        header = (f"{'command':12} {'count':>7} {'total s':>9} {'mean ms':>9} {'p50 ms':>9} "
+                  f"{'p95 ms':>9} {'max ms':>9} {'blocked s':>10} {'errors':>6}")
+        rows = [header, '-' * len(header)]
+        ordered = sorted(self.histograms.items(), key=lambda item: item[1].total, reverse=True)
+        for name, h in ordered:
+            rows.append(
+                f"{name:12} {h.count:7} {h.total:9.3f} {h.total / h.count * 1e3:9.3f} "
+                f"{h.percentile(0.5) * 1e3:9.3f} {h.percentile(0.95) * 1e3:9.3f} "
+                f"{h.max * 1e3:9.3f} {h.blocked:10.3f} {h.errors:6}")
+        return '\n'.join(rows)
@@ -0,0 +1,303 @@
+# core/windows.py
+#
+# Window registry: one cached enumeration of the desktop's windows, indexed by
+# title, word and owning process, shared by everything that looks windows up.
+# Enumerations come from a pluggable backend (pygetwindow, wmctrl or a fake one
+# for tests) and are refreshed when older than `ttl` or after our own
+# launch/close/focus events invalidate them.
+
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from collections import namedtuple
+
+from core.keys import KeySequence
+from core.readiness import normalize_process_name
+
+# handle is backend specific; pid is None when the backend cannot tell
+Window = namedtuple('Window', 'handle title pid')
+TypeTarget = namedtuple('TypeTarget', 'window keys')
+
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def parse_window_target(text):
+    # Argument of `focus`: an app name or part of a window title
+    target = text.strip()
+    if not target:
+        raise ValueError("expected an application or window title")
+    return target
+
+
+def parse_type_target(text):
+    # "<app or window title>: <text>"; the text takes the same escapes as `type`
+    window, sep, keys = text.partition(':')
+    if not sep:
+        raise ValueError(f"expected '<app or window>: <text>', got '{text.strip()}'")
+    return TypeTarget(parse_window_target(window), KeySequence.parse(keys[1:] if keys.startswith(' ') else keys))
+
+
+class PyGetWindowBackend:
+    name = 'pygetwindow'
+    reports_active = True
+
+    def __init__(self):
+        import pygetwindow
+        self._gw = pygetwindow
+        self._objects = {}  # handle -> pygetwindow window, from the last enumeration
+
+    def windows(self):
+        gw = self._gw
+        if hasattr(gw, 'getAllWindows'):
+            found = [window for window in gw.getAllWindows() if window.title]
+        else:
+            found = [window for title in gw.getAllTitles() if title
+                     for window in gw.getWindowsWithTitle(title)[:1]]
+        self._objects = {self._handle(window): window for window in found}
+        return [Window(handle, window.title, None) for handle, window in self._objects.items()]
+
+    @staticmethod
+    def _handle(window):
+        # Window objects are recreated on every enumeration, so the handle must come
+        # from the window itself: the native handle on Windows, else the title
+        # (windows sharing a title are then told apart by nothing)
+        return getattr(window, '_hWnd', None) or ('title', window.title)
+
+    def activate(self, handle):
+        window = self._objects.get(handle)
+        if window is None:
+            return False
+        window.activate()
+        return True
+
+    def active(self):
+        window = self._gw.getActiveWindow()
+        return self._handle(window) if window is not None else None
+
+
+class WmctrlBackend:
+    # X11 through the wmctrl tool; also reports each window's pid
+    name = 'wmctrl'
+
+    def __init__(self):
+        # The active window comes from xprop; without it focus cannot be verified
+        self.reports_active = shutil.which('xprop') is not None
+
+    def _run(self, *args):
+        return subprocess.run(['wmctrl', *args], capture_output=True, text=True, check=False).stdout
+
+    def windows(self):
+        found = []
+        for row in self._run('-lp').splitlines():
+            # 0x03a00003  0 12345  host  Title with spaces
+            fields = row.split(None, 4)
+            if len(fields) < 5 or not fields[4]:
+                continue
+            pid = int(fields[2]) if fields[2].isdigit() and fields[2] != '0' else None
+            found.append(Window(int(fields[0], 16), fields[4], pid))
+        return found
+
+    def activate(self, handle):
+        self._run('-ia', hex(handle))
+        return True
+
+    def active(self):
+        if not self.reports_active:
+            return None
+        output = subprocess.run(['xprop', '-root', '_NET_ACTIVE_WINDOW'], capture_output=True,
+                                text=True, check=False).stdout
+        match = re.search(r'0x[0-9a-fA-F]+', output)
+        return int(match.group(), 16) if match else None
+
+
+class FakeWindowBackend:
+    # In-memory desktop for tests: add and remove windows, activation is recorded
+    name = 'fake'
+    reports_active = True
+
+    def __init__(self, windows=()):
+        self._windows = {}
+        self._next = 1
+        self.active_handle = None
+        self.activations = []
+        self.enumerations = 0
+        for title, pid in windows:
+            self.add(title, pid)
+
+    def add(self, title, pid=None):
+        handle = self._next
+        self._next += 1
+        self._windows[handle] = Window(handle, title, pid)
+        return handle
+
+    def remove(self, handle):
+        self._windows.pop(handle, None)
+        if self.active_handle == handle:
+            self.active_handle = None
+
+    def windows(self):
+        self.enumerations += 1
+        return list(self._windows.values())
+
+    def activate(self, handle):
+        if handle not in self._windows:
+            return False
+        self.active_handle = handle
+        self.activations.append(handle)
+        return True
+
+    def active(self):
+        return self.active_handle
+
+
+BACKENDS = {
+    'pygetwindow': PyGetWindowBackend,
+    'wmctrl': WmctrlBackend,
+    'fake': FakeWindowBackend,
+}
+
+
+def select_backend(name=None):
+    # PACH_WINDOW_BACKEND picks one explicitly ('none' disables window detection);
+    # otherwise wmctrl on X11 when installed, then pygetwindow
+    name = name or os.environ.get('PACH_WINDOW_BACKEND', '')
+    if name == 'none':
+        return None
+    if name:
+        return BACKENDS[name]()
+    if sys.platform.startswith('linux') and os.environ.get('DISPLAY') and shutil.which('wmctrl'):
+        return WmctrlBackend()
+    try:
+        return PyGetWindowBackend()
+    except Exception:
+        # pygetwindow is missing or does not support this platform
+        return None
+
+
+class WindowRegistry:
+    def __init__(self, backend=None, ttl=0.25, process_name=None):
+        # Without a backend, one is picked (see select_backend) on first use
+        self._backend = backend
+        self._selected = backend is not None
+        self.ttl = ttl
+        self.process_name = process_name  # callable pid -> process name, for app lookups
+        self._lock = threading.RLock()
+        self._taken = None
+        self.generation = 0
+        self._windows = {}   # handle -> Window
+        self._by_title = {}  # lowercase title -> handle
+        self._by_word = {}   # lowercase word -> [handle]
+        self._by_pid = {}    # pid -> [handle]
+        self._found = {}     # lowercase query -> handle, valid for one generation
+
+    @property
+    def backend(self):
+        if not self._selected:
+            self._selected = True
+            self._backend = select_backend()
+        return self._backend
+
+    @property
+    def available(self):
+        return self.backend is not None
+
+    @property
+    def reports_active(self):
+        return self.available and getattr(self.backend, 'reports_active', True)
+
+    def invalidate(self):
+        # Our own events (a launch, a close, a focus) make the snapshot stale
+        self._taken = None
+
+    def refresh(self, force=False):
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._taken is not None and now - self._taken < self.ttl:
+                return
+            self._taken = now
+            windows, by_title, by_word, by_pid = {}, {}, {}, {}
+            for window in self.backend.windows():
+                windows[window.handle] = window
+                title = window.title.lower()
+                by_title.setdefault(title, window.handle)
+                for word in set(WORD_PATTERN.findall(title)):
+                    by_word.setdefault(word, []).append(window.handle)
+                if window.pid is not None:
+                    by_pid.setdefault(window.pid, []).append(window.handle)
+            self._windows, self._by_title, self._by_word, self._by_pid = windows, by_title, by_word, by_pid
+            self._found = {}
+            self.generation += 1
+
+    def windows(self):
+        if not self.available:
+            return []
+        self.refresh()
+        return list(self._windows.values())
+
+    def find_window(self, query):
+        # Exact title, then titles containing the query
+        if not self.available:
+            return None
+        query = query.strip().lower()
+        with self._lock:
+            self.refresh()
+            handle = self._found.get(query)
+            if handle is None:
+                handle = self._by_title.get(query)
+            if handle is None:
+                # A query that is one whole title word is answered from the word
+                # index; anything else may be part of a word and scans the titles
+                candidates = self._by_word.get(query) or self._windows
+                handle = next((h for h in candidates if query in self._windows[h].title.lower()), None)
+            if handle is not None:
+                self._found[query] = handle
+            return self._windows.get(handle)
+
+    def window_for_app(self, app, pids=()):
+        # A window owned by one of `pids` (newest process first), else one whose
+        # owner's process name or title matches the app
+        if not self.available:
+            return None
+        with self._lock:
+            self.refresh()
+            for pid in sorted(pids, reverse=True):
+                handles = self._by_pid.get(pid)
+                if handles:
+                    return self._windows[handles[0]]
+            if self.process_name is not None and self._by_pid:
+                name = normalize_process_name(app)
+                for pid, handles in self._by_pid.items():
+                    process_name = self.process_name(pid)
+                    if process_name and normalize_process_name(process_name) == name:
+                        return self._windows[handles[0]]
+            return self.find_window(app)
+
+    def focus(self, window):
+        self.invalidate()
+        return self.backend.activate(window.handle)
+
+    def active_window(self):
+        if not self.available:
+            return None
+        handle = self.backend.active()
+        if handle is None:
+            return None
+        with self._lock:
+            window = self._windows.get(handle)
+            if window is None:
+                self.refresh(force=True)  # a window we have not enumerated yet
+                window = self._windows.get(handle)
+        return window
+
+    # Title-based interface used by waitfor and type
+    def find(self, query):
+        window = self.find_window(query)
+        return window.title if window is not None else None
+
+    def active_title(self):
+        window = self.active_window()
+        return window.title if window is not None else None
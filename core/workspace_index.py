@@ -0,0 +1,414 @@
+# core/workspace_index.py
+
+import bisect
+import hashlib
+import json
+import os
+import queue
+import re
+import threading
+from collections import namedtuple
+
+from core.file_io import write_atomic
+from core.language import APP_COMMANDS
+from core.parser import Parser
+from core.paths import cache_dir
+
+INDEX_VERSION = 3
+SCRIPT_EXTENSION = '.psc'
+
+WORD_PATTERN = re.compile(r'\w+')
+
+# Directories not crawled by default, besides hidden ones
+SKIP_DIRS = frozenset({'__pycache__', 'node_modules'})
+
+SearchHit = namedtuple('SearchHit', 'path line text')
+
+
+def default_index_path(root):
+    digest = hashlib.sha1(os.path.abspath(root).encode('utf-8')).hexdigest()[:16]
+    return cache_dir('workspaces', digest + '.json')
+
+
+def crawled_dir(name, skip_dirs=SKIP_DIRS):
+    return not name.startswith('.') and name not in skip_dirs
+
+
+def walk_workspace(root, skip_dirs=SKIP_DIRS):
+    # (directory, [script paths]) for every crawled directory below root
+    for directory, dirs, files in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if crawled_dir(d, skip_dirs))
+        yield directory, [os.path.join(directory, file_name) for file_name in sorted(files)
+                          if file_name.endswith(SCRIPT_EXTENSION)]
+
+
+def find_workspace_scripts(root, skip_dirs=SKIP_DIRS):
+    for _, scripts in walk_workspace(root, skip_dirs):
+        yield from scripts
+
+
+def index_script(text, parser):
+    # Postings of one script: term -> sorted line numbers
+    words, commands, apps = {}, {}, {}
+    for line_no, line in enumerate(text.splitlines(), 1):
+        for word in set(WORD_PATTERN.findall(line.lower())):
+            words.setdefault(word, []).append(line_no)
+        cmd, args = parser.parse_line(line)
+        if not cmd:
+            continue
+        commands.setdefault(cmd, []).append(line_no)
+        if cmd in APP_COMMANDS and args.strip():
+            apps.setdefault(args.strip().lower(), []).append(line_no)
+    return {'words': words, 'commands': commands, 'apps': apps}
+
+
+class WorkspaceIndex:
+    # Inverted index over the .psc files below `root`, persisted per workspace.
+    # Paths are stored relative to the root; query results use absolute paths.
+    def __init__(self, root, index_path=None, parser=None, skip_dirs=SKIP_DIRS):
+        self.root = os.path.abspath(root)
+        self.index_path = default_index_path(self.root) if index_path is None else index_path
+        self.parser = parser or Parser()
+        self.skip_dirs = skip_dirs
+        self.files = {}  # relative path -> {'mtime', 'size', 'words', 'commands', 'apps'}
+        self.directories = {}  # relative path of each crawled directory ('' for the root) -> mtime
+        self._terms = {'words': {}, 'commands': {}, 'apps': {}}  # kind -> term -> {paths}
+        self._sorted_words = None  # sorted vocabulary for prefix lookups, rebuilt after it changes
+        self._lock = threading.RLock()
+        self._dirty = False
+
+    def __len__(self):
+        return len(self.files)
+
+    @property
+    def dirty(self):
+        # Changed since the last save
+        return self._dirty
+
+    # --- Building ---
+    def load(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get('version') != INDEX_VERSION or data.get('root') != self.root:
+            return False
+        with self._lock:
+            self.files = {}
+            self._terms = {'words': {}, 'commands': {}, 'apps': {}}
+            self._sorted_words = None
+            for rel_path, entry in data.get('files', {}).items():
+                self._add(rel_path, entry)
+        return True
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {'version': INDEX_VERSION, 'root': self.root, 'files': self.files}
+            self._dirty = False
+            try:
+                os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+                write_atomic(self.index_path, json.dumps(data), sync=False)
+            except OSError:
+                pass
+
+    def scan(self, should_stop=None):
+        # Full crawl: re-indexes new and modified scripts and drops deleted ones;
+        # returns the relative paths that changed
+        changed, seen, directories = self._crawl(self.root, should_stop)
+        if should_stop and should_stop():
+            return changed
+        with self._lock:
+            self.directories = directories
+            removed = [rel_path for rel_path in self.files if rel_path not in seen]
+            for rel_path in removed:
+                self._remove(rel_path)
+        return changed + removed
+
+    def scan_directory(self, directory):
+        # Re-checks one directory after a change notification, unless its mtime
+        # says nothing was added, removed or renamed: its scripts, and
+        # subdirectories that appeared (crawled) or vanished (dropped). Returns
+        # (changed relative paths, absolute directories found by the crawl)
+        rel_dir = self.relative(directory)
+        try:
+            mtime = os.stat(directory).st_mtime
+            names = os.listdir(directory)
+        except OSError:
+            return self._drop_tree(rel_dir), []
+        if self.directories.get(rel_dir) == mtime:
+            return [], []
+        with self._lock:
+            self.directories[rel_dir] = mtime
+        changed, new_directories = [], []
+        present = set()
+        for name in names:
+            path = os.path.join(directory, name)
+            rel_path = self.relative(path)
+            if name.endswith(SCRIPT_EXTENSION) and os.path.isfile(path):
+                present.add(rel_path)
+                if self._update_if_modified(path, rel_path):
+                    changed.append(rel_path)
+            elif crawled_dir(name, self.skip_dirs) and os.path.isdir(path) and rel_path not in self.directories:
+                found, _, directories = self._crawl(path)
+                changed += found
+                with self._lock:
+                    self.directories.update(directories)
+                new_directories += [os.path.join(self.root, d) for d in directories]
+        with self._lock:
+            for rel_path in [p for p in self.files if os.path.dirname(p) == rel_dir and p not in present]:
+                self._remove(rel_path)
+                changed.append(rel_path)
+            for gone in [d for d in self.directories if os.path.dirname(d) == rel_dir and d
+                         and os.path.basename(d) not in names]:
+                changed += self._drop_tree(gone)
+        return changed, new_directories
+
+    def _crawl(self, top, should_stop=None):
+        changed, seen, directories = [], set(), {}
+        for directory, scripts in walk_workspace(top, self.skip_dirs):
+            if should_stop and should_stop():
+                break
+            try:
+                directories[self.relative(directory)] = os.stat(directory).st_mtime
+            except OSError:
+                continue
+            for path in scripts:
+                rel_path = self.relative(path)
+                seen.add(rel_path)
+                if self._update_if_modified(path, rel_path):
+                    changed.append(rel_path)
+        return changed, seen, directories
+
+    def _update_if_modified(self, path, rel_path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        entry = self.files.get(rel_path)
+        if entry and entry['mtime'] == stat.st_mtime and entry['size'] == stat.st_size:
+            return False
+        return self.update_file(path, stat)
+
+    def _drop_tree(self, rel_dir):
+        # Forgets a deleted directory with everything indexed below it
+        prefix = rel_dir + os.sep if rel_dir else ''
+        with self._lock:
+            self.directories = {d: mtime for d, mtime in self.directories.items()
+                                if d != rel_dir and not d.startswith(prefix)}
+            removed = [p for p in self.files if p.startswith(prefix)]
+            for rel_path in removed:
+                self._remove(rel_path)
+        return removed
+
+    def relative(self, path):
+        rel_path = os.path.relpath(os.path.abspath(path), self.root)
+        return '' if rel_path == os.curdir else rel_path
+
+    def update_file(self, path, stat=None):
+        rel_path = self.relative(path)
+        try:
+            stat = stat or os.stat(path)
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                text = f.read()
+        except OSError:
+            return self.remove_file(path)
+        entry = index_script(text, self.parser)
+        entry.update(mtime=stat.st_mtime, size=stat.st_size)
+        with self._lock:
+            self._remove(rel_path)
+            self._add(rel_path, entry)
+        return True
+
+    def remove_file(self, path):
+        rel_path = self.relative(path)
+        with self._lock:
+            return self._remove(rel_path)
+
+    def _add(self, rel_path, entry):
+        self.files[rel_path] = entry
+        for kind, terms in self._terms.items():
+            for term in entry[kind]:
+                paths = terms.get(term)
+                if paths is None:
+                    paths = terms[term] = set()
+                    if kind == 'words':
+                        self._sorted_words = None
+                paths.add(rel_path)
+        self._dirty = True
+
+    def _remove(self, rel_path):
+        entry = self.files.pop(rel_path, None)
+        if entry is None:
+            return False
+        for kind, terms in self._terms.items():
+            for term in entry[kind]:
+                paths = terms.get(term)
+                if paths is not None:
+                    paths.discard(rel_path)
+                    if not paths:
+                        del terms[term]
+                        if kind == 'words':
+                            self._sorted_words = None
+        self._dirty = True
+        return True
+
+    # --- Queries ---
+    def search(self, query, limit=200):
+        # Lines containing `query` (case-insensitive) whose words start like the
+        # query's words; the index narrows the candidate files and lines, the
+        # file text confirms each hit
+        needle = query.strip().lower()
+        words = WORD_PATTERN.findall(needle)
+        if not words:
+            return []
+        with self._lock:
+            candidates = None
+            for word in words:
+                # A query word may be the start of a longer indexed word ("note" in "notepad")
+                lines_by_path = {}
+                vocabulary = self._terms['words']
+                for term in self._words_starting(word):
+                    for rel_path in vocabulary[term]:
+                        lines = lines_by_path.setdefault(rel_path, set())
+                        lines.update(self.files[rel_path]['words'][term])
+                if candidates is None:
+                    candidates = lines_by_path
+                    continue
+                for rel_path in list(candidates):
+                    lines = candidates[rel_path] & lines_by_path.get(rel_path, set())
+                    if lines:
+                        candidates[rel_path] = lines
+                    else:
+                        del candidates[rel_path]
+                if not candidates:
+                    break
+        return self._collect(candidates, lambda text: needle in text.lower(), limit)
+
+    def _words_starting(self, prefix):
+        if self._sorted_words is None:
+            self._sorted_words = sorted(self._terms['words'])
+        words = self._sorted_words
+        position = bisect.bisect_left(words, prefix)
+        while position < len(words) and words[position].startswith(prefix):
+            yield words[position]
+            position += 1
+
+    def usages_of_app(self, name, limit=200):
+        return self._usages('apps', name.strip().lower(), limit)
+
+    def usages_of_command(self, name, limit=200):
+        return self._usages('commands', name.strip().lower(), limit)
+
+    def apps(self):
+        with self._lock:
+            return sorted(self._terms['apps'])
+
+    def _usages(self, kind, term, limit):
+        with self._lock:
+            candidates = {rel_path: set(self.files[rel_path][kind][term])
+                          for rel_path in self._terms[kind].get(term, ())}
+        return self._collect(candidates, None, limit)
+
+    def _collect(self, candidates, verify, limit):
+        hits = []
+        for rel_path in sorted(candidates):
+            path = os.path.join(self.root, rel_path)
+            wanted = candidates[rel_path]
+            try:
+                with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                    for line_no, text in enumerate(f, 1):
+                        if line_no not in wanted:
+                            continue
+                        text = text.rstrip('\r\n')
+                        if verify is None or verify(text):
+                            hits.append(SearchHit(path, line_no, text))
+                            if len(hits) >= limit:
+                                return hits
+            except OSError:
+                continue
+        return hits
+
+
+class WorkspaceIndexer:
+    # Keeps a WorkspaceIndex current from a background thread: loads the saved
+    # index and crawls the folder once, then only re-checks the paths it is told
+    # about (see notify), e.g. directories a file system watcher reports.
+    # on_watch receives the absolute directories worth watching. The index is
+    # saved once no change has arrived for `save_delay` seconds, and on stop.
+    def __init__(self, root, on_change=None, on_watch=None, index_path=None, save_delay=5.0,
+                 skip_dirs=SKIP_DIRS):
+        self.index = WorkspaceIndex(root, index_path, skip_dirs=skip_dirs)
+        self.on_change = on_change  # called from the indexer thread with changed paths
+        self.on_watch = on_watch    # likewise, with directories to watch
+        self.save_delay = save_delay
+        self._tasks = queue.SimpleQueue()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def root(self):
+        return self.index.root
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='pach-workspace-indexer', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._tasks.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.index.save()
+
+    def notify(self, path):
+        # A script or directory below the root changed
+        self._tasks.put(os.path.abspath(path))
+
+    def _run(self):
+        index = self.index
+        if index.load() and self.on_change:
+            self.on_change([])
+        changed = index.scan(should_stop=self._stop.is_set)
+        if self._stop.is_set():
+            return
+        index.save()
+        if self.on_change:
+            self.on_change(changed)
+        if self.on_watch:
+            self.on_watch([os.path.join(self.root, d) for d in sorted(index.directories)])
+        while True:
+            try:
+                paths = {self._tasks.get(timeout=self.save_delay if index.dirty else None)}
+            except queue.Empty:
+                index.save()  # things went quiet
+                continue
+            while True:
+                # A burst of notifications (a checkout, a folder copied in) is handled at once
+                try:
+                    paths.add(self._tasks.get_nowait())
+                except queue.Empty:
+                    break
+            if self._stop.is_set():
+                return
+            changed, watch = [], []
+            for path in sorted(paths - {None}):
+                rel_path = index.relative(path)
+                if rel_path.startswith(os.pardir):
+                    continue  # not in this workspace
+                if os.path.isdir(path) or rel_path in index.directories:
+                    found, directories = index.scan_directory(path)
+                    changed += found
+                    watch += directories
+                elif path.endswith(SCRIPT_EXTENSION) and index.update_file(path):
+                    # update_file also drops a script that no longer exists
+                    changed.append(rel_path)
+            if changed and self.on_change:
+                self.on_change(changed)
+            if watch and self.on_watch:
+                self.on_watch(watch)
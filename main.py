@@ -13,7 +13,7 @@ def main():
 
     command_registry = CommandRegistry()
     executor = Executor(command_registry, logger=None)  # logger set later
-    plugin_manager = PluginManager(command_registry)
+    plugin_manager = PluginManager(command_registry, control=executor.control)
 
     # Load plugins (optional)
     plugin_manager.load_plugins()
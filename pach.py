@@ -0,0 +1,326 @@
+# pach.py
+#
+# Headless command-line runner:  python -m pach run script.psc [--dry-run]
+# Only the core modules are imported here; Qt is never loaded and automation
+# backends are imported by the executor when a command first needs them.
+
+import argparse
+import json
+import sys
+
+from core.language import OP_COMMAND, ScriptError
+from core.log_sink import LogSink
+from core.runner import ScriptRunner
+from core.session import PLUGINS_DIR, create_session
+
+
+class ConsoleLogger:
+    def __init__(self, stream=None, quiet=False, log_file=None):
+        self.stream = stream or sys.stdout
+        self.quiet = quiet
+        self.file_sink = LogSink(log_file, buffered=False) if log_file else None
+
+    def log(self, text, level='info', line=None, command=None):
+        if self.file_sink:
+            self.file_sink.log(text, level, line, command)
+        if not self.quiet:
+            print(text, file=self.stream, flush=True)
+
+
+def read_script(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def dry_run(compiler, script_text, logger):
+    unknown = 0
+    try:
+        program = compiler.compile(script_text)
+    except ScriptError as e:
+        logger.log(str(e), 'error')
+        return 1
+    for instruction in program:
+        if instruction.op != OP_COMMAND:
+            continue
+        if instruction.handler:
+            logger.log(f"{instruction.line}: {instruction.echo}")
+        else:
+            logger.log(f"{instruction.line}: ! unknown command: {instruction.name} {instruction.args}")
+            unknown += 1
+    return 1 if unknown else 0
+
+
+def run(executor, compiler, script_text):
+    result = {}
+    runner = ScriptRunner(executor, compiler, on_finished=lambda status: result.update(status=status))
+    runner.start(script_text)
+    try:
+        while runner.is_running():
+            runner.wait(0.2)
+        runner.wait()
+    except KeyboardInterrupt:
+        executor.logger.log("Interrupted, aborting script...")
+        runner.abort()
+        runner.wait()
+        return 130
+    if result.get('status') != 'finished':
+        return 1
+    if executor.failures:
+        # The script went on past its failed commands, but it did not succeed
+        executor.logger.log(f"{executor.failures} command(s) failed", 'error')
+        return 1
+    return 0
+
+
+def cmd_run(options):
+    logger = ConsoleLogger(quiet=options.quiet, log_file=options.log_file)
+    try:
+        script_text = read_script(options.script)
+    except OSError as e:
+        print(f"Could not open script: {e}", file=sys.stderr)
+        return 2
+
+    session = create_session(logger, None if options.no_plugins else PLUGINS_DIR,
+                             options.isolate_plugins or None)
+    tracer = session.executor.enable_tracing() if options.trace and not options.dry_run else None
+    try:
+        if options.dry_run:
+            return dry_run(session.compiler, script_text, logger)
+        status = run(session.executor, session.compiler, script_text)
+    finally:
+        session.plugin_manager.close()
+        # Apps the script closed are still being terminated in the background
+        session.executor.process_manager.wait_closed()
+    if tracer is not None:
+        tracer.write_chrome_trace(options.trace)
+        print(tracer.summary_table(), file=sys.stderr)
+        print(f"Trace written to {options.trace}", file=sys.stderr)
+    return status
+
+
+def cmd_simulate(options):
+    from core.simulation import Simulation, compare_golden, write_golden
+
+    logger = ConsoleLogger(sys.stderr, quiet=not options.verbose)
+    try:
+        script_text = read_script(options.script)
+    except OSError as e:
+        print(f"Could not open script: {e}", file=sys.stderr)
+        return 2
+
+    session = create_session(logger, None if options.no_plugins else PLUGINS_DIR)
+    simulation = Simulation(session.executor)
+    try:
+        program = session.compiler.compile(script_text)
+    except ScriptError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    status = simulation.run(program)
+    lines = simulation.lines()
+
+    if options.golden and options.update_golden:
+        write_golden(options.golden, lines)
+        print(f"Golden file written to {options.golden}", file=sys.stderr)
+        return 0
+    if options.golden:
+        try:
+            diff = compare_golden(lines, options.golden)
+        except OSError as e:
+            print(f"Could not read golden file: {e}", file=sys.stderr)
+            return 2
+        for line in diff:
+            print(line)
+        print(f"{'MISMATCH' if diff else 'OK'}: {len(lines)} events, "
+              f"{simulation.clock.now:g} virtual seconds", file=sys.stderr)
+        return 1 if diff else 0
+
+    for line in lines:
+        print(line)
+    return 0 if status == 'finished' else 1
+
+
+def cmd_batch(options):
+    from core.batch import find_scripts, run_batch
+
+    paths = find_scripts(options.target)
+    if not paths:
+        print(f"No .psc scripts found in {options.target}", file=sys.stderr)
+        return 2
+
+    def on_result(result):
+        if not options.quiet:
+            print(f"{result['status']:8} {result.get('duration', 0):8.3f}s  {result['path']}",
+                  file=sys.stderr, flush=True)
+
+    report = run_batch(paths, options.mode, options.jobs,
+                       None if options.no_plugins else PLUGINS_DIR, on_result, options.update_golden)
+    text = json.dumps(report, indent=2)
+    if options.report:
+        with open(options.report, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0 if set(report['summary']) <= {'ok', 'updated'} else 1
+
+
+def cmd_daemon(options):
+    from core.daemon import Daemon, DaemonClient
+
+    if options.stop:
+        try:
+            for _ in DaemonClient(options.socket).request('shutdown'):
+                pass
+        except OSError as e:
+            print(f"No daemon to stop: {e}", file=sys.stderr)
+            return 1
+        return 0
+    try:
+        daemon = Daemon(options.socket, options.workers, None if options.no_plugins else PLUGINS_DIR)
+        print(f"Listening on {daemon.socket_path}", file=sys.stderr, flush=True)
+        daemon.serve_forever()
+    except RuntimeError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        daemon.shutdown()
+    return 0
+
+
+def cmd_submit(options):
+    from core.daemon import DaemonClient
+
+    try:
+        script_text = read_script(options.script)
+    except OSError as e:
+        print(f"Could not open script: {e}", file=sys.stderr)
+        return 2
+
+    client = DaemonClient(options.socket)
+    job = None
+    try:
+        for message in client.submit(script_text, options.script, options.priority, not options.detach):
+            kind = message['type']
+            if kind == 'accepted':
+                job = message['job']
+                print(f"Job {job} queued", file=sys.stderr, flush=True)
+            elif kind == 'log' and not options.quiet:
+                print(message['message'], flush=True)
+            elif kind == 'result':
+                print(f"Job {job} {message['status']} in {message['duration'] or 0:.3f}s",
+                      file=sys.stderr)
+                return 0 if message['status'] == 'finished' else 1
+            elif kind == 'error':
+                print(message['message'], file=sys.stderr)
+                return 1
+    except OSError as e:
+        print(f"Could not reach the daemon: {e}", file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        if job is not None:
+            for _ in client.request('cancel', job=job):
+                pass
+        return 130
+    return 0 if options.detach and job is not None else 1
+
+
+def cmd_jobs(options):
+    from core.daemon import DaemonClient
+
+    try:
+        for message in DaemonClient(options.socket).request('jobs'):
+            for job in message.get('jobs', ()):
+                kind = 'desktop' if job['desktop'] else 'general'
+                print(f"{job['job']:5}  {job['status']:9}  {kind:7}  p{job['priority']:<3}  {job['name']}")
+    except OSError as e:
+        print(f"Could not reach the daemon: {e}", file=sys.stderr)
+        return 2
+    return 0
+
+
+def cmd_cancel(options):
+    from core.daemon import DaemonClient
+
+    try:
+        for message in DaemonClient(options.socket).request('cancel', job=options.job):
+            if not message.get('ok'):
+                print(f"Job {options.job} is not queued or running", file=sys.stderr)
+                return 1
+    except OSError as e:
+        print(f"Could not reach the daemon: {e}", file=sys.stderr)
+        return 2
+    return 0
+
+
+def build_arg_parser():
+    arg_parser = argparse.ArgumentParser(prog='pach', description="Run Pach automation scripts.")
+    subparsers = arg_parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help="run a .psc script")
+    run_parser.add_argument('script', help="path to the .psc script")
+    run_parser.add_argument('--dry-run', action='store_true',
+                            help="parse and validate the script without executing it")
+    run_parser.add_argument('--no-plugins', action='store_true', help="do not load plugins")
+    run_parser.add_argument('-q', '--quiet', action='store_true', help="suppress log output")
+    run_parser.add_argument('--isolate-plugins', action='store_true',
+                            help="run plugin commands in worker processes")
+    run_parser.add_argument('--log-file', help="also write log records to this rotating file")
+    run_parser.add_argument('--trace', metavar='TRACE_JSON',
+                            help="record per-command timings and write a Chrome trace_event file")
+    run_parser.set_defaults(func=cmd_run)
+
+    simulate_parser = subparsers.add_parser(
+        'simulate', help="run a script against a simulated desktop and print its event log")
+    simulate_parser.add_argument('script', help="path to the .psc script")
+    simulate_parser.add_argument('--golden', help="compare the event log with this JSON Lines file")
+    simulate_parser.add_argument('--update-golden', action='store_true',
+                                 help="write the event log to the --golden file instead of comparing")
+    simulate_parser.add_argument('--no-plugins', action='store_true', help="do not load plugins")
+    simulate_parser.add_argument('-v', '--verbose', action='store_true', help="also show the script's log")
+    simulate_parser.set_defaults(func=cmd_simulate)
+
+    batch_parser = subparsers.add_parser('batch', help="validate or run a folder or glob of scripts")
+    batch_parser.add_argument('target', help="folder (searched recursively) or glob of .psc files")
+    batch_parser.add_argument('--mode', choices=('validate', 'dry-run', 'run', 'simulate'), default='validate')
+    batch_parser.add_argument('--update-golden', action='store_true',
+                              help="simulate mode: (re)write each script's .golden.jsonl file")
+    batch_parser.add_argument('-j', '--jobs', type=int, help="worker processes (default: CPU count)")
+    batch_parser.add_argument('--report', help="write the JSON report here instead of stdout")
+    batch_parser.add_argument('--no-plugins', action='store_true', help="do not load plugins")
+    batch_parser.add_argument('-q', '--quiet', action='store_true', help="no per-script progress")
+    batch_parser.set_defaults(func=cmd_batch)
+
+    daemon_parser = subparsers.add_parser('daemon', help="keep an executor running and accept jobs on a socket")
+    daemon_parser.add_argument('--socket', help="socket path (default: $PACH_SOCKET or the runtime dir)")
+    daemon_parser.add_argument('--workers', type=int, default=2,
+                               help="workers for jobs without desktop commands (default: 2)")
+    daemon_parser.add_argument('--no-plugins', action='store_true', help="do not load plugins")
+    daemon_parser.add_argument('--stop', action='store_true', help="ask a running daemon to shut down")
+    daemon_parser.set_defaults(func=cmd_daemon)
+
+    submit_parser = subparsers.add_parser('submit', help="run a script on the daemon and stream its log")
+    submit_parser.add_argument('script', help="path to the .psc script")
+    submit_parser.add_argument('-p', '--priority', type=int, default=0, help="higher runs first (default: 0)")
+    submit_parser.add_argument('--detach', action='store_true', help="queue the job and return at once")
+    submit_parser.add_argument('--socket', help="daemon socket path")
+    submit_parser.add_argument('-q', '--quiet', action='store_true', help="suppress log output")
+    submit_parser.set_defaults(func=cmd_submit)
+
+    jobs_parser = subparsers.add_parser('jobs', help="list the daemon's jobs")
+    jobs_parser.add_argument('--socket', help="daemon socket path")
+    jobs_parser.set_defaults(func=cmd_jobs)
+
+    cancel_parser = subparsers.add_parser('cancel', help="cancel a queued or running daemon job")
+    cancel_parser.add_argument('job', type=int, help="job id")
+    cancel_parser.add_argument('--socket', help="daemon socket path")
+    cancel_parser.set_defaults(func=cmd_cancel)
+
+    return arg_parser
+
+
+def main(argv=None):
+    options = build_arg_parser().parse_args(argv)
+    return options.func(options)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
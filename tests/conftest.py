@@ -0,0 +1,70 @@
+# tests/conftest.py
+#
+# Core tests run headless: no Qt, no pyautogui, no real desktop. Scripts are
+# driven through core.simulation, whose virtual clock makes waits instant.
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.app_catalog import AppCatalog  # noqa: E402
+from core.batch import RecordingLogger  # noqa: E402
+from core.session import create_session  # noqa: E402
+from core.simulation import Simulation  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    # Compiled programs, indexes and sockets never touch the user's cache
+    path = tmp_path / 'cache'
+    monkeypatch.setenv('PACH_CACHE_DIR', str(path))
+    monkeypatch.setenv('PACH_WINDOW_BACKEND', 'fake')
+    return path
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    # Known apps come from a desktop folder the test fills in
+    desktop = tmp_path / 'applications'
+    desktop.mkdir()
+    return AppCatalog(index_path=str(tmp_path / 'apps.json'), desktop_dirs=[str(desktop)],
+                      path_dirs=[], builtins={})
+
+
+@pytest.fixture
+def install_app(catalog):
+    # install_app('Notepad') writes a desktop entry the next catalog refresh finds
+    def install(name, exec_line=None):
+        directory = catalog.desktop_dirs[0]
+        with open(os.path.join(directory, f'{name.lower()}.desktop'), 'w', encoding='utf-8') as f:
+            f.write(f"[Desktop Entry]\nType=Application\nName={name}\nExec={exec_line or name.lower()}\n")
+        # The catalog rescans a directory only when its mtime moves
+        stat = os.stat(directory)
+        os.utime(directory, (stat.st_atime, stat.st_mtime + 10))
+    return install
+
+
+@pytest.fixture
+def session(catalog):
+    logger = RecordingLogger()
+    session = create_session(logger, plugins_dir=None)
+    session.executor.catalog = catalog
+    yield session
+    session.plugin_manager.close()
+
+
+@pytest.fixture
+def simulate(session):
+    # simulate(script) -> (status, events) on a fresh simulated desktop
+    simulation = Simulation(session.executor)
+
+    def run(script_text):
+        simulation.reset()
+        status = simulation.run(session.compiler.compile(script_text))
+        return status, simulation.events
+
+    run.simulation = simulation
+    return run
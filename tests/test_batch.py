@@ -0,0 +1,95 @@
+# tests/test_batch.py
+
+import pytest
+
+from core.batch import BatchContext
+from core.simulation import golden_path
+
+
+@pytest.fixture
+def context(catalog, install_app):
+    context = BatchContext(plugins_dir=None)
+    install_app('Notepad')
+    context.session.executor.catalog = catalog
+    context.linter.applications = catalog
+    return context
+
+
+@pytest.fixture
+def script(tmp_path):
+    def write(text, name='script.psc'):
+        path = tmp_path / name
+        path.write_text(text, encoding='utf-8')
+        return str(path)
+    return write
+
+
+def test_validate_ok(context, script):
+    result = context.process(script("open notepad\ntype hello\nclose notepad\n"), 'validate')
+    assert result['status'] == 'ok'
+    assert result['commands'] == 3
+    assert result['desktop'] is True
+    assert 'warnings' not in result
+
+
+def test_validate_reports_errors_once_prefixed(context, script):
+    result = context.process(script("wait 1\nfrobnicate\nwait soon\n"), 'validate')
+    assert result['status'] == 'invalid'
+    assert result['desktop'] is False
+    assert result['errors'][0] == "line 2: unknown command 'frobnicate'"
+    assert result['errors'][1].startswith('line 3: wait: ')
+
+
+def test_validate_warns_about_unknown_apps(context, script):
+    result = context.process(script("open notepad\nopen nosuchapp\nopen $app\n"), 'validate')
+    assert result['status'] == 'ok'
+    assert result['warnings'] == ["line 2: Unknown application 'nosuchapp'"]
+
+
+def test_validate_structural_error(context, script):
+    result = context.process(script("repeat 2\ntype a\n"), 'validate')
+    assert result['status'] == 'invalid'
+    assert result['errors'] == ['line 1: repeat is missing its end']
+
+
+def test_dry_run_plan(context, script):
+    result = context.process(script("# setup\nwait 1\ntyperate 20\n"), 'dry-run')
+    assert result['status'] == 'ok'
+    assert result['plan'] == ['2: > wait 1', '3: > typerate 20']
+
+
+def test_run_fails_on_runtime_errors(context, script):
+    result = context.process(script("wait 0\nwait $missing\nwait 0\n"), 'run')
+    assert result['status'] == 'failed'
+    assert len(result['errors']) == 1
+    assert result['errors'][0].startswith("line 2: wait: ")
+    assert result['log'].count('> wait 0') == 1
+
+
+def test_simulate_golden_cycle(context, script):
+    path = script("open notepad\nwait 2\ntype hi\nclose notepad\n")
+    assert context.process(path, 'simulate')['status'] == 'no-golden'
+    updated = context.process(path, 'simulate', update_golden=True)
+    assert updated['status'] == 'updated'
+    assert updated['virtual_duration'] >= 2
+    assert context.process(path, 'simulate')['status'] == 'ok'
+
+    with open(golden_path(path), 'a', encoding='utf-8') as f:
+        f.write('{"t": 9, "line": 9, "event": "extra"}\n')
+    mismatch = context.process(path, 'simulate')
+    assert mismatch['status'] == 'mismatch'
+    assert any('extra' in line for line in mismatch['errors'])
+
+
+def test_simulate_failed_script_fails_despite_golden(context, script):
+    path = script("type a\ntype $missing\n")
+    context.process(path, 'simulate', update_golden=True)
+    result = context.process(path, 'simulate')
+    assert result['status'] == 'failed'
+    assert len(result['errors']) == 1
+    assert 'missing' in result['errors'][0]
+
+
+def test_unreadable_script_is_an_error(context, tmp_path):
+    result = context.process(str(tmp_path / 'gone.psc'), 'validate')
+    assert result['status'] == 'error'
@@ -0,0 +1,116 @@
+# tests/test_compiler.py
+
+import pytest
+
+from core.command_registry import CommandRegistry
+from core.compiler import Compiler
+from core.language import (
+    OP_COMMAND, OP_HALT, OP_JUMP, OP_JUMP_IF_FALSE, OP_REPEAT_INIT, OP_REPEAT_NEXT,
+    OP_SET, ScriptError, Template,
+)
+from core.plugin_manager import PluginManager
+
+
+def make_registry():
+    registry = CommandRegistry()
+    registry.register_command('type', lambda args: None)
+    registry.register_command('wait', lambda args: None, decoder=float)
+    return registry
+
+
+def test_opcodes_of_control_flow():
+    compiler = Compiler(make_registry(), cache_path='')
+    program = compiler.compile("set n 2\nrepeat $n\ntype a\nend\nif $n == 2\nwait 1\nend\n")
+    ops = [instruction.op for instruction in program]
+    assert ops == [OP_SET, OP_REPEAT_INIT, OP_REPEAT_NEXT, OP_COMMAND, OP_JUMP,
+                   OP_JUMP_IF_FALSE, OP_COMMAND, OP_HALT]
+    assert program[2].target == 5  # counter spent: past the loop
+    assert program[4].target == 2  # end jumps back to the counter test
+    assert program[5].target == 7  # condition false: past the if block
+    assert isinstance(program[1].operand, Template)
+
+
+def test_else_jumps_over_the_other_branch():
+    compiler = Compiler(make_registry(), cache_path='')
+    program = compiler.compile("if 1 == 2\ntype a\nelse\ntype b\nend\n")
+    ops = [instruction.op for instruction in program]
+    assert ops == [OP_JUMP_IF_FALSE, OP_COMMAND, OP_JUMP, OP_COMMAND, OP_HALT]
+    assert program[0].target == 3
+    assert program[2].target == 4
+
+
+def test_operands_are_decoded_at_compile_time():
+    compiler = Compiler(make_registry(), cache_path='')
+    program = compiler.compile("wait 1.5\nwait soon\nwait $t\n")
+    assert program[0].operand == 1.5
+    assert program[1].operand == 'soon'  # left for the handler to report
+    assert isinstance(program[2].operand, Template)
+
+
+def test_unknown_commands_have_no_handler():
+    compiler = Compiler(make_registry(), cache_path='')
+    instruction = compiler.compile("frobnicate\n")[0]
+    assert instruction.op == OP_COMMAND and instruction.handler is None
+
+
+@pytest.mark.parametrize('script, message', [
+    ("repeat 2\ntype a\n", 'missing its end'),
+    ("end\n", 'without an open block'),
+    ("else\n", 'else'),
+    ("repeat many\nend\n", 'whole number'),
+    ("break\n", 'break'),
+])
+def test_structural_errors(script, message):
+    compiler = Compiler(make_registry(), cache_path='')
+    with pytest.raises(ScriptError, match=message):
+        compiler.compile(script)
+    assert compiler.check(script) is not None
+    assert compiler.check("type fine\n") is None
+
+
+def test_cache_key_is_stable_across_compilers():
+    registry = make_registry()
+    first = Compiler(registry, cache_path='').cache_key("type a\n")
+    assert Compiler(make_registry(), cache_path='').cache_key("type a\n") == first
+    assert Compiler(registry, cache_path='').cache_key("type b\n") != first
+
+
+def test_cache_key_follows_commands_and_decoders():
+    registry = make_registry()
+    compiler = Compiler(registry, cache_path='')
+    key = compiler.cache_key("type a\n")
+    registry.register_command('hello', lambda args: None)
+    with_command = compiler.cache_key("type a\n")
+    assert with_command != key
+    registry.register_command('hello', lambda args: None, decoder=int)
+    assert compiler.cache_key("type a\n") != with_command
+
+
+def test_cache_key_follows_plugin_versions(tmp_path):
+    registry = make_registry()
+    manager = PluginManager(registry, index_path=str(tmp_path / 'plugins.json'))
+    compiler = Compiler(registry, plugin_manager=manager, cache_path='')
+    manager.manifests['sample'] = {'version': '1.0'}
+    key = compiler.cache_key("type a\n")
+    manager.manifests['sample'] = {'version': '1.1'}
+    assert compiler.cache_key("type a\n") != key
+
+
+def test_disk_cache_is_reused(tmp_path):
+    cache = str(tmp_path / 'compiled')
+    program = Compiler(make_registry(), cache_path=cache).compile("type a\nwait 1\n")
+    compiler = Compiler(make_registry(), cache_path=cache)
+    compiler._decode = None  # a cache hit never decodes
+    assert [i[:4] for i in compiler.compile("type a\nwait 1\n")] == [i[:4] for i in program]
+
+
+def test_memory_cache_rebinds_replaced_handlers():
+    registry = make_registry()
+    compiler = Compiler(registry, cache_path='')
+    program = compiler.compile("type a\n")
+    assert compiler.compile("type a\n") is program
+
+    def replacement(args):
+        return None
+    registry.register_command('type', replacement)  # same signature, new handler
+    assert compiler.compile("type a\n")[0].handler is replacement
@@ -0,0 +1,80 @@
+# tests/test_daemon.py
+
+import socket
+
+import pytest
+
+from core.daemon import Daemon, Job, JobQueue
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason="the daemon needs Unix sockets")
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    daemon = Daemon(socket_path=str(tmp_path / 'pach.sock'), workers=1, plugins_dir=None, preload=False)
+    yield daemon
+    daemon.close()
+
+
+def start_workers(daemon):
+    for worker in daemon.workers:
+        worker.start()
+
+
+def test_streamed_submit_sees_every_log_line(daemon):
+    start_workers(daemon)
+    # Subscribing happens before the job is queued, so even a job that finishes
+    # before the first reply is read still streams its whole log
+    messages = list(daemon._dispatch({'op': 'submit', 'script': 'wait 0\nwait 0\nfrobnicate\n'}))
+    assert messages[0]['type'] == 'accepted'
+    logs = [m['message'] for m in messages if m['type'] == 'log']
+    assert logs.count('> wait 0') == 2
+    assert any('frobnicate' in message for message in logs)
+    result = messages[-1]
+    assert result['type'] == 'result'
+    assert result['status'] == 'finished'
+    assert result['errors'] == ['Unknown command: frobnicate']
+
+
+def test_subscribing_to_a_finished_job_gets_its_result():
+    job = Job(1, 'wait 0', '', 0, False)
+    job.finish('finished')
+    assert job.subscribe().get(timeout=1)['status'] == 'finished'
+
+
+def test_cancel_queued_job(daemon):
+    job = daemon.submit('wait 0')  # no workers running: stays queued
+    subscriber = job.subscribe()
+    assert daemon.cancel(job.id)
+    assert subscriber.get(timeout=1)['status'] == 'cancelled'
+    assert len(daemon.general_queue) == 0
+    assert not daemon.cancel(job.id)
+
+
+def test_queue_orders_by_priority_then_submission():
+    jobs = JobQueue()
+    for job_id, priority in ((1, 0), (2, 5), (3, 0), (4, 5)):
+        jobs.put(Job(job_id, '', '', priority, False))
+    assert [jobs.get().id for _ in range(4)] == [2, 4, 1, 3]
+
+
+def test_desktop_jobs_get_their_own_queue(daemon):
+    assert daemon.submit('type hello').desktop
+    assert not daemon.submit('wait 1').desktop
+    assert len(daemon.desktop_queue) == 1 and len(daemon.general_queue) == 1
+
+
+@pytest.mark.parametrize('request_, message', [
+    (['submit'], 'JSON object'),
+    ({'op': 'submit', 'script': 5}, 'strings'),
+    ({'op': 'submit', 'script': 'wait 0', 'priority': 'high'}, 'whole number'),
+])
+def test_bad_requests_are_rejected(daemon, request_, message):
+    with pytest.raises(ValueError, match=message):
+        list(daemon._dispatch(request_))
+    assert not daemon.jobs
+
+
+def test_priority_is_coerced(daemon):
+    next(daemon._dispatch({'op': 'submit', 'script': 'wait 0', 'priority': '3', 'stream': False}))
+    assert [job.priority for job in daemon.jobs.values()] == [3]
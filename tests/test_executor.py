@@ -0,0 +1,94 @@
+# tests/test_executor.py
+#
+# The executor's instruction loop, run on the simulated desktop
+
+from core.language import MAX_CALL_DEPTH
+
+
+def typed(events):
+    return [event['text'] for event in events if event['event'] == 'type']
+
+
+def test_set_and_arithmetic(simulate):
+    status, events = simulate("set n 4\nset total = $n * 3\nset half = $total / 2\ntype $total $half ${n}x\n")
+    assert status == 'finished'
+    assert typed(events) == ['12 6 4x']
+
+
+def test_literal_dollar(simulate):
+    status, events = simulate("type costs $$5 and $5\n")
+    assert status == 'finished'
+    assert typed(events) == ['costs $5 and $5']
+
+
+def test_repeat(simulate):
+    status, events = simulate("set n 3\nrepeat $n\ntype a\nend\nrepeat 0\ntype never\nend\n")
+    assert status == 'finished'
+    assert typed(events) == ['a', 'a', 'a']
+
+
+def test_nested_repeat_break(simulate):
+    script = "repeat 2\nrepeat 5\ntype x\nbreak\nend\ntype y\nend\n"
+    status, events = simulate(script)
+    assert status == 'finished'
+    assert typed(events) == ['x', 'y', 'x', 'y']
+
+
+def test_loop_until_break(simulate):
+    script = "set i 0\nloop\nset i = $i + 1\nif $i == 3\nbreak\nend\nend\ntype $i\n"
+    status, events = simulate(script)
+    assert status == 'finished'
+    assert typed(events) == ['3']
+
+
+def test_if_else(simulate):
+    script = "set a 2\nif $a > 1\ntype big\nelse\ntype small\nend\nif $a != 2\ntype wrong\nelse\ntype two\nend\n"
+    status, events = simulate(script)
+    assert status == 'finished'
+    assert typed(events) == ['big', 'two']
+
+
+def test_call_and_return(simulate):
+    script = "define greet\ntype hi\nif $who == bob\nreturn\nend\ntype $who\nend\n" \
+             "set who ann\ncall greet\nset who bob\ncall greet\n"
+    status, events = simulate(script)
+    assert status == 'finished'
+    assert typed(events) == ['hi', 'ann', 'hi']
+
+
+def test_stop_halts_script(simulate):
+    status, events = simulate("type a\nstop\ntype b\n")
+    assert status == 'finished'
+    assert typed(events) == ['a']
+    assert events[-1]['event'] == 'end'
+
+
+def test_wait_advances_virtual_clock(simulate):
+    status, events = simulate("wait 2.5\nopen notepad\nwait 1\nclose notepad\n")
+    assert status == 'finished'
+    times = {event['event']: event['t'] for event in events}
+    assert times['open'] == 2.5
+    assert times['close'] == 3.5
+
+
+def test_undefined_variable_fails(simulate):
+    status, events = simulate("type a\ntype $missing\ntype b\n")
+    assert status == 'failed'
+    assert typed(events) == ['a']
+    assert events[-1]['event'] == 'error'
+    assert 'missing' in events[-1]['message']
+
+
+def test_runaway_recursion_fails(simulate):
+    status, events = simulate("define again\ncall again\nend\ncall again\n")
+    assert status == 'failed'
+    assert str(MAX_CALL_DEPTH) in events[-1]['message']
+
+
+def test_unknown_command_counts_as_failure(session, simulate):
+    status, events = simulate("type a\nfrobnicate now\ntype b\n")
+    # The script goes on, but the run is not clean
+    assert status == 'finished'
+    assert typed(events) == ['a', 'b']
+    assert session.executor.failures == 1
+    assert any(event['event'] == 'error' and 'frobnicate' in event['message'] for event in events)
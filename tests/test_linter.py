@@ -0,0 +1,86 @@
+# tests/test_linter.py
+
+import threading
+
+import pytest
+
+from core.linter import ERROR, WARNING, Linter, has_errors
+
+
+@pytest.fixture
+def linter(session, catalog):
+    return Linter(session.registry, catalog, session.compiler.parser, session.compiler)
+
+
+def messages(diagnostics):
+    return [(d.line, d.severity, d.message) for d in diagnostics]
+
+
+def test_clean_script(linter, install_app):
+    install_app('Gedit')
+    assert linter.lint("open gedit\nset who you\ntype hi $who/(ctrl+s)\nclose gedit\n") == []
+
+
+def test_unknown_command_and_bad_arguments(linter):
+    found = messages(linter.lint("frobnicate\nwait soon\nopen\n"))
+    assert found[0] == (1, ERROR, "Unknown command 'frobnicate'")
+    assert found[1][:2] == (2, ERROR) and found[1][2].startswith('wait: ')
+    assert found[2] == (3, ERROR, "open needs an application name")
+
+
+def test_chords(linter):
+    found = linter.lint("type a/(ctrl+nosuchkey)b\ntype a/(ctrl\n")
+    assert [(d.line, d.severity) for d in found] == [(1, ERROR), (2, WARNING)]
+    assert found[0].start == 6
+
+
+def test_undefined_variables(linter):
+    found = linter.lint("set a 1\ntype $a $b\n")
+    assert messages(found) == [(2, ERROR, "Variable 'b' is never set; use $$ for a literal $")]
+    assert found[0].start == 8 and found[0].length == 2
+
+
+def test_structure_errors(linter):
+    found = linter.lint("repeat 2\ntype a\n")
+    assert has_errors(found)
+    assert found[-1].line == 1
+
+
+def test_focus_accepts_window_titles(linter):
+    assert linter.lint("focus Untitled Document\n") == []
+
+
+def test_installed_apps_invalidate_the_cache(linter, catalog, install_app):
+    assert messages(linter.lint("open gedit\n")) == [(1, WARNING, "Unknown application 'gedit'")]
+    install_app('Gedit')
+    catalog.refresh()
+    assert linter.lint("open gedit\n") == []
+
+
+def test_new_commands_invalidate_the_cache(linter, session):
+    assert has_errors(linter.lint("shout\n"))
+    session.registry.register_command('shout', lambda args: None)
+    assert linter.lint("shout\n") == []
+
+
+def test_concurrent_linting(linter):
+    # The GUI thread and the background lint worker share one linter
+    script = ''.join(f"type line {n}\nwait {n}\nfrobnicate{n % 7}\n" for n in range(300))
+    expected = messages(linter.lint(script))
+    linter.clear_cache()
+    results, errors = [], []
+
+    def work():
+        try:
+            for _ in range(5):
+                results.append(messages(linter.lint(script)))
+                linter.clear_cache()
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert all(result == expected for result in results)
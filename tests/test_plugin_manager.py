@@ -0,0 +1,66 @@
+# tests/test_plugin_manager.py
+
+import json
+import sys
+
+import pytest
+
+from core.command_registry import CommandRegistry
+from core.compiler import Compiler
+from core.plugin_manager import PluginManager
+
+PLUGIN_SOURCE = """
+CALLS = []
+
+
+class Plugin:
+    def __init__(self, registry):
+        self.registry = registry
+
+    def register(self):
+        self.registry.register_command('shout', self.shout)
+
+    def shout(self, args):
+        CALLS.append(args)
+"""
+
+
+@pytest.fixture
+def plugins_dir(tmp_path):
+    folder = tmp_path / 'plugins' / 'loud'
+    folder.mkdir(parents=True)
+    (folder / 'plugin.py').write_text(PLUGIN_SOURCE, encoding='utf-8')
+    (folder / 'manifest.json').write_text(json.dumps({'version': '1.0', 'commands': ['shout']}),
+                                          encoding='utf-8')
+    return str(tmp_path / 'plugins')
+
+
+def test_lazy_plugin_loads_on_first_call(tmp_path, plugins_dir):
+    registry = CommandRegistry()
+    manager = PluginManager(registry, index_path=str(tmp_path / 'plugins.json'))
+    manager.load_plugins(plugins_dir)
+    assert not manager.is_loaded('loud')
+    assert 'shout' in registry.all_commands()
+
+    compiler = Compiler(registry, plugin_manager=manager, cache_path='')
+    stub = compiler.compile("shout hey\n")[0].handler
+    version = registry.version
+    stub('one')
+    stub('two')  # resolved once, then called directly
+    assert manager.is_loaded('loud')
+    assert registry.version > version
+    assert sys.modules[type(manager.plugins[0]).__module__].CALLS == ['one', 'two']
+
+    # The next compile binds the plugin's own handler instead of the stub
+    handler = compiler.compile("shout hey\n")[0].handler
+    assert handler is not stub
+    assert handler == registry.get_command('shout')
+
+
+def test_manifests_are_indexed(tmp_path, plugins_dir):
+    index_path = str(tmp_path / 'plugins.json')
+    manager = PluginManager(CommandRegistry(), index_path=index_path)
+    manager.index_manifests(plugins_dir)
+    again = PluginManager(CommandRegistry(), index_path=index_path)
+    again.read_manifest = None  # unchanged manifests come from the index
+    assert again.index_manifests(plugins_dir)['loud']['commands'] == ['shout']
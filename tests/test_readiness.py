@@ -0,0 +1,96 @@
+# tests/test_readiness.py
+
+import os
+import shutil
+import subprocess
+import time
+
+import pytest
+
+from core.control import ExecutionControl
+from core.readiness import (
+    COMM_LENGTH, ProcessProbe, WaitTarget, normalize_process_name, parse_wait_target, wait_until,
+)
+
+needs_proc = pytest.mark.skipif(not os.path.isdir('/proc') or not shutil.which('sleep'),
+                                reason="needs /proc and a sleep binary")
+
+
+@pytest.mark.parametrize('text, target', [
+    ('window Untitled - Notepad', WaitTarget('window', 'Untitled - Notepad', None)),
+    ('process gedit within 2.5', WaitTarget('process', 'gedit', 2.5)),
+    ('Window  Save as  within 3', WaitTarget('window', 'Save as', 3.0)),
+])
+def test_parse_wait_target(text, target):
+    assert parse_wait_target(text) == target
+
+
+@pytest.mark.parametrize('text', ['notepad', 'window', 'file x', 'window x within soon'])
+def test_parse_wait_target_rejects(text):
+    with pytest.raises(ValueError):
+        parse_wait_target(text)
+
+
+def test_normalize_process_name():
+    assert normalize_process_name(' /usr/bin/Gedit ') == 'gedit'
+    assert normalize_process_name('NOTEPAD.EXE') == 'notepad'
+
+
+def test_wait_until_gives_up_after_timeout():
+    calls = []
+    started = time.monotonic()
+    assert wait_until(lambda: calls.append(1), 0.2, ExecutionControl(), initial_interval=0.01) is None
+    assert time.monotonic() - started >= 0.2
+    assert len(calls) > 2
+
+
+def spawn(argv):
+    # Returns once the child has exec'd, so /proc shows its own name
+    process = subprocess.Popen(argv)
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        try:
+            with open(f'/proc/{process.pid}/cmdline', 'rb') as f:
+                if f.read().startswith(os.fsencode(argv[0])):
+                    break
+        except OSError:
+            pass
+        time.sleep(0.01)
+    return process
+
+
+@pytest.fixture
+def long_named_process(tmp_path):
+    # A copy of sleep whose name is longer than the kernel keeps in comm
+    name = 'pach-long-process-name'
+    binary = tmp_path / name
+    shutil.copy(shutil.which('sleep'), binary)
+    process = spawn([str(binary), '30'])
+    yield name, process
+    process.kill()
+    process.wait()
+
+
+@needs_proc
+def test_proc_name_past_comm_limit(long_named_process):
+    name, process = long_named_process
+    probe = ProcessProbe()
+    with open(f'/proc/{process.pid}/comm') as f:
+        assert len(f.read().strip()) == COMM_LENGTH
+    assert probe._proc_name(process.pid) == name
+    assert probe.find(name) == process.pid
+
+
+@needs_proc
+def test_proc_name_of_short_names():
+    process = spawn([shutil.which('sleep'), '30'])
+    try:
+        assert ProcessProbe()._proc_name(process.pid) == 'sleep'
+        assert process.pid in ProcessProbe().find_all('sleep', fresh=True)
+    finally:
+        process.kill()
+        process.wait()
+
+
+def test_proc_name_of_missing_process():
+    assert ProcessProbe()._proc_name(2 ** 22 + 12345) is None
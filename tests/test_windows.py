@@ -0,0 +1,57 @@
+# tests/test_windows.py
+
+from core.windows import FakeWindowBackend, WindowRegistry, select_backend
+
+
+def make_registry(*windows, **kwargs):
+    backend = FakeWindowBackend(windows)
+    return backend, WindowRegistry(backend, ttl=60, **kwargs)
+
+
+def test_find_window_by_title_word_and_substring():
+    _, registry = make_registry(('Untitled - Notepad', 10), ('Mozilla Firefox', 11), ('notes.txt - Gedit', 12))
+    assert registry.find_window('untitled - notepad').pid == 10
+    assert registry.find_window('Firefox').pid == 11
+    assert registry.find_window('otes.t').pid == 12
+    assert registry.find_window('terminal') is None
+    assert registry.find('gedit') == 'notes.txt - Gedit'
+
+
+def test_snapshot_is_cached_until_invalidated():
+    backend, registry = make_registry(('Calculator', 1))
+    registry.find_window('calculator')
+    registry.find_window('calculator')
+    assert backend.enumerations == 1
+    backend.add('Terminal', 2)
+    assert registry.find_window('terminal') is None  # still the old snapshot
+    registry.invalidate()
+    assert registry.find_window('terminal').pid == 2
+    assert backend.enumerations == 2
+
+
+def test_window_for_app_prefers_pids_then_process_names():
+    names = {20: 'gnome-calculator', 21: 'gedit'}
+    _, registry = make_registry(('Calculator', 20), ('Document', 21), process_name=names.get)
+    assert registry.window_for_app('whatever', pids=(21,)).title == 'Document'
+    assert registry.window_for_app('gedit').title == 'Document'
+    assert registry.window_for_app('calculator').title == 'Calculator'
+
+
+def test_focus_and_active_window():
+    backend, registry = make_registry(('One', None))
+    assert registry.active_window() is None
+    late = backend.add('Two')
+    window = registry.find_window('one')
+    assert registry.focus(window)
+    assert registry.active_window().title == 'One'
+    backend.activate(late)  # a window the registry has not enumerated yet
+    assert registry.active_window().title == 'Two'
+    assert backend.activations == [window.handle, late]
+
+
+def test_backend_from_environment(monkeypatch):
+    monkeypatch.setenv('PACH_WINDOW_BACKEND', 'fake')
+    assert isinstance(select_backend(), FakeWindowBackend)
+    monkeypatch.setenv('PACH_WINDOW_BACKEND', 'none')
+    assert select_backend() is None
+    assert not WindowRegistry().available
@@ -1,7 +1,37 @@
-from PyQt5.QtWidgets import QPlainTextEdit, QCompleter, QWidget, QTextEdit
-from PyQt5.QtGui import QFont, QTextCursor, QColor, QPainter, QTextFormat
-from PyQt5.QtCore import Qt, QRect, QSize
+from PyQt5.QtWidgets import QPlainTextEdit, QCompleter, QWidget, QTextEdit, QToolTip
+from PyQt5.QtGui import QFont, QTextCursor, QColor, QPainter, QTextFormat, QTextCharFormat
+from PyQt5.QtCore import Qt, QRect, QSize, QTimer, QStringListModel, QEvent, QPoint
 from ui.syntax_highlighter import SyntaxHighlighter
+from ui.editor_language import EditorLanguage
+
+# Scripts with at least this many lines are opened in large-file mode: loaded in
+# chunks, highlighted around the viewport first and in idle time for the rest
+LARGE_FILE_LINES = 10000
+LOAD_CHUNK_LINES = 5000
+HIGHLIGHT_MARGIN = 200  # lines above and below the viewport highlighted eagerly
+IDLE_HIGHLIGHT_BLOCKS = 200  # blocks highlighted per idle timer tick
+
+# Linter diagnostics: underline and gutter marker colours by severity
+DIAGNOSTIC_COLORS = {'error': '#D00000', 'warning': '#D08000'}
+MAX_UNDERLINES = 2000
+MARKER_SIZE = 8
+
+# Execution tracking: a strip at the gutter's left edge per line that ran, a
+# background on the executing line and a square marker on failed lines
+EXECUTION_COLORS = {'current': '#1565C0', 'done': '#43A047', 'failed': '#D00000'}
+CURRENT_LINE_BACKGROUND = '#BBDEFB'
+EXECUTION_STRIP = 3
+MARKER_X = EXECUTION_STRIP + 1
+
+def describe_execution(record):
+    text = f"Line {record.line}: {'failed' if record.status == 'failed' else 'completed'}"
+    if record.error:
+        text += f"\n{record.error}"
+    text += f"\nLast run {record.last * 1e3:.3g} ms"
+    if record.runs > 1:
+        text += f", {record.runs} runs, {record.seconds * 1e3:.3g} ms in total"
+    return text
+
 
 class LineNumberArea(QWidget):
     def __init__(self, editor):
@@ -14,30 +44,98 @@ class LineNumberArea(QWidget):
     def paintEvent(self, event):
         self.codeEditor.lineNumberAreaPaintEvent(event)
 
+    def event(self, event):
+        if event.type() == QEvent.ToolTip:
+            self.codeEditor.show_diagnostic_tooltip(event.globalPos(), QPoint(0, event.pos().y()), line_only=True)
+            return True
+        return super().event(event)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton and self.codeEditor.show_execution_details(
+                event.globalPos(), QPoint(0, event.pos().y())):
+            return
+        super().mousePressEvent(event)
+
 class ScriptEditor(QPlainTextEdit):
 
-    def __init__(self, keywords=None, applications=None):
+    def __init__(self, keywords=None, applications=None, language=None):
         super().__init__()
         self.setFont(QFont("Consolas", 11))
         self.setPlaceholderText("Write your automation script here...")
         self.just_completed = False
+        self.file_path = None
 
-        self.keywords = keywords or []
-        self.applications = applications or []
+        # Rules and completion indexes are shared between editors when a language
+        # is passed in; a standalone editor builds its own
+        self.language = language or EditorLanguage(keywords or [], applications or [], parent=self)
+        self.language.changed.connect(self._on_language_changed)
+        self._highlight_stale = False
 
         # Setup syntax highlighter
-        self.highlighter = SyntaxHighlighter(self.document(), self.keywords, self.applications)
-
-        # Setup autocomplete
-        self.completer = QCompleter(self.keywords + self.applications)
+        self.highlighter = SyntaxHighlighter(self.document(), self.keywords, self.applications,
+                                             rules=self.language.rules)
+
+        # Setup autocomplete: the engine filters and ranks, the completer only displays
+        self.completion_engine = self.language.completion
+        self.completion_model = QStringListModel()
+        self.completion_prefix = ''
+        self.completion_kind = None
+        self.completer = QCompleter(self.completion_model, self)
         self.completer.setCaseSensitivity(Qt.CaseInsensitive)
         self.completer.setWidget(self)
-        self.completer.setCompletionMode(QCompleter.PopupCompletion)
+        self.completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
         self.completer.setWrapAround(False)
         self.completer.activated.connect(self.insert_completion)
 
-        # Line number area widget
+        # Debounce completion queries while the user is typing quickly
+        self.completion_timer = QTimer(self)
+        self.completion_timer.setSingleShot(True)
+        self.completion_timer.setInterval(40)
+        self.completion_timer.timeout.connect(self.update_completions)
+
+        # Large-file mode: idle highlighting and chunked loading
+        self.large_file = False
+        self.is_loading = False
+        self._pending_chunks = []
+        self._fill_from = None  # first block number the idle fill still has to visit
+        self.fill_timer = QTimer(self)
+        self.fill_timer.setInterval(0)
+        self.fill_timer.timeout.connect(self._fill_highlighting)
+        self.load_timer = QTimer(self)
+        self.load_timer.setInterval(0)
+        self.load_timer.timeout.connect(self._load_next_chunk)
+        self.verticalScrollBar().valueChanged.connect(self._update_highlight_window)
+        self.document().contentsChange.connect(self._on_contents_change)
+
+        # Line number area widget; its width only changes with the number of digits
         self.lineNumberArea = LineNumberArea(self)
+        self._gutter_digits = 0
+        self._gutter_width = 0
+        self._line_height = self.fontMetrics().height()
+
+        # Current line highlight, rebuilt only when the cursor changes line
+        self._current_line_format = QTextCharFormat()
+        self._current_line_format.setBackground(QColor(Qt.yellow).lighter(160))
+        self._current_line_format.setProperty(QTextFormat.FullWidthSelection, True)
+        self._current_line = -1
+        self._line_selections = []
+
+        # Linter diagnostics: underlines plus a marker and tooltip per line
+        self.diagnostics = []
+        self._diagnostics_by_line = {}  # line -> [Diagnostic], errors first
+        self._diagnostic_selections = []
+        self._diagnostic_formats = {}
+        for severity, color in DIAGNOSTIC_COLORS.items():
+            fmt = QTextCharFormat()
+            fmt.setUnderlineStyle(QTextCharFormat.WaveUnderline)
+            fmt.setUnderlineColor(QColor(color))
+            self._diagnostic_formats[severity] = fmt
+
+        # Execution tracking: line -> LineRecord of the last run, and the executing line
+        self.execution_lines = {}
+        self.execution_current = None
+        self._execution_colors = {name: QColor(color) for name, color in EXECUTION_COLORS.items()}
+        self._current_background = QColor(CURRENT_LINE_BACKGROUND)
 
         # Connect signals for updating line numbers
         self.blockCountChanged.connect(self.updateLineNumberAreaWidth)
@@ -49,16 +147,22 @@ class ScriptEditor(QPlainTextEdit):
 
     # --- Line Number related methods ---
     def lineNumberAreaWidth(self):
-        digits = 1
-        max_block = max(1, self.blockCount())
-        while max_block >= 10:
-            max_block //= 10
-            digits += 1
-        space = 3 + self.fontMetrics().width('9') * digits
-        return space
+        return self._gutter_width
 
     def updateLineNumberAreaWidth(self, _):
-        self.setViewportMargins(self.lineNumberAreaWidth(), 0, 0, 0)
+        digits = len(str(max(1, self.blockCount())))
+        if digits == self._gutter_digits:
+            return
+        self._gutter_digits = digits
+        self._gutter_width = MARKER_X + MARKER_SIZE + 2 + self.fontMetrics().width('9') * digits
+        self.setViewportMargins(self._gutter_width, 0, 0, 0)
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.FontChange:
+            self._line_height = self.fontMetrics().height()
+            self._gutter_digits = 0
+            self.updateLineNumberAreaWidth(0)
 
     def updateLineNumberArea(self, rect, dy):
         if dy:
@@ -77,48 +181,286 @@ class ScriptEditor(QPlainTextEdit):
     def lineNumberAreaPaintEvent(self, event):
         painter = QPainter(self.lineNumberArea)
         painter.fillRect(event.rect(), Qt.lightGray)
+        painter.setPen(Qt.black)
+        width = self.lineNumberArea.width() - 2
+        height = self._line_height
 
         block = self.firstVisibleBlock()
         blockNumber = block.blockNumber()
         top = int(self.blockBoundingGeometry(block).translated(self.contentOffset()).top())
         bottom = top + int(self.blockBoundingRect(block).height())
 
+        execution_lines = self.execution_lines
+        colors = self._execution_colors
         while block.isValid() and top <= event.rect().bottom():
             if block.isVisible() and bottom >= event.rect().top():
-                number = str(blockNumber + 1)
-                painter.setPen(Qt.black)
-                painter.drawText(0, top, self.lineNumberArea.width()-2, self.fontMetrics().height(),
-                                 Qt.AlignRight, number)
+                line = blockNumber + 1
+                record = execution_lines.get(line)
+                if line == self.execution_current:
+                    painter.fillRect(0, top, width + 2, height, self._current_background)
+                    painter.fillRect(0, top, EXECUTION_STRIP, height, colors['current'])
+                elif record is not None:
+                    painter.fillRect(0, top, EXECUTION_STRIP, height, colors[record.status])
+                number = str(line)
+                painter.drawText(0, top, width, height, Qt.AlignRight, number)
+                found = self._diagnostics_by_line.get(line)
+                if record is not None and record.status == 'failed':
+                    # Failed runs outrank lint markers; click for the error
+                    painter.fillRect(MARKER_X, top + (height - MARKER_SIZE) // 2, MARKER_SIZE, MARKER_SIZE,
+                                     colors['failed'])
+                elif found:
+                    painter.setPen(Qt.NoPen)
+                    painter.setBrush(QColor(DIAGNOSTIC_COLORS[found[0].severity]))
+                    painter.drawEllipse(MARKER_X, top + (height - MARKER_SIZE) // 2, MARKER_SIZE, MARKER_SIZE)
+                    painter.setPen(Qt.black)
             block = block.next()
             top = bottom
             bottom = top + int(self.blockBoundingRect(block).height())
             blockNumber += 1
 
     def highlightCurrentLine(self):
+        # Moving within a line keeps the existing selection; the full-width
+        # highlight follows the block on its own
+        line = -2 if self.isReadOnly() else self.textCursor().blockNumber()
+        if line == self._current_line:
+            return
+        self._current_line = line
+
         extraSelections = []
 
         if not self.isReadOnly():
             selection = QTextEdit.ExtraSelection()
-
-
-            lineColor = QColor(Qt.yellow).lighter(160)
-
-            selection.format.setBackground(lineColor)
-            selection.format.setProperty(QTextFormat.FullWidthSelection, True)
+            selection.format = self._current_line_format
             selection.cursor = self.textCursor()
             selection.cursor.clearSelection()
             extraSelections.append(selection)
 
-        self.setExtraSelections(extraSelections)
+        self._line_selections = extraSelections
+        self.setExtraSelections(self._line_selections + self._diagnostic_selections)
+
+    # --- Diagnostics ---
+    def set_diagnostics(self, diagnostics):
+        self.diagnostics = diagnostics
+        by_line = {}
+        for diagnostic in diagnostics:
+            by_line.setdefault(diagnostic.line, []).append(diagnostic)
+        for found in by_line.values():
+            found.sort(key=lambda d: d.severity != 'error')
+        self._diagnostics_by_line = by_line
+
+        # Underline cursors follow later edits until the next lint replaces them
+        selections = []
+        document = self.document()
+        for diagnostic in diagnostics[:MAX_UNDERLINES]:
+            block = document.findBlockByNumber(diagnostic.line - 1)
+            if not block.isValid():
+                continue
+            selection = QTextEdit.ExtraSelection()
+            selection.format = self._diagnostic_formats[diagnostic.severity]
+            cursor = QTextCursor(block)
+            cursor.setPosition(block.position() + min(diagnostic.start, block.length() - 1))
+            cursor.setPosition(block.position() + min(diagnostic.start + diagnostic.length, block.length() - 1),
+                               QTextCursor.KeepAnchor)
+            selection.cursor = cursor
+            selections.append(selection)
+        self._diagnostic_selections = selections
+        self.setExtraSelections(self._line_selections + selections)
+        self.lineNumberArea.update()
+
+    def show_diagnostic_tooltip(self, global_pos, pos, line_only=False):
+        cursor = self.cursorForPosition(pos)
+        found = self._diagnostics_by_line.get(cursor.blockNumber() + 1, ())
+        if not line_only:
+            column = cursor.positionInBlock()
+            found = [d for d in found if d.start <= column <= d.start + d.length]
+        messages = [d.message for d in found]
+        record = self.execution_lines.get(cursor.blockNumber() + 1) if line_only else None
+        if record is not None:
+            messages.append(describe_execution(record))
+        if messages:
+            QToolTip.showText(global_pos, '\n'.join(messages), self)
+        else:
+            QToolTip.hideText()
+
+    # --- Execution tracking ---
+    def clear_execution(self):
+        self.execution_lines = {}
+        self.execution_current = None
+        self.lineNumberArea.update()
+
+    def update_execution(self, current, changed):
+        # One batch of ExecutionMonitor changes; repainting is left to Qt, which
+        # merges the update() calls of a frame into one paint
+        self.execution_current = current
+        if changed:
+            self.execution_lines.update(changed)
+        self.lineNumberArea.update()
+
+    def show_execution_details(self, global_pos, pos):
+        # Clicking a failed line's marker shows its error and timing
+        record = self.execution_lines.get(self.cursorForPosition(pos).blockNumber() + 1)
+        if record is None or record.status != 'failed':
+            return False
+        QToolTip.showText(global_pos, describe_execution(record), self.lineNumberArea)
+        return True
+
+    def viewportEvent(self, event):
+        if event.type() == QEvent.ToolTip:
+            self.show_diagnostic_tooltip(event.globalPos(), event.pos())
+            return True
+        return super().viewportEvent(event)
+
+    def go_to_line(self, line):
+        block = self.document().findBlockByNumber(max(0, line - 1))
+        if not block.isValid():
+            return
+        cursor = QTextCursor(block)
+        self.setTextCursor(cursor)
+        self.centerCursor()
+        self.setFocus()
+
+    # --- Large-file mode ---
+    def load_text(self, text):
+        # Small scripts are set at once; large ones are appended in chunks from the
+        # event loop so the window stays responsive while they load
+        if self.is_loading:
+            self._finish_loading()
+        self._pending_chunks = []
+        lines = text.split('\n')
+        self.set_large_file_mode(len(lines) >= LARGE_FILE_LINES)
+        if not self.large_file:
+            self.setPlainText(text)
+            return
+
+        self._pending_chunks = ['\n'.join(lines[i:i + LOAD_CHUNK_LINES])
+                                for i in range(LOAD_CHUNK_LINES, len(lines), LOAD_CHUNK_LINES)]
+        self._pending_chunks.reverse()
+        self.highlighter.window = (0, 2 * HIGHLIGHT_MARGIN)  # the view starts at the top
+        self.setPlainText('\n'.join(lines[:LOAD_CHUNK_LINES]))
+        self._update_highlight_window()
+        if self._pending_chunks:
+            self.is_loading = True
+            self.setReadOnly(True)  # the text is incomplete until the last chunk
+            self.setUndoRedoEnabled(False)
+            self.load_timer.start()
+
+    def _load_next_chunk(self):
+        cursor = QTextCursor(self.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText('\n' + self._pending_chunks.pop())
+        if not self._pending_chunks:
+            self._finish_loading()
+
+    def _finish_loading(self):
+        self.load_timer.stop()
+        self.is_loading = False
+        self.setUndoRedoEnabled(True)
+        self.setReadOnly(False)
+        self.document().setModified(False)
+        self.highlightCurrentLine()
+
+    def set_large_file_mode(self, enabled):
+        self.large_file = enabled
+        self.highlighter.lazy = enabled
+        if not enabled:
+            self.fill_timer.stop()
+            self._fill_from = None
+
+    def _update_highlight_window(self, *_):
+        if not self.large_file:
+            return
+        first = self.firstVisibleBlock().blockNumber()
+        visible = self.viewport().height() // max(1, self._line_height) + 1
+        start, end = max(0, first - HIGHLIGHT_MARGIN), first + visible + HIGHLIGHT_MARGIN
+        self.highlighter.window = (start, end)
+
+        highlighter = self.highlighter
+        block = self.document().findBlockByNumber(start)
+        while block.isValid() and block.blockNumber() <= end:
+            if not highlighter.is_highlighted(block):
+                highlighter.highlight_block(block)
+            block = block.next()
+
+    def _on_contents_change(self, position, removed, added):
+        # New blocks outside the window were skipped by the highlighter
+        if not self.large_file or not added:
+            return
+        number = self.document().findBlock(position).blockNumber()
+        self._fill_from = number if self._fill_from is None else min(self._fill_from, number)
+        if not self.fill_timer.isActive():
+            self.fill_timer.start()
+
+    def _fill_highlighting(self):
+        if self._fill_from is None:
+            self.fill_timer.stop()
+            return
+        highlighter = self.highlighter
+        block = self.document().findBlockByNumber(self._fill_from)
+        for _ in range(IDLE_HIGHLIGHT_BLOCKS):
+            if not block.isValid():
+                self._fill_from = None
+                self.fill_timer.stop()
+                return
+            if not highlighter.is_highlighted(block):
+                highlighter.highlight_block(block)
+            block = block.next()
+        self._fill_from = block.blockNumber() if block.isValid() else None
+
+    # --- Shared language ---
+    @property
+    def keywords(self):
+        return self.language.keywords
+
+    @property
+    def applications(self):
+        return self.language.applications
+
+    def set_vocabulary(self, keywords, applications):
+        # Changes the shared language, so every editor using it follows
+        self.language.set_vocabulary(keywords, applications)
+
+    def _on_language_changed(self):
+        # Hidden editors (inactive tabs) rehighlight when they are shown again
+        if self.isVisible():
+            self.refresh_highlighting()
+        else:
+            self._highlight_stale = True
+
+    def refresh_highlighting(self):
+        self._highlight_stale = False
+        self.highlighter.rehighlight()
+        if self.large_file:
+            # The rehighlight skipped everything outside the window
+            self._update_highlight_window()
+            self._fill_from = 0
+            self.fill_timer.start()
+
+    def release_caches(self):
+        # For editors that are not being looked at; the text and its current
+        # formatting stay, only lookup caches and pending idle work are dropped
+        self.highlighter.clear_cache()
+        self.completion_timer.stop()
+        self.completer.popup().hide()
+        self.completion_model.setStringList([])
+        if self.large_file and self._fill_from is not None:
+            self.fill_timer.stop()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self._highlight_stale:
+            self.refresh_highlighting()
+        elif self.large_file and self._fill_from is not None and not self.fill_timer.isActive():
+            self.fill_timer.start()
 
     # --- Autocomplete and other existing methods ---
     def insert_completion(self, completion):
         tc = self.textCursor()
-        prefix_len = len(self.completer.completionPrefix())
-        tc.movePosition(QTextCursor.Left, QTextCursor.MoveAnchor, prefix_len)
-        tc.movePosition(QTextCursor.Right, QTextCursor.KeepAnchor, prefix_len)
-        tc.insertText(completion + ' ')
+        prefix_len = len(self.completion_prefix)
+        tc.movePosition(QTextCursor.Left, QTextCursor.KeepAnchor, prefix_len)
+        # Escape sequences continue the typed text, words end with a space
+        tc.insertText(completion if self.completion_kind == 'escape' else completion + ' ')
         self.setTextCursor(tc)
+        self.completion_engine.record_use(completion)
         self.just_completed = True  # Mark completion done
 
         # Hide the popup immediately after inserting completion
@@ -130,6 +472,31 @@ class ScriptEditor(QPlainTextEdit):
         tc.select(QTextCursor.WordUnderCursor)
         return tc.selectedText()
 
+    def text_before_cursor(self):
+        tc = self.textCursor()
+        return tc.block().text()[:tc.positionInBlock()]
+
+    def current_completion(self):
+        index = self.completer.popup().currentIndex()
+        if index.isValid():
+            return index.data()
+        return self.completer.currentCompletion()
+
+    def update_completions(self):
+        kind, prefix, matches = self.completion_engine.complete(self.text_before_cursor())
+        if not matches:
+            self.completer.popup().hide()
+            return
+
+        self.completion_kind = kind
+        self.completion_prefix = prefix
+        self.completion_model.setStringList(matches)
+        popup = self.completer.popup()
+        cr = self.cursorRect()
+        cr.setWidth(popup.sizeHintForColumn(0) + popup.verticalScrollBar().sizeHint().width())
+        self.completer.complete(cr)
+        popup.setCurrentIndex(self.completion_model.index(0, 0))
+
     def keyPressEvent(self, event):
         if self.just_completed:
             # Skip autocomplete logic for the immediate next keypress after completion insert
@@ -139,7 +506,7 @@ class ScriptEditor(QPlainTextEdit):
 
         if self.completer.popup().isVisible():
             if event.key() in (Qt.Key_Enter, Qt.Key_Return, Qt.Key_Tab):
-                self.insert_completion(self.completer.currentCompletion())
+                self.insert_completion(self.current_completion())
                 event.accept()
                 # Hide popup to prevent it showing again
                 self.completer.popup().hide()
@@ -156,16 +523,10 @@ class ScriptEditor(QPlainTextEdit):
         if ctrl_or_shift and event.text() == '':
             return
 
-        eow = "~!@#$%^&*()+{}|:\"<>?,./;'[]\\-="  # end of word characters
-        completion_prefix = self.text_under_cursor()
-
-        if (not ctrl_or_shift and completion_prefix != '' and
-            len(completion_prefix) > 0 and event.text() not in eow):
-            self.completer.setCompletionPrefix(completion_prefix)
-            cr = self.cursorRect()
-            cr.setWidth(self.completer.popup().sizeHintForColumn(0) +
-                        self.completer.popup().verticalScrollBar().sizeHint().width())
-            self.completer.complete(cr)
+        if event.text() and not (event.modifiers() & Qt.ControlModifier):
+            # Query after a short pause instead of on every keystroke
+            self.completion_timer.start()
         else:
+            self.completion_timer.stop()
             self.completer.popup().hide()
 
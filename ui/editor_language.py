@@ -0,0 +1,82 @@
+# ui/editor_language.py
+
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from core.completion import CompletionEngine
+from core.language import CONTROL_KEYWORDS
+from ui.syntax_highlighter import HighlightRules
+
+
+class EditorLanguage(QObject):
+    # Highlighting rules and completion indexes built once and shared by every
+    # open editor. They are updated in place; `changed` tells editors to repaint.
+    changed = pyqtSignal()
+    _apps_scanned = pyqtSignal(list)  # emitted from the scan worker
+
+    def __init__(self, keywords=(), applications=(), registry=None, catalog=None, parent=None):
+        super().__init__(parent)
+        self.registry = registry
+        self.catalog = catalog
+        self._registry_version = None
+        if registry is not None:
+            keywords = self._registry_keywords()
+        if catalog is not None:
+            applications = catalog.names()
+        self.keywords = list(keywords)
+        self.applications = list(applications)
+        self.rules = HighlightRules(self.keywords, self.applications)
+        self.completion = CompletionEngine(self.keywords, self.applications)
+        self._pool = None
+        self._scan = None
+        self._apps_scanned.connect(self._on_apps_scanned)
+
+    def _registry_keywords(self):
+        # Core and plugin commands both come from the registry
+        self._registry_version = self.registry.version
+        return sorted(set(self.registry.all_commands()) | set(CONTROL_KEYWORDS))
+
+    def set_vocabulary(self, keywords, applications):
+        keywords, applications = list(keywords), list(applications)
+        if keywords == self.keywords and applications == self.applications:
+            return False
+        if keywords != self.keywords:
+            self.completion.set_commands(keywords)
+        if applications != self.applications:
+            self.completion.set_applications(applications)
+        self.keywords, self.applications = keywords, applications
+        self.rules.set_vocabulary(keywords, applications)
+        self.changed.emit()
+        return True
+
+    def refresh(self, rescan_apps=False):
+        # Picks up plugin commands registered since the last call and, when asked,
+        # applications installed or removed since the catalog was last scanned
+        keywords = self.keywords
+        if self.registry is not None and self.registry.version != self._registry_version:
+            keywords = self._registry_keywords()
+        if self.catalog is not None and rescan_apps:
+            self._rescan_apps()
+        return self.set_vocabulary(keywords, self.applications)
+
+    def _rescan_apps(self):
+        # Scanning the application directories can take a while on a cold cache,
+        # so it runs on a worker and the result is applied on the GUI thread
+        if self._scan is not None and not self._scan.done():
+            return
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pach-apps')
+        self._scan = self._pool.submit(self._scan_apps)
+
+    def _scan_apps(self):
+        self.catalog.refresh()
+        self._apps_scanned.emit(self.catalog.names())
+
+    def _on_apps_scanned(self, applications):
+        self.set_vocabulary(self.keywords, applications)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
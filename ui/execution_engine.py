@@ -0,0 +1,53 @@
+# ui/execution_engine.py
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from core.monitor import ExecutionMonitor
+from core.runner import ScriptRunner
+
+
+class ExecutionEngine(QObject):
+    # Signals are emitted from the runner thread and delivered queued on the GUI thread.
+    # Per-command progress is not signalled; it collects in `monitor`, which the
+    # window drains once per frame.
+    state_changed = pyqtSignal(str)
+    finished = pyqtSignal(str)
+
+    def __init__(self, executor, compiler, parent=None):
+        super().__init__(parent)
+        self.executor = executor
+        self.monitor = ExecutionMonitor()
+        self.runner = ScriptRunner(executor, compiler, on_finished=self.finished.emit)
+        self.finished.connect(self.state_changed.emit)
+
+    @property
+    def is_running(self):
+        return self.runner.is_running()
+
+    @property
+    def is_paused(self):
+        return self.runner.control.paused
+
+    def start(self, script_text):
+        if self.is_running:
+            return False
+        self.monitor.reset()
+        self.executor.monitor = self.monitor
+        if not self.runner.start(script_text):
+            return False
+        self.state_changed.emit('running')
+        return True
+
+    def pause(self):
+        if self.is_running and not self.is_paused:
+            self.runner.pause()
+            self.state_changed.emit('paused')
+
+    def resume(self):
+        if self.is_running and self.is_paused:
+            self.runner.resume()
+            self.state_changed.emit('running')
+
+    def abort(self):
+        if self.is_running:
+            self.runner.abort()
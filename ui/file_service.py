@@ -0,0 +1,79 @@
+# ui/file_service.py
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from core.file_io import content_hash, read_text, write_atomic
+
+
+class FileService(QObject):
+    # Reads and writes run on one worker thread, in request order; results come
+    # back as signals delivered queued on the GUI thread
+    loaded = pyqtSignal(str, str, object)  # path, text, tag passed to load()
+    saved = pyqtSignal(str, bool)          # path, autosave
+    failed = pyqtSignal(str, str, str)     # 'open', 'save' or 'autosave', path, error message
+
+    def __init__(self, parent=None, autosave_delay=2000):
+        super().__init__(parent)
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pach-file-io')
+        self._hashes = {}  # path -> hash of the content last read or written
+        self._lock = threading.Lock()
+
+        # Autosave: restarted on every edit, saves once typing pauses
+        self.autosave_enabled = True
+        self.autosave_source = None  # callable returning a list of (path, text) to save
+        self.autosave_timer = QTimer(self)
+        self.autosave_timer.setSingleShot(True)
+        self.autosave_timer.setInterval(autosave_delay)
+        self.autosave_timer.timeout.connect(self.autosave)
+
+    def load(self, path, tag=None):
+        self._pool.submit(self._load, path, tag)
+
+    def save(self, path, text, autosave=False):
+        digest = content_hash(text)
+        with self._lock:
+            if autosave and self._hashes.get(path) == digest:
+                return False
+            self._hashes[path] = digest
+        self._pool.submit(self._save, path, text, digest, autosave)
+        return True
+
+    def schedule_autosave(self):
+        if self.autosave_enabled and self.autosave_source is not None:
+            self.autosave_timer.start()
+
+    def autosave(self):
+        self.autosave_timer.stop()
+        sources = self.autosave_source() if self.autosave_source else ()
+        for path, text in sources:
+            self.save(path, text, autosave=True)
+
+    def close(self):
+        # Writes a pending autosave and waits for queued writes to finish
+        if self.autosave_timer.isActive():
+            self.autosave()
+        self._pool.shutdown(wait=True)
+
+    def _load(self, path, tag):
+        try:
+            text = read_text(path)
+        except Exception as e:
+            self.failed.emit('open', path, str(e))
+            return
+        with self._lock:
+            self._hashes[path] = content_hash(text)
+        self.loaded.emit(path, text, tag)
+
+    def _save(self, path, text, digest, autosave):
+        try:
+            write_atomic(path, text)
+        except Exception as e:
+            with self._lock:
+                if self._hashes.get(path) == digest:
+                    del self._hashes[path]  # the next autosave retries
+            self.failed.emit('autosave' if autosave else 'save', path, str(e))
+            return
+        self.saved.emit(path, autosave)
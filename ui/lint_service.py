@@ -0,0 +1,42 @@
+# ui/lint_service.py
+
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+
+class LintService(QObject):
+    # Lints the editor text on a worker thread once typing pauses; results for
+    # text that changed again in the meantime are dropped
+    finished = pyqtSignal(int, list)  # revision, diagnostics
+
+    def __init__(self, linter, source, parent=None, delay=300):
+        super().__init__(parent)
+        self.linter = linter
+        self.source = source  # callable returning the current script text
+        self.revision = 0
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pach-lint')
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay)
+        self.timer.timeout.connect(self.lint_now)
+
+    def schedule(self):
+        self.revision += 1
+        self.timer.start()
+
+    def lint_now(self):
+        self.timer.stop()
+        self._pool.submit(self._lint, self.revision, self.source())
+
+    def _lint(self, revision, text):
+        if revision != self.revision:
+            return  # superseded before the worker got to it
+        diagnostics = self.linter.lint(text)
+        if revision == self.revision:
+            self.finished.emit(revision, diagnostics)
+
+    def close(self):
+        self.timer.stop()
+        self.revision += 1
+        self._pool.shutdown(wait=True)
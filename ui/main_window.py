@@ -1,14 +1,31 @@
 from PyQt5.QtWidgets import (
     QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QPushButton, QSplitter,
     QTreeView, QFileSystemModel, QAction, QMenuBar, QFileDialog, QMessageBox,
-    QShortcut
+    QShortcut, QTabWidget
 )
 from PyQt5.QtGui import QKeySequence, QCursor
-from PyQt5.QtCore import Qt, QDir, QTimer, QSettings, QFileInfo
+from PyQt5.QtCore import Qt, QDir, QTimer, QSettings, QFileInfo, QEvent
 
 from ui.editor import ScriptEditor
+from ui.editor_language import EditorLanguage
 from ui.terminal import DebugTerminal
+from ui.execution_engine import ExecutionEngine
+from ui.workspace_search import WorkspaceSearch
+from ui.file_service import FileService
+from ui.lint_service import LintService
 from core.parser import Parser
+from core.compiler import Compiler
+from core.language import APP_COMMANDS
+from core.linter import Linter, has_errors
+from core.paths import cache_dir
+import os
+import time
+
+# Execution markers in the gutter are refreshed at most this often (one frame)
+EXECUTION_FRAME_MS = 16
+
+# Rescan the application catalog at most this often when the window is activated
+APP_RESCAN_INTERVAL = 30.0
 
 
 class MainWindow(QMainWindow):
@@ -32,11 +49,23 @@ class MainWindow(QMainWindow):
         self.executor = executor
         self.plugin_manager = plugin_manager
         self.parser = Parser()
+        self.compiler = Compiler(executor.registry, self.parser, plugin_manager)
 
-        keywords = ['open', 'type', 'wait', 'close', 'hello']  # add plugin commands here
-        applications = ['notepad', 'calculator']
+        self.register_core_commands()
 
-        self.editor = ScriptEditor(keywords=keywords, applications=applications)
+        # Highlighting rules and completion indexes are shared by all tabs
+        self.language = EditorLanguage(registry=self.executor.registry, catalog=self.executor.catalog, parent=self)
+        self._apps_scanned = time.monotonic()
+
+        # One editor per open document
+        self.tabs = QTabWidget()
+        self.tabs.setTabsClosable(True)
+        self.tabs.setMovable(True)
+        self.tabs.setDocumentMode(True)
+        self.tabs.currentChanged.connect(self.on_tab_changed)
+        self.tabs.tabCloseRequested.connect(self.close_tab)
+        self._active_editor = None
+        self._unsaved = set()  # editors edited since their last autosave
         self.terminal = DebugTerminal()
 
         # Left splitter: vertical - terminal + file explorer
@@ -51,12 +80,17 @@ class MainWindow(QMainWindow):
         """)
 
         left_splitter.addWidget(self.file_explorer)
-        left_splitter.setSizes([300, 200])
+
+        # Find in workspace, backed by a background index of the open folder
+        self.workspace_search = WorkspaceSearch()
+        self.workspace_search.open_requested.connect(self.open_file_at)
+        left_splitter.addWidget(self.workspace_search)
+        left_splitter.setSizes([300, 200, 200])
 
         # Main splitter: horizontal - left splitter + editor
         main_splitter = QSplitter(Qt.Horizontal)
         main_splitter.addWidget(left_splitter)
-        main_splitter.addWidget(self.editor)
+        main_splitter.addWidget(self.tabs)
         main_splitter.setStretchFactor(1, 1)
 
         container = QWidget()
@@ -71,17 +105,22 @@ class MainWindow(QMainWindow):
         # File menu
         file_menu = menu_bar.addMenu("File")
         new_action = QAction("New File", self)
+        new_action.setShortcut(QKeySequence("Ctrl+N"))
         open_file_action = QAction("Open File", self)
         open_folder_action = QAction("Open Folder", self)
         recents_action = QAction("Recents", self)
         save_action = QAction("Save", self)
         save_as_action = QAction("Save As", self)
+        close_tab_action = QAction("Close Tab", self)
+        close_tab_action.setShortcut(QKeySequence("Ctrl+W"))
+        self.autosave_action = QAction("Autosave", self)
+        self.autosave_action.setCheckable(True)
         exit_action = QAction("Exit", self)
 
         file_menu.addActions([
             new_action, open_file_action, open_folder_action,
-            recents_action, save_action, save_as_action,
-            exit_action
+            recents_action, save_action, save_as_action, close_tab_action,
+            self.autosave_action, exit_action
         ])
 
         new_action.triggered.connect(self.new_file)
@@ -89,10 +128,17 @@ class MainWindow(QMainWindow):
         open_folder_action.triggered.connect(self.open_folder_dialog)
         save_action.triggered.connect(self.save_file)
         save_as_action.triggered.connect(self.save_file_as)
+        close_tab_action.triggered.connect(lambda: self.close_tab(self.tabs.currentIndex()))
         exit_action.triggered.connect(self.close)
 
-        # Edit menu (empty for now)
-        menu_bar.addMenu("Edit")
+        # Edit menu
+        edit_menu = menu_bar.addMenu("Edit")
+        find_action = QAction("Find in Workspace", self)
+        find_action.setShortcut(QKeySequence("Ctrl+Shift+F"))
+        find_usages_action = QAction("Find Usages of App", self)
+        edit_menu.addActions([find_action, find_usages_action])
+        find_action.triggered.connect(lambda: self.workspace_search.focus_query())
+        find_usages_action.triggered.connect(self.find_app_usages)
 
         # View menu (empty for now)
         menu_bar.addMenu("View")
@@ -100,8 +146,18 @@ class MainWindow(QMainWindow):
         # Run menu
         run_menu = menu_bar.addMenu("Run")
         run_action = QAction("Run Pach File", self)
-        run_menu.addAction(run_action)
+        self.pause_action = QAction("Pause", self)
+        self.stop_action = QAction("Stop", self)
+        self.pause_action.setEnabled(False)
+        self.stop_action.setEnabled(False)
+        self.trace_action = QAction("Trace Execution", self)
+        self.trace_action.setCheckable(True)
+        run_menu.addActions([run_action, self.pause_action, self.stop_action])
+        run_menu.addSeparator()
+        run_menu.addAction(self.trace_action)
         run_action.triggered.connect(self.run_script)
+        self.pause_action.triggered.connect(self.toggle_pause)
+        self.stop_action.triggered.connect(self.stop_script)
 
         # Shortcut Ctrl+Enter to run script
         run_shortcut = QShortcut(QKeySequence("Ctrl+Return"), self)
@@ -111,51 +167,156 @@ class MainWindow(QMainWindow):
         save_shortcut = QShortcut(QKeySequence("Ctrl+S"), self)
         save_shortcut.activated.connect(self.save_file)
 
-        self.executor.logger = self.terminal
-
-        self.register_core_commands()
-
-        self.is_running = False
-        self.abort_requested = False
+        # The terminal's sink is thread-safe, so the runner thread logs into it directly
+        self.executor.logger = self.terminal.sink
+        # Plugins were indexed before the window existed; show what happened then
+        for text, level in self.plugin_manager.messages:
+            self.terminal.log(text, level)
+        self.plugin_manager.logger = self.terminal.sink
+        log_file = self.settings.value("log_file", "")
+        if log_file:
+            self.terminal.sink.mirror_to_file(log_file)
+
+        # Scripts run on a background thread; progress and state come back as signals
+        self.engine = ExecutionEngine(self.executor, self.compiler, self)
+        self.engine.state_changed.connect(self.on_engine_state_changed)
+
+        # The running script's gutter markers, drained from the engine's monitor per frame
+        self.run_editor = None
+        self.execution_timer = QTimer(self)
+        self.execution_timer.setInterval(EXECUTION_FRAME_MS)
+        self.execution_timer.timeout.connect(self.update_execution_markers)
 
         # Timer to check for mouse position for failsafe
         self.failsafe_timer = QTimer()
         self.failsafe_timer.setInterval(100)  # Check every 100ms
         self.failsafe_timer.timeout.connect(self.check_mouse_failsafe)
 
-        # Track current open file path for saving
-        self.current_file_path = None
+        # Opening and saving go through one service that works off the GUI thread
+        self.file_service = FileService(self)
+        self.file_service.loaded.connect(self.on_file_loaded)
+        self.file_service.saved.connect(self.on_file_saved)
+        self.file_service.failed.connect(self.on_file_failed)
+        self.file_service.autosave_source = self.autosave_source
+        self.file_service.autosave_enabled = self.settings.value("autosave", True, type=bool)
+        self.autosave_action.setChecked(self.file_service.autosave_enabled)
+        self.autosave_action.toggled.connect(self.toggle_autosave)
+
+        # Static checks while editing; errors are shown inline and block running
+        self.linter = Linter(self.executor.registry, self.executor.catalog, self.parser, self.compiler)
+        self.lint_service = LintService(self.linter, lambda: self.editor.toPlainText(), self)
+        self.lint_service.finished.connect(self.on_lint_finished)
+
+        self.new_editor()
+        # Only a folder the user opened is indexed, never the home directory by default
+        workspace = self.settings.value("workspace_folder", "")
+        if workspace and QDir(workspace).exists():
+            self.workspace_search.set_root(workspace)
 
     def register_core_commands(self):
-        self.executor.registry.register_command('open', self.executor.cmd_open)
-        self.executor.registry.register_command('wait', self.executor.cmd_wait)
-        self.executor.registry.register_command('close', self.executor.cmd_close)
-        self.executor.registry.register_command('type', self.executor.cmd_type)
+        self.executor.register_core_commands()
+
+    # --- Tabs ---
+    @property
+    def editor(self):
+        return self.tabs.currentWidget()
+
+    @property
+    def current_file_path(self):
+        return self.editor.file_path
+
+    @current_file_path.setter
+    def current_file_path(self, path):
+        self.editor.file_path = path
+        self.update_tab_title(self.editor)
+
+    def editors(self):
+        return [self.tabs.widget(i) for i in range(self.tabs.count())]
+
+    def find_editor(self, path):
+        for editor in self.editors():
+            if editor.file_path and os.path.normcase(os.path.abspath(editor.file_path)) == \
+                    os.path.normcase(os.path.abspath(path)):
+                return editor
+        return None
+
+    def new_editor(self, path=None):
+        editor = ScriptEditor(language=self.language)
+        editor.file_path = path
+        editor.textChanged.connect(lambda: self.on_editor_changed(editor))
+        editor.modificationChanged.connect(lambda _: self.update_tab_title(editor))
+        index = self.tabs.addTab(editor, '')
+        self.update_tab_title(editor)
+        self.tabs.setCurrentIndex(index)
+        return editor
+
+    def update_tab_title(self, editor):
+        index = self.tabs.indexOf(editor)
+        if index < 0:
+            return
+        name = os.path.basename(editor.file_path) if editor.file_path else "Untitled"
+        self.tabs.setTabText(index, name + (" *" if editor.document().isModified() else ""))
+        self.tabs.setTabToolTip(index, editor.file_path or "")
+
+    def on_editor_changed(self, editor):
+        self._unsaved.add(editor)
+        self.file_service.schedule_autosave()
+        if editor is self.editor:
+            self.lint_service.schedule()
+
+    def on_tab_changed(self, index):
+        # The tab left behind keeps its text and formatting but drops its caches
+        previous = self._active_editor
+        if previous is not None and previous is not self.editor and self.tabs.indexOf(previous) >= 0:
+            previous.release_caches()
+        self._active_editor = self.editor
+        if self.editor is not None:
+            self.lint_service.schedule()
+
+    def close_tab(self, index):
+        editor = self.tabs.widget(index)
+        if editor is None:
+            return
+        if editor.document().isModified() and not (editor.file_path and self.file_service.autosave_enabled):
+            answer = QMessageBox.question(
+                self, "Close Tab", f"Save changes to {self.tabs.tabText(index).rstrip(' *')}?",
+                QMessageBox.Save | QMessageBox.Discard | QMessageBox.Cancel)
+            if answer == QMessageBox.Cancel:
+                return
+            if answer == QMessageBox.Save:
+                self.tabs.setCurrentIndex(index)
+                self.save_file()
+                if not editor.file_path:
+                    return  # the save dialog was cancelled
+        elif editor in self._unsaved and editor.file_path and self.file_service.autosave_enabled \
+                and not editor.is_loading:
+            self.file_service.save(editor.file_path, editor.toPlainText(), autosave=True)
+        self._unsaved.discard(editor)
+        if self._active_editor is editor:
+            self._active_editor = None
+        self.tabs.removeTab(index)
+        editor.deleteLater()
+        if self.tabs.count() == 0:
+            self.new_editor()
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.ActivationChange and self.isActiveWindow():
+            # Plugins may have registered commands and apps may have been installed
+            rescan = time.monotonic() - self._apps_scanned >= APP_RESCAN_INTERVAL
+            if rescan:
+                self._apps_scanned = time.monotonic()
+            self.language.refresh(rescan_apps=rescan)
 
     def open_file_from_explorer(self, index):
         file_path = self.file_model.filePath(index)
-        from PyQt5.QtCore import QDir
         if QDir(file_path).exists():
             # It's a directory, do nothing or expand folder
             return
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            self.editor.setPlainText(content)
-            self.current_file_path = file_path
-
-            # --- FIXED: save folder, not file ---
-            file_info = QFileInfo(file_path)
-            self.last_opened_folder = file_info.absolutePath()
-
-            self.settings.setValue("last_opened_folder", self.last_opened_folder)
-            self.terminal.log(f"Opened file: {file_path}")
-        except Exception as e:
-            QMessageBox.warning(self, "Open File", f"Could not open file:\n{e}")
+        self.open_file(file_path)
 
     def new_file(self):
-        self.editor.clear()
-        self.current_file_path = None
+        self.new_editor()
         self.terminal.log("Created new file.")
 
     def open_file_dialog(self):
@@ -166,48 +327,75 @@ class MainWindow(QMainWindow):
             "Pach Script Files (*.psc);;All Files (*)"
         )
         if path:
-            try:
-                with open(path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                self.editor.setPlainText(content)
-                self.current_file_path = path
-
-                # --- FIXED: save folder, not file ---
-                file_info = QFileInfo(path)
-                self.last_opened_folder = file_info.absolutePath()
-
-                self.settings.setValue("last_opened_folder", self.last_opened_folder)
-                self.terminal.log(f"Opened file: {path}")
-            except Exception as e:
-                QMessageBox.warning(self, "Open File", f"Could not open file:\n{e}")
+            self.open_file(path)
 
     def open_folder_dialog(self):
         path = QFileDialog.getExistingDirectory(self, "Open Folder", self.last_opened_folder)
         if path:
             self.file_explorer.setRootIndex(self.file_model.index(path))
-            self.current_file_path = None
             self.last_opened_folder = path
             self.settings.setValue("last_opened_folder", self.last_opened_folder)
+            self.settings.setValue("workspace_folder", path)
             self.terminal.log(f"Opened folder: {path}")
+            self.workspace_search.set_root(path)
+
+    def open_file_at(self, path, line):
+        self.open_file(path, line)
+
+    def open_file(self, path, line=None):
+        # A file that is already open gets its tab back instead of a second copy
+        editor = self.find_editor(path)
+        if editor is not None:
+            self.tabs.setCurrentWidget(editor)
+            if line:
+                editor.go_to_line(line)
+            return
+        # Read on the file service thread; on_file_loaded shows the result
+        self.file_service.load(path, line)
+
+    def on_file_loaded(self, path, content, line):
+        editor = self.find_editor(path)
+        if editor is None:
+            current = self.editor
+            if current is not None and not current.file_path and not current.document().isModified() \
+                    and current.document().isEmpty():
+                editor = current  # replace the empty untitled tab
+                editor.file_path = path
+            else:
+                editor = self.new_editor(path)
+        editor.load_text(content)
+        editor.document().setModified(False)
+        self._unsaved.discard(editor)
+        self.update_tab_title(editor)
+        self.tabs.setCurrentWidget(editor)
+        self.remember_folder(path)
+        self.terminal.log(f"Opened file: {path}")
+        if line:
+            editor.go_to_line(line)
+
+    def remember_folder(self, path):
+        # The folder of the last opened or saved file, not the file itself
+        self.last_opened_folder = QFileInfo(path).absolutePath()
+        self.settings.setValue("last_opened_folder", self.last_opened_folder)
+
+    def find_app_usages(self):
+        # Uses the application of the current open/close line, if there is one
+        cmd, args = self.parser.parse_line(self.editor.textCursor().block().text())
+        app = args.strip() if cmd in APP_COMMANDS else None
+        self.workspace_search.focus_query(app, 'usages_of_app')
+        if app:
+            self.workspace_search.run_query()
 
     def save_file(self):
         if self.current_file_path:
-            try:
-                with open(self.current_file_path, 'w', encoding='utf-8') as f:
-                    f.write(self.editor.toPlainText())
-                self.terminal.log(f"Saved file: {self.current_file_path}")
-
-                # Also update last_opened_folder here to folder containing current file
-                file_info = QFileInfo(self.current_file_path)
-                self.last_opened_folder = file_info.absolutePath()
-
-                self.settings.setValue("last_opened_folder", self.last_opened_folder)
-            except Exception as e:
-                QMessageBox.warning(self, "Save File", f"Could not save file:\n{e}")
+            self.write_file(self.current_file_path)
         else:
             self.save_file_as()
 
     def save_file_as(self):
+        if self.editor.is_loading:
+            self.terminal.log("The file is still loading. Please wait.")
+            return
         path, _ = QFileDialog.getSaveFileName(
             self,
             "Save File As",
@@ -217,19 +405,49 @@ class MainWindow(QMainWindow):
         if path:
             if not path.endswith('.psc'):
                 path += '.psc'
-            try:
-                with open(path, 'w', encoding='utf-8') as f:
-                    f.write(self.editor.toPlainText())
-                self.current_file_path = path
-
-                # Save folder too here
-                file_info = QFileInfo(path)
-                self.last_opened_folder = file_info.absolutePath()
+            self.current_file_path = path
+            self.write_file(path)
 
-                self.settings.setValue("last_opened_folder", self.last_opened_folder)
-                self.terminal.log(f"Saved file as: {path}")
-            except Exception as e:
-                QMessageBox.warning(self, "Save File", f"Could not save file:\n{e}")
+    def write_file(self, path):
+        if self.editor.is_loading:
+            self.terminal.log("The file is still loading. Please wait.")
+            return
+        self._unsaved.discard(self.editor)
+        self.file_service.save(path, self.editor.toPlainText())
+
+    def autosave_source(self):
+        # Every tab edited since the last autosave, not only the visible one
+        sources = []
+        for editor in list(self._unsaved):
+            if editor.file_path and not editor.is_loading:
+                self._unsaved.discard(editor)
+                sources.append((editor.file_path, editor.toPlainText()))
+        return sources
+
+    def toggle_autosave(self, enabled):
+        self.file_service.autosave_enabled = enabled
+        self.settings.setValue("autosave", enabled)
+        if not enabled:
+            self.file_service.autosave_timer.stop()
+
+    def on_file_saved(self, path, autosave):
+        editor = self.find_editor(path)
+        if editor is not None and editor not in self._unsaved:
+            editor.document().setModified(False)
+        if autosave:
+            self.statusBar().showMessage(f"Autosaved {path}", 3000)
+        else:
+            self.terminal.log(f"Saved file: {path}")
+            self.remember_folder(path)
+
+    def on_file_failed(self, operation, path, message):
+        if operation == 'open':
+            QMessageBox.warning(self, "Open File", f"Could not open file:\n{message}")
+        elif operation == 'autosave':
+            # No dialog: autosave retries on the next edit
+            self.terminal.log(f"Autosave failed for {path}: {message}", 'error')
+        else:
+            QMessageBox.warning(self, "Save File", f"Could not save file:\n{message}")
 
     def check_mouse_failsafe(self):
         cursor_pos = QCursor.pos()
@@ -246,35 +464,109 @@ class MainWindow(QMainWindow):
             (x >= right - margin and y >= bottom - margin)  # bottom-right
         )
         if in_corner:
-            self.abort_requested = True
             self.terminal.log("Failsafe triggered: Mouse moved to corner. Aborting script...")
             self.failsafe_timer.stop()
+            self.engine.abort()
+
+    @property
+    def is_running(self):
+        return self.engine.is_running
 
     def run_script(self):
         if self.is_running:
             self.terminal.log("Script is already running. Please wait.")
             return
+        if self.editor.is_loading:
+            self.terminal.log("The file is still loading. Please wait.")
+            return
+
+        if self.trace_action.isChecked():
+            self.executor.enable_tracing()
+        else:
+            self.executor.disable_tracing()
+
+        script_text = self.editor.toPlainText()
+        diagnostics = self.linter.lint(script_text)
+        self.editor.set_diagnostics(diagnostics)
+        if has_errors(diagnostics):
+            for diagnostic in diagnostics:
+                if diagnostic.severity == 'error':
+                    self.terminal.log(f"Line {diagnostic.line}: {diagnostic.message}", 'error', diagnostic.line)
+            self.terminal.log("Script not started: fix the errors above first.")
+            return
 
-        self.is_running = True
-        self.abort_requested = False
         self.terminal.log("Starting script execution...\n")
+        if self.run_editor is not None and self.tabs.indexOf(self.run_editor) >= 0:
+            self.run_editor.clear_execution()
+        self.run_editor = self.editor
+        self.run_editor.clear_execution()
+        if self.engine.start(script_text):
+            self.execution_timer.start()
+
+    def toggle_pause(self):
+        if self.engine.is_paused:
+            self.engine.resume()
+        else:
+            self.engine.pause()
+
+    def stop_script(self):
+        if self.is_running:
+            self.terminal.log("Stopping script...")
+            self.engine.abort()
+
+    def on_engine_state_changed(self, state):
+        running = state in ('running', 'paused')
+        self.pause_action.setEnabled(running)
+        self.stop_action.setEnabled(running)
+        self.pause_action.setText("Resume" if state == 'paused' else "Pause")
+
+        if state == 'running':
+            self.failsafe_timer.start()
+        elif state == 'paused':
+            self.failsafe_timer.stop()
+            self.terminal.log("Script paused.")
+        else:
+            self.failsafe_timer.stop()
+            self.execution_timer.stop()
+            self.update_execution_markers()  # the last commands' results
+            if state == 'finished':
+                self.terminal.log("\nScript execution finished.")
+            elif state == 'aborted':
+                self.terminal.log("\nScript aborted.")
+            else:
+                self.terminal.log("\nScript execution failed.")
+            self.report_trace()
 
-        self.failsafe_timer.start()
+    def update_execution_markers(self):
+        changes = self.engine.monitor.take_changes()
+        if changes is None:
+            return
+        editor = self.run_editor
+        if editor is not None and self.tabs.indexOf(editor) >= 0:
+            editor.update_execution(*changes)
 
+    def report_trace(self):
+        tracer = self.executor.tracer
+        if tracer is None or not tracer.events:
+            return
+        path = cache_dir('traces', time.strftime('trace-%Y%m%d-%H%M%S.json'))
         try:
-            script = self.editor.toPlainText()
-            commands = self.parser.parse_script(script)
-            for cmd, args in commands:
-                if self.abort_requested:
-                    self.terminal.log("\nScript aborted by failsafe.")
-                    break
-                self.terminal.log(f"> {cmd} {args}")
-                try:
-                    self.executor.execute(cmd, args)
-                except Exception as e:
-                    self.terminal.log(f"Error executing command '{cmd}': {e}")
-            else:
-                self.terminal.log("\nScript execution finished.")
-        finally:
-            self.is_running = False
-            self.failsafe_timer.stop()
+            tracer.write_chrome_trace(path)
+        except OSError as e:
+            self.terminal.log(f"Could not write trace: {e}")
+            return
+        self.terminal.log(tracer.summary_table())
+        self.terminal.log(f"Chrome trace written to {path}")
+
+    def on_lint_finished(self, revision, diagnostics):
+        if revision == self.lint_service.revision:
+            self.editor.set_diagnostics(diagnostics)
+
+    def closeEvent(self, event):
+        self.lint_service.close()
+        self.language.close()
+        self.file_service.close()
+        self.workspace_search.stop()
+        # Apps a script closed are still being terminated in the background
+        self.executor.process_manager.wait_closed(timeout=5.0)
+        super().closeEvent(event)
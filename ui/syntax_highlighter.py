@@ -1,44 +1,140 @@
+import re
+
 from PyQt5.QtGui import QSyntaxHighlighter, QTextCharFormat, QColor, QFont
-from PyQt5.QtCore import Qt, QRegExp
 
-class SyntaxHighlighter(QSyntaxHighlighter):
-    def __init__(self, document, keywords, applications):
-        super().__init__(document)
+from core.language import APP_COMMANDS
+
+# One pass over each line: a comment swallows the rest, otherwise words
+TOKEN_PATTERN = re.compile(r'#.*|\w+')
+WORD_PATTERN = re.compile(r'\w+')
+
+SPAN_CACHE_SIZE = 4096
+
+# Block state of blocks skipped in lazy mode, left for the editor's idle fill
+UNHIGHLIGHTED = -2
+
 
+class HighlightRules:
+    def __init__(self, keywords=(), applications=()):
         # Format for keywords
-        keyword_format = QTextCharFormat()
-        keyword_format.setForeground(QColor("#0000FF"))  # Blue
-        keyword_format.setFontWeight(QFont.Bold)
+        self.keyword_format = QTextCharFormat()
+        self.keyword_format.setForeground(QColor("#0000FF"))  # Blue
+        self.keyword_format.setFontWeight(QFont.Bold)
 
         # Format for applications
-        app_format = QTextCharFormat()
-        app_format.setForeground(QColor("#008000"))  # Dark Green
+        self.app_format = QTextCharFormat()
+        self.app_format.setForeground(QColor("#008000"))  # Dark Green
 
         # Format for comments
-        comment_format = QTextCharFormat()
-        comment_format.setForeground(QColor("#808080"))  # Gray
-        comment_format.setFontItalic(True)
+        self.comment_format = QTextCharFormat()
+        self.comment_format.setForeground(QColor("#808080"))  # Gray
+        self.comment_format.setFontItalic(True)
 
-        self.highlighting_rules = []
+        self.generation = 0
+        self.set_vocabulary(keywords, applications)
 
-        # Keywords
+    def set_vocabulary(self, keywords, applications):
+        # Single lookup table: lowercase word -> format (applications win, as before)
+        formats = {}
+        phrases = set()
         for word in keywords:
-            pattern = QRegExp(r'\b' + word + r'\b', Qt.CaseInsensitive)
-            self.highlighting_rules.append((pattern, keyword_format))
-
-        # Applications
+            formats[word.lower()] = self.keyword_format
         for app in applications:
-            pattern = QRegExp(r'\b' + app + r'\b', Qt.CaseInsensitive)
-            self.highlighting_rules.append((pattern, app_format))
+            app = app.lower()
+            if WORD_PATTERN.fullmatch(app):
+                formats[app] = self.app_format
+            else:
+                phrases.add(app)
+        self._formats = formats
+        self._phrases = phrases
+        self.generation += 1
+
+    def spans(self, text):
+        spans = []
+        formats = self._formats
+        first = True
+        for match in TOKEN_PATTERN.finditer(text):
+            token = match.group()
+            start = match.start()
+            if token[0] == '#':
+                spans.append((start, len(token), self.comment_format))
+                break
+
+            word = token.lower()
+            fmt = formats.get(word)
+            if fmt is not None:
+                spans.append((start, len(token), fmt))
 
-        # Comments - any text after #
-        self.highlighting_rules.append((QRegExp(r'#.*'), comment_format))
+            if first:
+                first = False
+                if self._phrases and word in APP_COMMANDS:
+                    spans.extend(self._phrase_span(text, match.end()))
+        return spans
+
+    def _phrase_span(self, text, offset):
+        argument = text[offset:].split('#', 1)[0]
+        name = argument.strip()
+        if name.lower() in self._phrases:
+            return [(offset + argument.index(name), len(name), self.app_format)]
+        return []
+
+
+class SyntaxHighlighter(QSyntaxHighlighter):
+    def __init__(self, document, keywords, applications, rules=None):
+        super().__init__(document)
+        self.rules = rules or HighlightRules(keywords, applications)
+
+        # Spans per line text, so repeated and re-edited lines skip tokenizing
+        self._span_cache = {}
+        self._cache_generation = self.rules.generation
+
+        # Lazy mode (large files): only blocks inside `window` are highlighted when
+        # Qt asks; the rest are highlighted one by one through highlight_block()
+        self.lazy = False
+        self.window = (0, -1)
+        self._forced_block = -1
+
+    def is_highlighted(self, block):
+        return block.userState() == self.rules.generation
+
+    def highlight_block(self, block):
+        # Only this block is forced; the cascade to the next block stops at the window edge
+        self._forced_block = block.blockNumber()
+        try:
+            self.rehighlightBlock(block)
+        finally:
+            self._forced_block = -1
+
+    def set_vocabulary(self, keywords, applications):
+        self.rules.set_vocabulary(keywords, applications)
+        self.rehighlight()
+
+    def clear_cache(self):
+        self._span_cache = {}
 
     def highlightBlock(self, text):
-        for pattern, fmt in self.highlighting_rules:
-            index = pattern.indexIn(text)
-            while index >= 0:
-                length = pattern.matchedLength()
-                self.setFormat(index, length, fmt)
-                index = pattern.indexIn(text, index + length)
-        self.setCurrentBlockState(0)
+        if self.lazy:
+            number = self.currentBlock().blockNumber()
+            first, last = self.window
+            if (number < first or number > last) and number != self._forced_block:
+                self.setCurrentBlockState(UNHIGHLIGHTED)
+                return
+
+        rules = self.rules
+        if self._cache_generation != rules.generation:
+            self._span_cache = {}
+            self._cache_generation = rules.generation
+
+        spans = self._span_cache.get(text)
+        if spans is None:
+            spans = rules.spans(text)
+            if len(self._span_cache) >= SPAN_CACHE_SIZE:
+                self._span_cache = {}
+            self._span_cache[text] = spans
+
+        for start, length, fmt in spans:
+            self.setFormat(start, length, fmt)
+
+        # Block state carries the vocabulary generation; it stays constant between
+        # vocabulary changes so an edit never cascades into the following blocks
+        self.setCurrentBlockState(rules.generation)
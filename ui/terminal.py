@@ -1,11 +1,30 @@
 # ui/terminal.py
 
 from PyQt5.QtWidgets import QPlainTextEdit
+from PyQt5.QtCore import QTimer
+
+from core.log_sink import LogSink
 
 class DebugTerminal(QPlainTextEdit):
-    def __init__(self):
+    def __init__(self, max_lines=5000, flush_interval=50, max_batch=2000):
         super().__init__()
         self.setReadOnly(True)
+        # Oldest lines are dropped once the history reaches max_lines
+        self.setMaximumBlockCount(max_lines)
+        self.max_batch = max_batch
+
+        # Any thread may log into the sink; the GUI thread appends in batches
+        self.sink = LogSink()
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setInterval(flush_interval)
+        self.flush_timer.timeout.connect(self.flush)
+        self.flush_timer.start()
+
+    def log(self, text, level='info', line=None, command=None):
+        self.sink.log(text, level, line, command)
 
-    def log(self, text):
-        self.appendPlainText(text)
+    def flush(self):
+        if self.sink.empty():
+            return
+        records = self.sink.drain(self.max_batch)
+        self.appendPlainText('\n'.join(record.message for record in records))
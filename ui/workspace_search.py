@@ -0,0 +1,137 @@
+# ui/workspace_search.py
+
+import os
+
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QComboBox, QListWidget, QListWidgetItem, QLabel
+)
+from PyQt5.QtCore import Qt, QTimer, QFileSystemWatcher, pyqtSignal
+
+from core.workspace_index import WorkspaceIndexer
+
+# Search modes shown in the combo box: label -> WorkspaceIndex query method
+SEARCH_MODES = (
+    ('Text', 'search'),
+    ('App usages', 'usages_of_app'),
+    ('Command usages', 'usages_of_command'),
+)
+
+
+class WorkspaceSearch(QWidget):
+    # Emitted with (path, line) when a result is activated
+    open_requested = pyqtSignal(str, int)
+    # Emitted from the indexer thread; delivered queued on the GUI thread
+    index_changed = pyqtSignal(list)
+    watch_requested = pyqtSignal(list)
+
+    def __init__(self, parent=None, result_limit=500):
+        super().__init__(parent)
+        self.indexer = None
+        self.result_limit = result_limit
+        # After the first crawl the index follows change notifications instead of
+        # polling. Only directories are watched, which keeps within inotify's
+        # watch limit; a save that replaces a script changes its directory.
+        self.watcher = None
+
+        self.query_edit = QLineEdit()
+        self.query_edit.setPlaceholderText("Find in workspace...")
+        self.mode_box = QComboBox()
+        for label, _ in SEARCH_MODES:
+            self.mode_box.addItem(label)
+        self.results = QListWidget()
+        self.status = QLabel("No folder indexed")
+
+        top = QHBoxLayout()
+        top.addWidget(self.query_edit, 1)
+        top.addWidget(self.mode_box)
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(top)
+        layout.addWidget(self.results, 1)
+        layout.addWidget(self.status)
+        self.setLayout(layout)
+
+        # Queries run after a short pause in typing
+        self.query_timer = QTimer(self)
+        self.query_timer.setSingleShot(True)
+        self.query_timer.setInterval(150)
+        self.query_timer.timeout.connect(self.run_query)
+
+        self.query_edit.textChanged.connect(self.query_timer.start)
+        self.query_edit.returnPressed.connect(self.run_query)
+        self.mode_box.currentIndexChanged.connect(self.run_query)
+        self.results.itemActivated.connect(self._open_item)
+        self.index_changed.connect(self._on_index_changed)
+        self.watch_requested.connect(self._watch)
+
+    def set_root(self, root):
+        if self.indexer is not None:
+            if self.indexer.root == os.path.abspath(root):
+                return
+            self.stop()
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self._on_path_changed)
+        self.indexer = WorkspaceIndexer(root, on_change=self.index_changed.emit,
+                                        on_watch=self.watch_requested.emit)
+        self.status.setText(f"Indexing {self.indexer.root}...")
+        self.results.clear()
+        self.indexer.start()
+
+    def stop(self):
+        if self.watcher is not None:
+            self.watcher.deleteLater()
+            self.watcher = None
+        if self.indexer is not None:
+            self.indexer.stop(timeout=2.0)
+            self.indexer = None
+
+    def _watch(self, paths):
+        if self.watcher is None:
+            return
+        watched = set(self.watcher.directories())
+        gone = [path for path in watched if not os.path.exists(path)]
+        if gone:
+            self.watcher.removePaths(gone)  # moved away; a watch would follow the old inode
+        paths = [path for path in paths if path not in watched and os.path.exists(path)]
+        if paths:
+            self.watcher.addPaths(paths)
+
+    def _on_path_changed(self, path):
+        if self.indexer is not None:
+            self.indexer.notify(path)
+
+    def focus_query(self, text=None, mode='search'):
+        for position, (_, method) in enumerate(SEARCH_MODES):
+            if method == mode:
+                self.mode_box.setCurrentIndex(position)
+        if text is not None:
+            self.query_edit.setText(text)
+        self.query_edit.setFocus()
+        self.query_edit.selectAll()
+
+    def run_query(self):
+        self.query_timer.stop()
+        self.results.clear()
+        query = self.query_edit.text().strip()
+        if self.indexer is None or not query:
+            return
+        method = SEARCH_MODES[self.mode_box.currentIndex()][1]
+        hits = getattr(self.indexer.index, method)(query, limit=self.result_limit)
+        root = self.indexer.root
+        for hit in hits:
+            item = QListWidgetItem(f"{os.path.relpath(hit.path, root)}:{hit.line}  {hit.text.strip()}")
+            item.setData(Qt.UserRole, (hit.path, hit.line))
+            self.results.addItem(item)
+        more = '+' if len(hits) >= self.result_limit else ''
+        self.status.setText(f"{len(hits)}{more} results in {len(self.indexer.index)} scripts")
+
+    def _on_index_changed(self, changed):
+        if self.indexer is None:
+            return
+        self.status.setText(f"Indexed {len(self.indexer.index)} scripts in {self.indexer.root}")
+        if changed and self.query_edit.text().strip():
+            self.query_timer.start()
+
+    def _open_item(self, item):
+        path, line = item.data(Qt.UserRole)
+        self.open_requested.emit(path, line)